@@ -1,260 +1,187 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import io, csv, math, time
-from datetime import datetime
-import streamlit.components.v1 as components
+import json
+import threading
+import time
+import config
+from engine.game import GameEngine, GameError
+from engine.scenario import SAMPLE_BONDS_CSV, load_bonds_csv, propose_events
+from services.order_log import OrderLog
+from services.game_store import create_store, game_nbytes
+from services import perf
+from services.sheets_queue import SheetsWriteBehind
+from services.storage_models import read_csv_frame
 
 # ==============================
 # STORE COMPARTIDO (por game_code)
 # ==============================
 @st.cache_resource
 def _get_game_store():
-    # Un único dict (por proceso) para compartir estado entre pestañas
-    # Nota: si hay múltiples réplicas de servidor, cada una tendrá su store.
-    return {}
+    # Un único store (por proceso) para compartir estado entre pestañas.
+    # Con varias réplicas de servidor usar config.STORE["backend"] = "sqlite" (archivo compartido).
+    return create_store(config.STORE)
+
+@st.cache_resource
+def _open_sheets_queue():
+    # Si abrir el spreadsheet falla, la excepción sube y cache_resource no guarda nada
+    from services.sheets import open_spreadsheet, invalidate
+    sh = open_spreadsheet(st.secrets["SPREADSHEET_KEY"])
+    return SheetsWriteBehind(sh, on_write=lambda name: invalidate(sh, name), **config.SHEETS_QUEUE)
+
+@st.cache_resource
+def _sheets_retry() -> dict:
+    return {"at": 0.0}
+
+def _get_sheets_queue():
+    """Cola write-behind hacia Google Sheets (None si Sheets no está habilitado o configurado, o si no
+    se pudo abrir: en ese caso se reintenta pasados SHEETS_RETRY_S segundos, no queda en None)."""
+    if not (config.FLAGS.get("enable_sheets") and config.has_sheets_secrets()):
+        return None
+    retry = _sheets_retry()
+    if time.monotonic() < retry["at"]:
+        return None
+    try:
+        return _open_sheets_queue()
+    except Exception:
+        retry["at"] = time.monotonic() + SHEETS_RETRY_S
+        return None
+
+def _game_code():
+    return st.session_state.get("game_code", "MB-001")
 
 def _store_ref():
-    store = _get_game_store()
-    gc = st.session_state.get("game_code", "MB-001")
-    if gc not in store:
-        store[gc] = {
-            "round": 0,
-            "prices": {},
-            "orders": [],
-            "teams": set(),
-            "bonds": None,
-            "events": None,
-            "trading_on": False,
-        }
-    return store[gc]
-
-def sync_from_store_to_state():
-    """Lectura: trae al estado local lo que haya en el store para este game_code."""
+    """Snapshot (solo lectura, sin lock) del juego actual."""
+    return _get_game_store().snapshot(_game_code())
+
+@st.cache_resource
+def _get_engines():
+    """Motores por game_code (uno por juego y proceso) y su lock. Cuando el store desaloja un juego
+    su motor se cierra y sale del registro, así no crece con juegos que ya no están en memoria."""
+    engines, lock = {}, threading.Lock()
+    def drop(gc: str):
+        with lock:
+            eng = engines.pop(gc, None)
+        if eng is not None:
+            eng.close()
+    _get_game_store().on_evict = drop
+    return engines, lock
+
+def _engine() -> GameEngine:
+    """Motor del juego actual: el libro de órdenes y las reservas de riesgo viven aquí; el resto del
+    estado está en el store compartido."""
+    engines, lock = _get_engines()
+    gc = _game_code()
+    with lock:
+        eng = engines.get(gc)
+        if eng is None:
+            eng = engines[gc] = GameEngine(_get_game_store(), gc, n_rounds=3, sheets=_get_sheets_queue(),
+                                           mm_depth=config.ORDER_BOOK["mm_depth"],
+                                           cancel_on_new_round=config.ORDER_BOOK["cancel_on_new_round"],
+                                           risk=config.RISK)
+    if eng.sheets is None:
+        eng.sheets = _get_sheets_queue()   # Sheets pudo no estar disponible al crear el motor
+    return eng
+
+def submit_book_order(team: str, bond_id, side: str, qty: float, price: float | None) -> dict:
+    """Controles pre-trade y envío al libro del bono (ver GameEngine.submit_order)."""
+    res = _engine().submit_order(team, bond_id, side, qty, price, fee_bps=state.fee_bps)
+    sync_from_store_to_state()
+    return res
+
+def submit_bulk_orders(data, team: str | None = None) -> pd.DataFrame:
+    """Lote de órdenes (CSV ya leído, DataFrame o lista de dicts) contra la cotización publicada.
+    Devuelve la tabla de resultados por orden (status "ok" / "rechazada" y motivo)."""
+    res = _engine().submit_bulk(data, fee_bps=state.fee_bps, team=team)
+    sync_from_store_to_state()
+    return res
+
+def cancel_book_order(team: str, oid: int) -> bool:
+    return _engine().cancel_order(team, oid)
+
+def sync_from_store_to_state(force: bool = False):
+    """Lectura: trae al estado local lo que haya en el store para este game_code.
+    Si la versión del juego no cambió desde la última sincronización, no hace nada.
+    """
+    with perf.span(_game_code(), "sync"):
+        _sync(force)
+
+def _sync(force: bool):
     ref = _store_ref()
+    seen = (_game_code(), ref["version"])
+    if not force and state.get("_synced") == seen:
+        return
+    state._synced     = seen
+    state.versions    = ref["versions"]
     state.round       = ref["round"]
     state.prices      = ref["prices"]
     state.orders      = ref["orders"]
+    state.ledger      = ref["ledger"]
     state.teams       = ref["teams"]
     state.bonds       = ref["bonds"]
     state.events      = ref["events"]
+    state.grid        = ref.get("grid")
     state.trading_on  = ref["trading_on"]
 
-def flush_state_to_store(keys: list[str]):
-    """Escritura: persiste al store compartido las claves modificadas."""
-    ref = _store_ref()
-    for k in keys:
-        ref[k] = getattr(state, k)
-
-# ==============================
-# Helpers CSV robusto (coma/; | UTF-8/latin-1 | BOM)
-# ==============================
-def _to_text(file_like):
-    if isinstance(file_like, str):
-        return io.StringIO(file_like)
-    raw = None
-    if hasattr(file_like, "getvalue"):
-        raw = file_like.getvalue()
-    elif hasattr(file_like, "read"):
-        raw = file_like.read()
-    if raw is None:
-        return io.StringIO("")
-    if isinstance(raw, bytes):
-        for enc in ("utf-8-sig", "utf-8", "latin-1"):
-            try:
-                return io.StringIO(raw.decode(enc))
-            except Exception:
-                pass
-        return io.StringIO(raw.decode(errors="ignore"))
-    return io.StringIO(str(raw))
-
-def _sniff(sample):
-    try:
-        return csv.Sniffer().sniff(sample, delimiters=[",",";","\t","|"])
-    except Exception:
-        class _D(csv.Dialect):
-            delimiter=","
-            quotechar='"'
-            doublequote=True
-            skipinitialspace=True
-            lineterminator="\n"
-            quoting=csv.QUOTE_MINIMAL
-        return _D
-
-def load_bonds_csv(uploaded_or_text) -> pd.DataFrame:
-    text = _to_text(uploaded_or_text)
-    sample = text.read(4096); text.seek(0)
-    dialect = _sniff(sample)
-    reader = csv.reader(text, dialect)
-    try:
-        header = next(reader)
-    except StopIteration:
-        return pd.DataFrame()
-    header = [(h or "").strip().lower() for h in header]
-    rows = []
-    for r in reader:
-        if not any(str(x).strip() for x in r): continue
-        r = list(r) + [""]*(len(header)-len(r)) if len(r)<len(header) else r[:len(header)]
-        rows.append({header[i]: r[i] for i in range(len(header))})
-    df = pd.DataFrame(rows)
-
-    # columnas mínimas
-    must = ["bond_id","nombre","valor_nominal","tasa_cupon_anual","frecuencia_anual","vencimiento_anios","spread_bps"]
-    for c in must:
-        if c not in df.columns: df[c] = ""
-
-    # casts y normalizaciones
-    def fnum(x, d=0.0):
-        try:
-            s = str(x).replace(",", ".").replace("%","").strip()
-            return float(s) if s!="" else d
-        except Exception:
-            return d
+def memo(name, keys: tuple, fn):
+    """Valor derivado del store (DataFrames de las tablas) cacheado por versión y compartido entre las
+    sesiones del juego: `fn()` solo se recalcula cuando cambia la versión de alguna de las claves `keys`
+    (según la última sincronización). Lo devuelto no se modifica."""
+    def build():
+        with perf.span(_game_code(), f"frame:{name[0] if isinstance(name, tuple) else name}"):
+            return fn()
+    return _engine().view(name, state, keys, build)
 
-    def fint(x, d=0):
-        try:
-            s = str(x).replace(",", ".").strip()
-            return int(float(s)) if s!="" else d
-        except Exception:
-            return d
-
-    def tf(s):
-        s = str(s).strip().upper()
-        return s in ("TRUE","1","SI","SÍ","YES","Y","T")
-
-    df["bond_id"]            = df["bond_id"].map(lambda x: str(x).strip())
-    df["valor_nominal"]      = df["valor_nominal"].map(lambda x: fnum(x, 1000))
-    df["tasa_cupon_anual"]   = df["tasa_cupon_anual"].map(lambda x: fnum(x, 0.0))
-    df["frecuencia_anual"]   = df["frecuencia_anual"].map(lambda x: fint(x, 2))
-    df["vencimiento_anios"]  = df["vencimiento_anios"].map(lambda x: fnum(x, 3.0))
-    df["spread_bps"]         = df["spread_bps"].map(lambda x: fnum(x, 0.0))
-    if "callable" in df.columns:
-        df["callable"] = df["callable"].map(tf)
-    else:
-        df["callable"] = False
-    if "precio_call" not in df.columns: df["precio_call"] = np.nan
-    return df
-
-# ==============================
-# Modelo de precios (MVP)
-# ==============================
-def price_bond_mid(row, ytm_anual: float, frac_anio: float, rounds_elapsed: int) -> float:
-    Vn   = float(row["valor_nominal"])
-    c    = float(row["tasa_cupon_anual"])
-    f    = int(row["frecuencia_anual"])
-    T0   = float(row["vencimiento_anios"])
-    # Ajustar time-to-maturity según rondas transcurridas
-    T    = max(0.0, T0 - rounds_elapsed * frac_anio)
-    if T <= 0:  # al vencimiento, valor nominal
-        return Vn
-    C    = Vn * (c / f)
-    i    = ytm_anual / f
-    N    = max(1, math.ceil(T * f))  # pagos restantes
-    # PV de cupones + principal
-    pv_c = sum(C / ((1 + i) ** k) for k in range(1, N + 1))
-    pv_p = Vn / ((1 + i) ** N)
-    return float(pv_c + pv_p)
-
-def bid_ask_from_mid(mid: float, bid_bp: float, ask_bp: float) -> tuple[float,float]:
-    bid = mid * (1 - bid_bp/10_000)
-    ask = mid * (1 + ask_bp/10_000)
-    return float(bid), float(ask)
-
-def effective_ytm(row, base_rate_anual: float, market_bps: float, idios_bps: float) -> float:
-    return base_rate_anual + row["spread_bps"]/10_000 + market_bps/10_000 + idios_bps/10_000
+def show_df(name: str, df, **kw):
+    """st.dataframe con span de render (lo que cuesta serializar y enviar la tabla al navegador)."""
+    with perf.span(_game_code(), f"render:{name}"):
+        st.dataframe(df, **kw)
 
 # ==============================
-# Propuesta de 3 eventos adaptativos
-# ==============================
-def propose_events(bonds_df: pd.DataFrame, e1_market_bps: int, e2_idios_bps: int, e3_delta_good_bps: int, e3_delta_rest_bps: int):
-    """Devuelve lista de 3 eventos paramétricos y adaptativos al dataset."""
-    hi = bonds_df.sort_values("spread_bps", ascending=False).iloc[0]["bond_id"]
-    lo = bonds_df.sort_values("spread_bps", ascending=True).iloc[0]["bond_id"]
-    return [
-        {"round": 1, "tipo": "MARKET", "bond_id": None, "delta_tasa_bps": e1_market_bps, "impacto_bps": 0,
-         "descripcion": f"Shock de tasa global {e1_market_bps:+} bps"},
-        {"round": 2, "tipo": "IDIOS", "bond_id": hi, "delta_tasa_bps": 0, "impacto_bps": e2_idios_bps,
-         "descripcion": f"Widening idiosincrático en {hi}: {e2_idios_bps:+} bps"},
-        {"round": 3, "tipo": "MIXTO", "bond_id": lo, "delta_tasa_bps": 0, "impacto_bps": 0,
-         "descripcion": f"Flight-to-quality: {lo} {e3_delta_good_bps:+} bps; resto {e3_delta_rest_bps:+} bps (y +liquidez)"}
-    ]
-
-# ==============================
-# PNL y posiciones
+# Helpers CSV robusto (coma/; | UTF-8/latin-1 | BOM)
 # ==============================
-def compute_positions(orders: list[dict]):
-    pos = {}   # (team,bond) -> qty
-    cash = {}  # team -> cash
-    fees = {}  # team -> fees
-    for od in orders:
-        t = od["team"]; b = od["bond_id"]; side = od["side"]
-        q = float(od["qty"]); px = float(od["price_exec"])
-        fee = float(od["fees"])
-        fees[t] = fees.get(t, 0.0) + fee
-        if side == "BUY":
-            cash[t] = cash.get(t, 100_000.0) - q*px - fee
-            pos[(t,b)] = pos.get((t,b), 0.0) + q
-        else:
-            cash[t] = cash.get(t, 100_000.0) + q*px - fee
-            pos[(t,b)] = pos.get((t,b), 0.0) - q
-    # completar cash inicial si equipo no operó
-    teams = set([od["team"] for od in orders])
-    for t in teams:
-        cash.setdefault(t, 100_000.0)
-    return pos, cash, fees
-
-def portfolio_value(teams, bonds_df, prices_dict, orders):
-    """
-    Versión robusta: nunca lanza KeyError; devuelve DF vacío con columnas esperadas si no hay datos.
-    """
-    pos, cash, fees = compute_positions(orders)
-    values = []
-    for t in teams:
-        c = cash.get(t, 100_000.0)
-        pv = c
-        if bonds_df is not None and "bond_id" in bonds_df.columns:
-            for b in bonds_df["bond_id"]:
-                q = pos.get((t,b), 0.0)
-                mid = prices_dict.get(b, {}).get("mid", np.nan)
-                if not np.isnan(mid):
-                    pv += q * mid
-        values.append({"team": t, "valor_portafolio": round(pv,2), "cash": round(c,2)})
-    df = pd.DataFrame(values)
-    if df.empty or "valor_portafolio" not in df.columns:
-        return pd.DataFrame(columns=["team","valor_portafolio","cash"])
-    return df.sort_values("valor_portafolio", ascending=False).reset_index(drop=True)
+def _warn_rejected(rej: pd.DataFrame):
+    if len(rej):
+        st.warning(f"{len(rej)} celdas o filas no se pudieron leer (celdas con su valor por defecto, filas omitidas).")
+        st.dataframe(rej, use_container_width=True, hide_index=True)
 
 # ==============================
 # Estado inicial
 # ==============================
 APP_TITLE = "Misión Bonos — Competencia"
 APP_VERSION = "1.2.0 (multisesión + autosync)"
-
-DEFAULTS = dict(
-    # persistencia de rol y equipo actual (por sesión)
-    role="Moderador",
-    current_team="",
-    # parámetros de juego
-    game_code="MB-001",
-    frac_anio=0.25,
-    base_rate=0.00,
-    bid_bp=10,
-    ask_bp=10,
-    fee_bps=5,
-    round=0,             # 0 = antes de eventos; 1..3 después de cada publicación
-    prices={},           # {bond_id: {mid,bid,ask}}
-    orders=[],           # lista de dicts
-    teams=set(),         # set de team_names
-    bonds=None,
-    events=None,
-    trading_on=False,
-    liquidity_widen_bp=10
-)
+MINI_LEADERBOARD_K = 10
+SHEETS_RETRY_S = 60.0     # espera antes de reintentar abrir Google Sheets tras un fallo
+ORDERS_PAGE_SIZES = [50, 200, 1000]
+
+def _defaults() -> dict:
+    """Estado inicial de una sesión; objetos nuevos en cada llamada (nada mutable compartido entre sesiones)."""
+    return dict(
+        # persistencia de rol y equipo actual (por sesión)
+        role="Moderador",
+        current_team="",
+        # parámetros de juego
+        game_code="MB-001",
+        frac_anio=0.25,
+        base_rate=0.00,
+        bid_bp=10,
+        ask_bp=10,
+        fee_bps=5,
+        round=0,             # 0 = antes de eventos; 1..3 después de cada publicación
+        versions={},         # versión por clave del store vista en la última sincronización
+        prices={},           # {bond_id: {mid,bid,ask}}
+        orders=OrderLog(),   # log columnar (services.order_log)
+        teams=frozenset(),   # team_names (se reemplaza en cada registro)
+        bonds=None,
+        events=None,
+        grid=None,           # escenario precalculado: schedule + precios de todas las rondas
+        trading_on=False,
+        liquidity_widen_bp=10
+    )
 
 st.set_page_config(page_title=APP_TITLE, layout="wide")
 
 # Inicializa estado local
-for k,v in DEFAULTS.items():
+for k,v in _defaults().items():
     if k not in st.session_state:
         st.session_state[k]=v
 state = st.session_state
@@ -273,7 +200,7 @@ with st.sidebar:
     state["game_code"] = st.text_input("Game Code", value=state["game_code"])
     st.caption("Cada equipo usa el mismo Game Code.")
     st.markdown("---")
-    autosync = st.checkbox("Auto-sync cada 2s (recarga la pestaña)", value=False, key="autosync_global")
+    autosync = st.checkbox("Auto-sync en vivo (solo cuando hay cambios)", value=False, key="autosync_global")
 
 # ¡Muy importante!
 # Trae del STORE compartido lo que haya para este game_code (precios, round, etc.)
@@ -281,12 +208,26 @@ sync_from_store_to_state()
 
 st.title(f"{APP_TITLE} · v{APP_VERSION}")
 
-# Auto-sync opcional (refresca la pestaña cada 2 segundos)
+# Auto-sync opcional: long-poll sobre la versión del juego dentro de un fragment.
+# Sin cambios no se re-ejecuta nada; con cambios se re-ejecuta la app (sin recargar la pestaña)
+# y las secciones en vivo solo recalculan lo que cambió (memo por versión).
+@st.fragment(run_every=config.LIVE_SYNC["tick_s"])
+def _live_sync():
+    gc, seen = state.get("_synced", (None, -1))
+    if gc != _game_code():
+        return
+    # En la corrida completa el fragment corre inline justo después del sync: solo se revisa la
+    # versión (sin esperar) para no demorar el resto de la página; el long-poll es de los ticks.
+    wait_s = 0.0 if state.get("_live_inline") else config.LIVE_SYNC["wait_s"]
+    if _get_game_store().wait_for_change(gc, seen, timeout=wait_s):
+        st.rerun()
+
 if autosync:
-    components.html(
-        "<script>setTimeout(function(){window.parent.location.reload()}, 2000);</script>",
-        height=0,
-    )
+    state._live_inline = True
+    try:
+        _live_sync()
+    finally:
+        state._live_inline = False
 
 # ==============================
 # Moderador
@@ -297,8 +238,8 @@ def ui_moderator():
     # Botón Forzar sync
     col_sync, _ = st.columns([1,6])
     if col_sync.button("🔄 Forzar sync", key="force_sync_mod"):
-        sync_from_store_to_state()
-        st.experimental_rerun()
+        sync_from_store_to_state(force=True)
+        st.rerun()
 
     # Banner de estado
     st.info(
@@ -320,22 +261,18 @@ def ui_moderator():
                     st.warning("Sube un CSV o usa el ejemplo.")
                 else:
                     try:
-                        df = load_bonds_csv(up)
-                        state.bonds = df
-                        flush_state_to_store(["bonds"])   # <-- STORE
+                        df, rejected = load_bonds_csv(up)
+                        _engine().load_bonds(df)          # <-- STORE
+                        sync_from_store_to_state()
                         st.success(f"Cargados {len(df)} bonos.")
+                        _warn_rejected(rejected)
                     except Exception as e:
                         st.error("No se pudo leer el CSV.")
                         st.exception(e)
         with colB:
             if st.button("Usar ejemplo"):
-                sample_csv = """bond_id,nombre,valor_nominal,tasa_cupon_anual,frecuencia_anual,vencimiento_anios,spread_bps,callable,precio_call,descripcion
-B1,Bono Soberano 3y,1000,0.06,2,3,80,FALSE,,Core
-B2,Bono Corp AAA 5y,1000,0.05,2,5,120,TRUE,1020,Callable
-B3,Bono HY 4y,1000,0.08,4,4,300,FALSE,,High Yield
-"""
-                state.bonds = load_bonds_csv(sample_csv)
-                flush_state_to_store(["bonds"])       # <-- STORE
+                _engine().load_bonds(load_bonds_csv(SAMPLE_BONDS_CSV)[0])   # <-- STORE
+                sync_from_store_to_state()
                 st.success("Ejemplo cargado.")
 
         if state.bonds is not None:
@@ -359,10 +296,19 @@ B3,Bono HY 4y,1000,0.08,4,4,300,FALSE,,High Yield
         e3_rest = st.slider("Evento 3: Castigo al resto (bps)", -150, 150, 30, step=5)
 
         if state.bonds is not None:
-            state.events = propose_events(state.bonds, e1, e2, e3_good, e3_rest)
-            flush_state_to_store(["events"])  # <-- STORE
+            events = propose_events(state.bonds, e1, e2, e3_good, e3_rest)
+            _engine().set_scenario(events, state.base_rate, state.frac_anio, state.bid_bp, state.ask_bp,
+                                   state.liquidity_widen_bp)   # <-- STORE (eventos + grilla)
+            sync_from_store_to_state()
             st.dataframe(pd.DataFrame(state.events), use_container_width=True)
 
+            campo = st.radio("Vista previa de precios por ronda", ["mid","bid","ask"], horizontal=True)
+            st.dataframe(
+                pd.DataFrame(state.grid[campo].T, index=state.grid["bond_ids"],
+                             columns=[f"Ronda {r+1}" for r in range(state.grid[campo].shape[0])]),
+                use_container_width=True,
+            )
+
     with st.expander("3) Publicar evento / abrir trading", expanded=True):
         disabled = state.bonds is None or state.events is None
         c1, c2, c3 = st.columns(3)
@@ -370,88 +316,113 @@ B3,Bono HY 4y,1000,0.08,4,4,300,FALSE,,High Yield
             publish_next_event()
         trading = c2.toggle("Trading ON", value=(state.get("trading_on", False) and state.round>0), disabled=(state.round==0))
         if trading != state.get("trading_on", False):
-            state.trading_on = trading
-            flush_state_to_store(["trading_on"])  # <-- STORE
+            _engine().set_trading(trading)        # <-- STORE
+            sync_from_store_to_state()
         if c3.button("Finalizar Juego (calcular ranking)", disabled=(state.round<3)):
-            state.trading_on = False
-            flush_state_to_store(["trading_on"])  # <-- STORE
+            _engine().set_trading(False)          # <-- STORE
+            sync_from_store_to_state()
             st.success("Juego finalizado. Ranking disponible abajo.")
 
     st.markdown("### Orders")
-    st.dataframe(pd.DataFrame(state.orders) if state.orders else pd.DataFrame(columns=["ts","team","bond_id","side","qty","price_exec","fees","ronda"]), use_container_width=True, height=240)
+    ui_orders_table()
+    if st.button("Verificar ledger (replay completo)"):
+        diffs = _engine().verify_ledger(snap=state)
+        if diffs:
+            st.error("El ledger no cuadra con el log de órdenes: " + "; ".join(diffs[:10]))
+        else:
+            st.success(f"Ledger OK ({state.ledger.n_orders} órdenes).")
+
+    with st.expander("Store (memoria del servidor)", expanded=False):
+        ss = _get_game_store().stats()
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Juegos en memoria", ss["live_games"])
+        m2.metric("Memoria viva (MB)", f"{ss['live_bytes']/1e6:,.2f}")
+        m3.metric("Juegos en disco", ss["spilled_games"])
+        m4.metric("Desalojos / rehidrataciones", f"{ss['evictions']} / {ss['rehydrations']}")
+
+    if perf.enabled():
+        with st.expander("Rendimiento", expanded=False):
+            ui_performance()
 
     st.markdown("### Leaderboard (en vivo)")
     lb = compute_leaderboard_current()
-    st.dataframe(lb, use_container_width=True)
+    show_df("leaderboard", lb, use_container_width=True)
 
 def publish_next_event():
-    """Calcula precios y avanza round (1..3)."""
-    if state.bonds is None or state.events is None:
-        st.warning("Carga bonos y define eventos primero."); return
-    if state.round >= 3:
-        st.info("Ya se publicaron los 3 eventos."); return
-
-    evt = state.events[state.round]   # 0->1, 1->2, 2->3
-    round_target = state.round + 1
-    prices = {}
-    widen = state.liquidity_widen_bp if round_target==3 else 0
-
-    def parse_good_rest():
-        good_bps, rest_bps = -30, 30
-        try:
-            e = next(ev for ev in state.events if ev["tipo"]=="MIXTO")
-            parts = e["descripcion"].split(":")[1]
-            nums = [p for p in parts.replace("bps","").replace("+","").split() if p.replace("-","").isdigit()]
-            if len(nums)>=2:
-                good_bps = int(nums[0]); rest_bps = int(nums[1])
-        except Exception:
-            pass
-        return good_bps, rest_bps
-
-    for _,row in state.bonds.iterrows():
-        market_bps = 0.0
-        idios_bps  = 0.0
-        if evt["tipo"]=="MARKET":
-            market_bps = evt["delta_tasa_bps"]
-        elif evt["tipo"]=="IDIOS":
-            if row["bond_id"]==evt["bond_id"]:
-                idios_bps = evt["impacto_bps"]
-        elif evt["tipo"]=="MIXTO":
-            lo = state.bonds.sort_values("spread_bps", ascending=True).iloc[0]["bond_id"]
-            good_bps, rest_bps = parse_good_rest()
-            idios_bps = good_bps if row["bond_id"]==lo else rest_bps
-
-        ytm = effective_ytm(row, state.base_rate, market_bps, idios_bps)
-        mid = price_bond_mid(row, ytm, state.frac_anio, rounds_elapsed=round_target-1)
-        bid_bp = state.bid_bp + (widen if evt["tipo"]=="MIXTO" else 0)
-        ask_bp = state.ask_bp + (widen if evt["tipo"]=="MIXTO" else 0)
-        bid, ask = bid_ask_from_mid(mid, bid_bp, ask_bp)
-        prices[row["bond_id"]] = {"mid": round(mid,2), "bid": round(bid,2), "ask": round(ask,2)}
-
-    state.prices = prices
-    state.round = round_target
-    state.trading_on = True
-    flush_state_to_store(["prices", "round", "trading_on"])  # <-- STORE
-    st.success(f"Evento {state.round} publicado: {evt['descripcion']}")
-
-def compute_leaderboard_current():
-    if state.bonds is None or not state.teams:
-        return pd.DataFrame(columns=["team","valor_portafolio","cash"])
-    prices_mid = {b: v for b,v in state.prices.items()}
-    teams = list(state.teams) if state.teams else []
-    return portfolio_value(teams, state.bonds, prices_mid, state.orders)
+    """Publica la siguiente ronda desde la grilla precalculada y avanza round (1..3)."""
+    try:
+        pub = _engine().publish_next_round()   # <-- STORE (prices + round + trading_on juntos)
+    except GameError as e:
+        st.warning(str(e)); return
+    sync_from_store_to_state()
+    st.success(f"Evento {pub['round']} publicado: {pub['descripcion']}")
+
+def compute_leaderboard_current(k: int | None = None):
+    return memo(("leaderboard", k), ("orders", "prices", "teams", "bonds"),
+                lambda: _engine().leaderboard(k, snap=state))
+
+def _reset_orders_page():
+    state["ord_page"] = 1
+
+def ui_orders_table():
+    """Órdenes del juego paginadas: filtro y corte en el servidor; al navegador solo va la página visible
+    (más recientes primero). Cambiar un filtro o el tamaño vuelve a la página 1."""
+    f1, f2, f3, f4 = st.columns([2, 2, 1, 1])
+    team = f1.selectbox("Equipo", ["(todos)"] + sorted(state.teams), key="ord_team", on_change=_reset_orders_page)
+    bonds = [] if state.bonds is None else list(state.bonds["bond_id"])
+    bond = f2.selectbox("Bono", ["(todos)"] + bonds, key="ord_bond", on_change=_reset_orders_page)
+    ronda = f3.selectbox("Ronda", ["(todas)"] + list(range(1, state.round + 1)), key="ord_ronda",
+                         on_change=_reset_orders_page)
+    size = f4.selectbox("Filas", ORDERS_PAGE_SIZES, key="ord_size", on_change=_reset_orders_page)
+    filt = (None if team == "(todos)" else team, None if bond == "(todos)" else bond,
+            None if ronda == "(todas)" else ronda)
+    idx = memo(("orders_idx",) + filt, ("orders",), lambda: state.orders.select(*filt))
+    pages = max(1, -(-len(idx) // size))
+    if state.get("ord_page", 1) > pages:
+        state["ord_page"] = pages
+    p1, p2 = st.columns([1, 5])
+    page = int(p1.number_input("Página", min_value=1, max_value=pages, step=1, key="ord_page"))
+    p2.caption(f"{len(idx):,} órdenes · página {page} de {pages}")
+    hi = len(idx) - (page - 1) * size
+    rows = idx[max(0, hi - size):hi][::-1]
+    dfo = memo(("orders_page",) + filt + (page, size), ("orders",), lambda: state.orders.to_frame(rows=rows))
+    show_df("orders", dfo, use_container_width=True, height=240)
+
+def ui_performance():
+    """Panel del moderador: spans de la ventana móvil (services.perf) para este juego."""
+    gc = _game_code()
+    summ = perf.recorder().summary(gc)
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Reruns / s", f"{summ['rates'].get('reruns', 0.0):,.2f}")
+    m2.metric("Órdenes / s", f"{summ['rates'].get('orders', 0.0):,.2f}")
+    m3.metric("Órdenes en el log", f"{len(state.orders):,}")
+    m4.metric("Tamaño del juego (MB)", f"{game_nbytes(_store_ref())/1e6:,.2f}")
+    rows = [dict(span=k, n=v["count"], p50_ms=v["p50_ms"], p95_ms=v["p95_ms"], max_ms=v["max_ms"],
+                 total_ms=v["total_ms"]) for k, v in summ["spans"].items()]
+    st.caption(f"Ventana móvil de {summ['window_s']:.0f} s (todas las sesiones de este juego en este proceso).")
+    if rows:
+        st.dataframe(pd.DataFrame(rows).sort_values("total_ms", ascending=False).round(2),
+                     use_container_width=True, hide_index=True)
+    c1, c2 = st.columns(2)
+    c1.download_button("Exportar JSON", json.dumps(perf.recorder().export(gc), indent=1),
+                       file_name=f"rendimiento_{gc}.json", mime="application/json")
+    if c2.button("Reiniciar métricas"):
+        perf.recorder().reset(gc)
 
 # ==============================
 # Participante
 # ==============================
+def my_positions(team_name: str):
+    return _engine().positions(team_name, snap=state)
+
 def ui_participant():
     st.subheader("Panel del Participante")
 
     # Botón Forzar sync
     col_sync, _ = st.columns([1,6])
     if col_sync.button("🔄 Forzar sync", key="force_sync_part"):
-        sync_from_store_to_state()
-        st.experimental_rerun()
+        sync_from_store_to_state(force=True)
+        st.rerun()
 
     # Banner de estado
     st.info(
@@ -464,12 +435,13 @@ def ui_participant():
     c1,c2 = st.columns(2)
     team = c1.text_input("Nombre de equipo", value=state.get("current_team",""), key="team_name")
     if c2.button("Registrar / Entrar"):
-        if not team.strip():
-            st.warning("Ingresa un nombre de equipo.")
+        try:
+            _engine().register_team(team)      # <-- STORE
+        except GameError as e:
+            st.warning(str(e))
         else:
-            state.teams.add(team.strip())
             state.current_team = team.strip()
-            flush_state_to_store(["teams"])  # <-- STORE
+            sync_from_store_to_state()
             st.success(f"Equipo '{team}' registrado.")
     if state.get("current_team"):
         st.info(f"Equipo actual: **{state.current_team}**")
@@ -480,8 +452,8 @@ def ui_participant():
     if state.round==0 or not state.prices:
         st.info("Aún no hay evento publicado o no hay precios disponibles.")
     else:
-        dfp = pd.DataFrame.from_dict(state.prices, orient="index").reset_index().rename(columns={"index":"bond_id"})
-        st.dataframe(dfp, use_container_width=True)
+        dfp = memo("prices_df", ("prices",), lambda: pd.DataFrame.from_dict(state.prices, orient="index").reset_index().rename(columns={"index":"bond_id"}))
+        show_df("prices", dfp, use_container_width=True)
 
     st.markdown("### Órdenes")
     if not state.get("trading_on", False):
@@ -497,48 +469,89 @@ def ui_participant():
                 side    = colB.selectbox("Side", options=["BUY","SELL"])
                 qty     = colC.number_input("Cantidad", min_value=1, value=10, step=1)
                 px_exec = state.prices[bond_id]["ask"] if side=="BUY" else state.prices[bond_id]["bid"]
-                fee     = (qty * px_exec) * (state.fee_bps/10_000)
-                colD.metric("Precio exec", f"{px_exec:,.2f}")
+                colD.metric("Precio MM", f"{px_exec:,.2f}")
+                colE, colF = st.columns([1,1])
+                tipo  = colE.radio("Tipo", ["Mercado", "Límite"], horizontal=True,
+                                   help="Mercado: ejecuta contra el libro y la cotización publicada (lo no ejecutado se descarta). "
+                                        "Límite: lo no ejecutado queda en el libro.")
+                limit = colF.number_input("Precio límite", min_value=0.01, value=float(px_exec), step=0.01,
+                                          disabled=(tipo == "Mercado"))
                 if st.button("Enviar orden"):
                     team_name = state.get("current_team")
-                    od = dict(ts=datetime.utcnow().isoformat(), team=team_name, bond_id=bond_id, side=side,
-                              qty=qty, price_exec=px_exec, fees=round(fee,2), ronda=state.round)
-                    state.orders.append(od)
-                    flush_state_to_store(["orders"])  # <-- STORE
-                    st.success("Orden ejecutada.")
+                    res = submit_book_order(team_name, bond_id, side, qty, None if tipo == "Mercado" else limit)
+                    if res["status"] == "rejected":
+                        st.error(f"Orden rechazada: {res['reason']}")
+                        if res.get("reasons"):
+                            st.dataframe(pd.DataFrame(res["reasons"]), use_container_width=True, hide_index=True)
+                    elif res["status"] == "filled":
+                        st.success("Orden ejecutada.")
+                    elif res["status"] == "unfilled":
+                        st.warning("No había contraparte para la orden de mercado.")
+                    else:
+                        st.info(f"Ejecutado {res['filled_qty']:,.0f}; en libro {res['resting_qty']:,.0f}.")
+
+                team_name = state.get("current_team")
+                depth = _engine().depth(bond_id)
+                mine = _engine().open_orders(team_name)
+                cb, ca = st.columns(2)
+                cb.caption(f"Libro {bond_id} — compras (MM bid {depth['mm'][0]:,.2f})" if depth["mm"] else f"Libro {bond_id} — compras")
+                cb.dataframe(pd.DataFrame(depth["bids"], columns=["precio", "qty"]), use_container_width=True, hide_index=True)
+                ca.caption(f"Ventas (MM ask {depth['mm'][1]:,.2f})" if depth["mm"] else "Ventas")
+                ca.dataframe(pd.DataFrame(depth["asks"], columns=["precio", "qty"]), use_container_width=True, hide_index=True)
+                if mine:
+                    st.markdown("#### Mis órdenes en el libro")
+                    st.dataframe(pd.DataFrame(mine).drop(columns=["team"]), use_container_width=True, hide_index=True)
+                    oid = st.selectbox("Cancelar orden", [o["oid"] for o in mine], key="cancel_oid")
+                    if st.button("Cancelar"):
+                        if cancel_book_order(team_name, oid):
+                            st.success("Orden cancelada.")
+                        else:
+                            st.warning("La orden ya no está en el libro.")
+
+        if team_ok and state.prices:
+            with st.expander("Órdenes en lote (CSV: bond_id, side, qty)"):
+                up_batch = st.file_uploader("CSV de órdenes", type=["csv"], key="bulk_csv")
+                if st.button("Enviar lote", disabled=up_batch is None):
+                    try:
+                        res = submit_bulk_orders(read_csv_frame(up_batch), team=state.get("current_team"))
+                    except GameError as e:
+                        st.warning(str(e))
+                    else:
+                        ok = int((res["status"] == "ok").sum())
+                        if ok == len(res):
+                            st.success(f"Ejecutadas {ok} órdenes.")
+                        else:
+                            st.warning(f"Ejecutadas {ok} de {len(res)} órdenes.")
+                        st.dataframe(res, use_container_width=True, hide_index=True)
 
     st.markdown("### Mis posiciones / valor (mid)")
     team_name = state.get("current_team","")
-    my = [od for od in state.orders if od["team"]==team_name]
-    if my and state.bonds is not None:
-        pos, cash, _ = compute_positions(my)
-        rows=[]
-        for b in state.bonds["bond_id"]:
-            rows.append(dict(bond_id=b, qty=pos.get((team_name,b),0.0), mid=state.prices.get(b,{}).get("mid",np.nan)))
-        dfp = pd.DataFrame(rows)
-        val = portfolio_value([team_name], state.bonds, state.prices, my)
-        st.dataframe(dfp, use_container_width=True)
+    if state.ledger.has_team(team_name) and state.bonds is not None:
+        dfp, val = memo(("mis_posiciones", team_name), ("orders", "prices", "bonds"), lambda: my_positions(team_name))
+        show_df("positions", dfp, use_container_width=True)
         st.info(f"Valor de portafolio: {val.iloc[0]['valor_portafolio']:,.2f} | Cash: {val.iloc[0]['cash']:,.2f}")
     else:
         st.caption("Sin órdenes aún.")
 
-    st.markdown("### Mini-Leaderboard")
-    lb = compute_leaderboard_current()
-    st.dataframe(lb, use_container_width=True, height=240)
+    st.markdown(f"### Mini-Leaderboard (top {MINI_LEADERBOARD_K})")
+    lb = compute_leaderboard_current(k=MINI_LEADERBOARD_K)
+    show_df("leaderboard", lb, use_container_width=True, height=240)
 
 # ==============================
 # Router principal
 # ==============================
-if state.role == "Moderador":
-    ui_moderator()
-else:
-    ui_participant()
-
-st.markdown("---")
-st.subheader("Resultado final")
-if state.round<3:
-    st.caption("El ranking final aparece cuando el Moderador publica los 3 eventos y cierra el juego.")
-else:
-    st.success("Competencia finalizada.")
-    final_lb = compute_leaderboard_current()
-    st.dataframe(final_lb, use_container_width=True)
+perf.count(_game_code(), "reruns")
+with perf.span(_game_code(), "rerun"):
+    if state.role == "Moderador":
+        ui_moderator()
+    else:
+        ui_participant()
+
+    st.markdown("---")
+    st.subheader("Resultado final")
+    if state.round<3:
+        st.caption("El ranking final aparece cuando el Moderador publica los 3 eventos y cierra el juego.")
+    else:
+        st.success("Competencia finalizada.")
+        final_lb = compute_leaderboard_current()
+        show_df("leaderboard", final_lb, use_container_width=True)
@@ -0,0 +1,78 @@
+"""Benchmark del journal: escribe N órdenes vía GameStore y mide el tiempo de restauración
+(snapshot + cola) frente a un replay completo del journal.
+
+    python -m benchmarks.bench_journal --orders 1000000 --batch 100
+    python -m benchmarks.bench_journal --snapshot-every 500   # snapshots más seguidos
+
+Sin --snapshot-every se toman ~10 snapshots en la corrida (registros = orders / batch).
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from services.game_store import GameStore
+from services.journal import Journal
+
+def _orders(n: int, n_teams: int, n_bonds: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    teams = rng.integers(0, n_teams, n); bonds = rng.integers(0, n_bonds, n)
+    sides = rng.integers(0, 2, n); qty = rng.integers(1, 100, n); px = rng.uniform(900, 1100, n)
+    for t, b, s, q, p in zip(teams.tolist(), bonds.tolist(), sides.tolist(), qty.tolist(), px.tolist()):
+        yield dict(ts=0, team=f"T{t}", bond_id=f"B{b}", side="BUY" if s == 0 else "SELL",
+                   qty=q, price_exec=p, fees=round(q * p * 5e-4, 2), ronda=1)
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+def run(n_orders: int, batch: int, snapshot_every: int | None, n_teams: int, n_bonds: int) -> dict:
+    if snapshot_every is None:
+        snapshot_every = max(1, n_orders // batch // 10)
+    out = {"orders": n_orders, "batch": batch, "snapshot_every": snapshot_every}
+    for label, every in (("snapshots", snapshot_every), ("full_replay", 10**12)):
+        root = tempfile.mkdtemp(prefix="mb_journal_")
+        try:
+            store = GameStore(journal=Journal(root, snapshot_every=every))
+            t0 = time.perf_counter()
+            buf = []
+            for od in _orders(n_orders, n_teams, n_bonds):
+                buf.append(od)
+                if len(buf) == batch:
+                    store.append_orders("BENCH", buf); buf = []
+            if buf:
+                store.append_orders("BENCH", buf)
+            out[f"{label}_write_s"] = time.perf_counter() - t0
+            out[f"{label}_taken"] = store._journal._open["BENCH"]["gen"]
+            store._journal.close()
+            if label == "snapshots":
+                # sin snapshot, "restaurar desde snapshot" sería otro replay completo
+                assert any(f.endswith(".snap") for f in os.listdir(root)), \
+                    f"ningún snapshot con snapshot_every={every}: bajarlo o subir --orders"
+            out[f"{label}_disk_mb"] = _dir_size(root) / 1e6
+
+            t0 = time.perf_counter()
+            restored = GameStore(journal=Journal(root, snapshot_every=every))
+            n = len(restored.snapshot("BENCH")["orders"])
+            out[f"{label}_restore_s"] = time.perf_counter() - t0
+            restored._journal.close()
+            assert n == n_orders, (n, n_orders)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--orders", type=int, default=1_000_000)
+    ap.add_argument("--batch", type=int, default=100, help="órdenes por append_orders (1 = una por registro)")
+    ap.add_argument("--snapshot-every", type=int, default=None,
+                    help="registros del journal entre snapshots (por defecto orders / batch / 10)")
+    ap.add_argument("--teams", type=int, default=50)
+    ap.add_argument("--bonds", type=int, default=100)
+    a = ap.parse_args()
+    res = run(a.orders, a.batch, a.snapshot_every, a.teams, a.bonds)
+    for k, v in res.items():
+        print(f"{k:>24}: {v:,.3f}" if isinstance(v, float) else f"{k:>24}: {v:,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Prueba de carga local: N equipos simulados (hilos) contra un GameEngine compartido mientras el
+moderador publica las rondas. Cada bot se registra y repite lo que hace una sesión del participante:
+espera un cambio de versión (como el auto-sync), toma el snapshot (sync_from_store_to_state), calcula
+sus posiciones y envía una orden aleatoria (mercado o límite). Sin red: store en memoria o SQLite local.
+
+    python -m benchmarks.bench_load --teams 100 --bonds 20 --round-s 5
+    python -m benchmarks.bench_load --teams 50 --backend sqlite
+
+Al final compara el log de órdenes del store con los fills que recibieron los bots (órdenes
+perdidas / duplicadas) y verifica el ledger contra un replay completo.
+"""
+import argparse
+import os
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+import numpy as np
+import config
+from domain.orderbook import fills_to_orders
+from engine.game import GameEngine
+from engine.scenario import propose_events
+from services.game_store import GameStore
+from benchmarks import synth
+
+FEE_BPS = 5.0
+
+def _rss_mb() -> float:
+    """Memoria residente actual del proceso (pico si no hay /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _key(od: dict) -> tuple:
+    # sin ts ni ronda: el motor fija la ronda al ejecutar (puede ser posterior al snapshot del bot)
+    return (od["team"], od["bond_id"], od["side"], float(od["qty"]), float(od["price_exec"]))
+
+def _store(backend: str, tmp: str):
+    if backend == "sqlite":
+        from services.sqlite_store import SqliteGameStore
+        return SqliteGameStore(os.path.join(tmp, "load.db"), poll_s=config.STORE["poll_s"])
+    return GameStore()
+
+class Bot(threading.Thread):
+    """Equipo simulado: poll por versión + una orden por ciclo mientras el trading está abierto."""
+    def __init__(self, eng: GameEngine, team: str, bond_ids: list, think_s: float, limit_frac: float,
+                 stop: threading.Event, seed: int):
+        super().__init__(daemon=True)
+        self.eng, self.team, self.bond_ids = eng, team, bond_ids
+        self.think_s, self.limit_frac, self.stop = think_s, limit_frac, stop
+        self.rng = np.random.default_rng(seed)
+        self.lat = []             # latencia de submit_order (s)
+        self.poll_lat = []        # latencia de snapshot + posiciones (s)
+        self.sent = 0
+        self.rejected = Counter()
+        self.expected = []        # filas que el store debería tener por las órdenes de este bot
+        self.errors = []
+
+    def run(self):
+        try:
+            self.eng.register_team(self.team)
+            seen = -1
+            while not self.stop.is_set():
+                self.eng.wait_for_change(seen, timeout=self.think_s)
+                t0 = time.perf_counter()
+                snap = self.eng.snapshot()
+                seen = snap["version"]
+                if snap["bonds"] is not None and self.team in snap["teams"]:
+                    self.eng.positions(self.team, snap=snap)
+                self.poll_lat.append(time.perf_counter() - t0)
+                if snap["trading_on"] and snap["prices"]:
+                    self._order(snap)
+                    time.sleep(self.think_s * self.rng.random())
+        except Exception as e:    # el reporte final muestra los errores de los bots
+            self.errors.append(repr(e))
+
+    def _order(self, snap: dict):
+        b = self.bond_ids[int(self.rng.integers(len(self.bond_ids)))]
+        q = snap["prices"][b]
+        qty = int(self.rng.integers(1, 20))
+        held = snap["ledger"].position(self.team, b)
+        short_cash = snap["ledger"].team_cash(self.team) < 2 * qty * q["ask"]
+        side = "SELL" if held > 0 and (short_cash or self.rng.random() < 0.5) else "BUY"
+        price = None
+        if self.rng.random() < self.limit_frac:
+            price = round(q["mid"] * (1 + self.rng.normal(0, 0.001)), 2)
+        t0 = time.perf_counter()
+        res = self.eng.submit_order(self.team, b, side, qty, price, fee_bps=FEE_BPS)
+        self.lat.append(time.perf_counter() - t0)
+        self.sent += 1
+        if res["status"] == "rejected":
+            self.rejected.update(r["code"] for r in res.get("reasons", [{"code": "book"}]))
+        else:
+            self.expected.extend(fills_to_orders(res["fills"], FEE_BPS, snap["round"], 0))
+
+def run(n_teams: int, n_bonds: int, n_rounds: int, round_s: float, think_s: float, limit_frac: float,
+        backend: str, mm_depth, max_orders_per_round) -> dict:
+    tmp = tempfile.mkdtemp(prefix="mb_load_")
+    store = _store(backend, tmp)
+    risk = {**config.RISK, "max_orders_per_round": max_orders_per_round}
+    eng = GameEngine(store, "LOAD", n_rounds=n_rounds, mm_depth=mm_depth, risk=risk)
+    bonds = synth.bonds(n_bonds)
+    eng.load_bonds(bonds)
+    eng.set_scenario(propose_events(bonds, 50, 100, -30, 30), 0.0, 0.25, 10, 10, 10)
+
+    rss0 = _rss_mb()
+    stop = threading.Event()
+    bots = [Bot(eng, f"T{i}", bonds["bond_id"].tolist(), think_s, limit_frac, stop, seed=i) for i in range(n_teams)]
+    t_start = time.perf_counter()
+    for b in bots:
+        b.start()
+    rss_rounds = []
+    for _ in range(n_rounds):                 # moderador
+        eng.publish_next_round()
+        time.sleep(round_s)
+        rss_rounds.append(round(_rss_mb(), 1))
+    eng.set_trading(False)
+    stop.set()
+    for b in bots:
+        b.join()
+    elapsed = time.perf_counter() - t_start
+
+    snap = eng.snapshot()
+    actual = Counter(_key(od) for od in snap["orders"])
+    expected = Counter(_key(od) for b in bots for od in b.expected)
+    lat = np.array([x for b in bots for x in b.lat]) if any(b.lat for b in bots) else np.zeros(1)
+    poll = np.array([x for b in bots for x in b.poll_lat]) if any(b.poll_lat for b in bots) else np.zeros(1)
+    sent = sum(b.sent for b in bots)
+    rejected = sum((b.rejected for b in bots), Counter())
+    rss1 = _rss_mb()
+    shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "teams": n_teams, "bonds": n_bonds, "backend": backend,
+        "elapsed_s": elapsed,
+        "orders_sent": sent,
+        "orders_per_s": sent / elapsed,
+        "p50_order_ms": float(np.percentile(lat, 50) * 1e3),
+        "p99_order_ms": float(np.percentile(lat, 99) * 1e3),
+        "polls": len(poll),
+        "p99_poll_ms": float(np.percentile(poll, 99) * 1e3),
+        "rejected": dict(rejected),
+        "store_rows": len(snap["orders"]),
+        "lost_rows": sum((expected - actual).values()),
+        "duplicated_rows": sum((actual - expected).values()),
+        "ledger_diffs": len(eng.verify_ledger(snap)),
+        "registered": len(snap["teams"]),
+        "rss_start_mb": round(rss0, 1),
+        "rss_per_round_mb": rss_rounds,
+        "rss_growth_mb": round(rss1 - rss0, 1),
+        "bot_errors": [e for b in bots for e in b.errors][:5],
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--teams", type=int, default=50)
+    ap.add_argument("--bonds", type=int, default=20)
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--round-s", type=float, default=5.0, help="segundos de trading por ronda")
+    ap.add_argument("--think-s", type=float, default=0.05, help="pausa máxima del bot entre órdenes")
+    ap.add_argument("--limit-frac", type=float, default=0.5, help="fracción de órdenes límite")
+    ap.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    ap.add_argument("--mm-depth", type=float, default=None)
+    ap.add_argument("--max-orders-per-round", type=int, default=None,
+                    help="límite de órdenes por equipo y ronda (por defecto sin límite en la prueba)")
+    a = ap.parse_args()
+    res = run(a.teams, a.bonds, a.rounds, a.round_s, a.think_s, a.limit_frac, a.backend, a.mm_depth,
+              a.max_orders_per_round)
+    for k, v in res.items():
+        print(f"{k:>17}: {v:,.3f}" if isinstance(v, float) else f"{k:>17}: {v}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark del motor de matching: flujo sintético de órdenes límite / de mercado / cancelaciones
+sobre varios bonos, con la cotización del moderador como market maker.
+
+    python -m benchmarks.bench_orderbook --orders 200000 --bonds 20
+"""
+import argparse
+import time
+import numpy as np
+from domain.orderbook import MatchingEngine, BUY, SELL
+
+def _flow(n: int, n_teams: int, n_bonds: int, cancel_frac: float, market_frac: float, seed: int = 0):
+    """Órdenes alrededor de un mid de 1000 (±1%): la mayoría reposa, una parte cruza."""
+    rng = np.random.default_rng(seed)
+    kind = rng.random(n)
+    teams = rng.integers(0, n_teams, n); bonds = rng.integers(0, n_bonds, n)
+    sides = rng.integers(0, 2, n); qty = rng.integers(1, 50, n)
+    px = np.round(1000 + rng.normal(0, 3, n), 2)
+    for k, t, b, s, q, p in zip(kind.tolist(), teams.tolist(), bonds.tolist(), sides.tolist(), qty.tolist(), px.tolist()):
+        if k < cancel_frac:
+            yield ("cancel", None)
+        elif k < cancel_frac + market_frac:
+            yield ("market", (f"T{t}", f"B{b}", "BUY" if s == 0 else "SELL", q, None))
+        else:
+            yield ("limit", (f"T{t}", f"B{b}", "BUY" if s == 0 else "SELL", q, p))
+
+def _check_uncrossed(eng: MatchingEngine):
+    for b in eng.books.values():
+        bid, ask = b.best(BUY), b.best(SELL)
+        assert bid is None or ask is None or bid[0] < ask[0], (b.bond_id, bid[0], ask[0])
+        if b.mm is not None:   # mientras el market maker tenga profundidad, nada reposa cruzando su quote
+            assert bid is None or b._mm_left[SELL] == 0 or bid[0] < b.mm[1]
+            assert ask is None or b._mm_left[BUY] == 0 or ask[0] > b.mm[0]
+
+def run(n_orders: int, n_teams: int, n_bonds: int, cancel_frac: float, market_frac: float, mm_depth) -> dict:
+    eng = MatchingEngine(mm_depth=mm_depth)
+    eng.set_quotes({f"B{j}": {"bid": 995.0, "ask": 1005.0} for j in range(n_bonds)})
+    flow = list(_flow(n_orders, n_teams, n_bonds, cancel_frac, market_frac))
+    lat = np.empty(len(flow))
+    rng = np.random.default_rng(1)
+    fills = cancels = 0
+    t_all = time.perf_counter()
+    for i, (kind, args) in enumerate(flow):
+        t0 = time.perf_counter()
+        if kind == "cancel":
+            if eng.open:
+                oid = next(iter(eng.open)) if rng.random() < 0.5 else max(eng.open)
+                cancels += eng.cancel(oid)
+        else:
+            fills += len(eng.submit(*args, ronda=1)["fills"])
+        lat[i] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - t_all
+    _check_uncrossed(eng)
+    return {
+        "orders": n_orders,
+        "elapsed_s": elapsed,
+        "orders_per_s": n_orders / elapsed,
+        "p50_us": float(np.percentile(lat, 50) * 1e6),
+        "p99_us": float(np.percentile(lat, 99) * 1e6),
+        "fills": fills,
+        "cancels": cancels,
+        "resting": len(eng.open),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--orders", type=int, default=200_000)
+    ap.add_argument("--teams", type=int, default=50)
+    ap.add_argument("--bonds", type=int, default=20)
+    ap.add_argument("--cancel-frac", type=float, default=0.2)
+    ap.add_argument("--market-frac", type=float, default=0.1)
+    ap.add_argument("--mm-depth", type=float, default=None, help="profundidad del market maker por lado (None = ilimitada)")
+    a = ap.parse_args()
+    res = run(a.orders, a.teams, a.bonds, a.cancel_frac, a.market_frac, a.mm_depth)
+    for k, v in res.items():
+        print(f"{k:>14}: {v:,.3f}" if isinstance(v, float) else f"{k:>14}: {v:,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Suite de benchmarks reproducible (datos sintéticos de benchmarks.synth):
+pricing escalar y vectorizado, posiciones, valoración / leaderboard, carga de CSV y store (flush/sync).
+
+    python -m benchmarks.bench_suite                          # preset quick -> bench_results.json
+    python -m benchmarks.bench_suite --preset full --out full.json
+    python -m benchmarks.bench_suite --only store --backend memory sqlite
+    python -m benchmarks.bench_suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_suite --baseline benchmarks/baseline.json --threshold 0.25
+
+Cada caso se mide `--repeat` veces (mínimo = `best_s`). Con --baseline se compara caso a caso
+(mismo nombre y parámetros) y el proceso termina con código 1 si alguno empeora más que el umbral.
+El baseline depende de la máquina: guardarlo y compararlo en el mismo equipo.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import config
+from domain import pricing
+from domain.ledger import TeamLedger
+from domain.leaderboard import compute_portfolio_value
+from engine import scenario as eng_scenario
+from engine.valuation import compute_positions, portfolio_value
+from services.game_store import GameStore
+from services.storage_models import load_scenario, parse_scenario_csv
+from benchmarks import synth
+
+PRESETS = {
+    "quick": {"bonds": [10, 1_000, 10_000], "orders": [1_000, 100_000], "teams": [10, 100]},
+    "full": {"bonds": [10, 1_000, 10_000, 100_000], "orders": [1_000, 100_000, 1_000_000, 10_000_000],
+             "teams": [10, 100, 1_000]},
+}
+MAX_CELLS = 20_000_000      # equipos × bonos máximo para las matrices densas de valoración
+STORE_BATCH = 100           # órdenes por append (como los lotes de fills / bulk)
+
+# ==============================
+# Casos: (nombre, params, n_items, setup, fn) — se mide fn(setup())
+# ==============================
+def cases_pricing(sz):
+    for n in sz["bonds"]:
+        recs = synth.bonds(n).to_dict("records")
+        ytm = [0.03 + r["spread_bps"] / 10_000 for r in recs]
+        yield ("price_bond_mid.engine", {"bonds": n}, n, lambda: None,
+               lambda _, recs=recs, ytm=ytm: [eng_scenario.price_bond_mid(r, y, 0.25, 1) for r, y in zip(recs, ytm)])
+        yield ("price_bond_mid.domain", {"bonds": n}, n, lambda: None,
+               lambda _, recs=recs, ytm=ytm: [pricing.price_bond_mid(r["valor_nominal"], r["tasa_cupon_anual"],
+                                                                     r["frecuencia_anual"], r["vencimiento_anios"] - 0.25, y)
+                                              for r, y in zip(recs, ytm)])
+        arr = pricing.bond_arrays(synth.bonds(n))
+        y = 0.03 + arr["spread_bps"] / 10_000
+        yield ("price_bonds_vec", {"bonds": n}, n, lambda: None,
+               lambda _, arr=arr, y=y: pricing.price_bonds_vec(arr["valor_nominal"], arr["tasa_cupon_anual"],
+                                                               arr["frecuencia_anual"], arr["vencimiento_anios"] - 0.25, y))
+
+def cases_positions(sz):
+    teams = sz["teams"][len(sz["teams"]) // 2]
+    for n in sz["orders"]:
+        log = synth.order_log(n, teams, 100)
+        yield ("compute_positions", {"orders": n, "teams": teams}, n, lambda: None,
+               lambda _, log=log: compute_positions(log))
+        yield ("ledger.rebuild", {"orders": n, "teams": teams}, n, lambda: None,
+               lambda _, log=log: TeamLedger.rebuild(log))
+
+def cases_valuation(sz):
+    for teams in sz["teams"]:
+        for n_bonds in sz["bonds"]:
+            if teams * n_bonds > MAX_CELLS:
+                continue
+            ledger = TeamLedger()
+            for c in synth.order_chunks(max(teams * 20, n_bonds), teams, n_bonds):
+                ledger.apply_many(c)
+            prices = synth.prices(synth.bonds(n_bonds))
+            names = [f"T{i}" for i in range(teams)]
+            p = {"teams": teams, "bonds": n_bonds}
+            yield ("portfolio_value", p, teams, lambda: None,
+                   lambda _, led=ledger, pr=prices, t=names: portfolio_value(t, pr, led))
+            yield ("portfolio_value.top10", p, teams, lambda: None,
+                   lambda _, led=ledger, pr=prices, t=names: portfolio_value(t, pr, led, k=10))
+            pos, cash, _ = ledger.as_dicts()
+            mids = {b: q["mid"] for b, q in prices.items()}
+            yield ("leaderboard.compute_portfolio_value", p, teams, lambda: None,
+                   lambda _, pos=pos, m=mids, c=cash: compute_portfolio_value(pos, m, c))
+
+def cases_csv(sz):
+    tmp = tempfile.mkdtemp(prefix="mb_bench_csv_")
+    config.SCENARIO_CACHE["dir"] = tmp      # caché en disco aislada del juego real
+    for n in sz["bonds"]:
+        raw = synth.bonds_csv(n)
+        yield ("load_bonds_csv.cold", {"bonds": n}, n, lambda raw=raw: io.BytesIO(raw),
+               lambda f: load_scenario(f, venc_default=3.0, bonds_only=True))
+        eng_scenario.load_bonds_csv(io.BytesIO(raw))          # deja la entrada en caché
+        yield ("load_bonds_csv.warm", {"bonds": n}, n, lambda raw=raw: io.BytesIO(raw),
+               lambda f: eng_scenario.load_bonds_csv(f))
+        sc = synth.scenario_csv(n, max(1, n // 2))
+        yield ("parse_scenario_csv", {"bonds": n, "events": max(1, n // 2)}, n, lambda sc=sc: io.BytesIO(sc),
+               lambda f: parse_scenario_csv(f))
+
+def _make_store(backend: str, root: str):
+    if backend == "sqlite":
+        from services.sqlite_store import SqliteGameStore
+        return SqliteGameStore(os.path.join(root, f"bench_{time.perf_counter_ns()}.db"))
+    return GameStore()
+
+def cases_store(sz, backends):
+    root = tempfile.mkdtemp(prefix="mb_bench_store_")
+    teams = sz["teams"][len(sz["teams"]) // 2]
+    for backend in backends:
+        for n in sz["orders"]:
+            p = {"backend": backend, "orders": n}
+            def flush_setup(backend=backend, n=n):
+                return _make_store(backend, root), synth.order_chunks(n, teams, 100, chunk=STORE_BATCH)
+            def flush(st):
+                store, chunks = st
+                for c in chunks:
+                    store.append_orders("BENCH", c)
+                return store
+            yield ("store.append_orders", p, n, flush_setup, flush)
+
+            # Store ya cargado con n órdenes: sync (snapshot) tras un commit nuevo, como cada rerun
+            loaded = flush(flush_setup())
+            extra = synth.orders(STORE_BATCH, teams, 100, seed=1)
+            def sync(store, extra=extra):
+                for _ in range(20):
+                    store.append_orders("BENCH", extra)
+                    store.snapshot("BENCH")
+            yield ("store.append+snapshot", p, 20, lambda s=loaded: s, sync)
+            def commit(store):
+                for i in range(20):
+                    store.commit("BENCH", trading_on=bool(i % 2))
+                    store.snapshot("BENCH")
+            yield ("store.commit+snapshot", p, 20, lambda s=loaded: s, commit)
+    shutil.rmtree(root, ignore_errors=True)
+
+GROUPS = {
+    "pricing": lambda sz, a: cases_pricing(sz),
+    "positions": lambda sz, a: cases_positions(sz),
+    "valuation": lambda sz, a: cases_valuation(sz),
+    "csv": lambda sz, a: cases_csv(sz),
+    "store": lambda sz, a: cases_store(sz, a.backend),
+}
+
+# ==============================
+# Ejecución / comparación
+# ==============================
+def _measure(setup, fn, repeat: int) -> list[float]:
+    out = []
+    for _ in range(repeat):
+        st = setup()
+        t0 = time.perf_counter()
+        fn(st)
+        out.append(time.perf_counter() - t0)
+    return out
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": sys.version.split()[0], "numpy": np.__version__, "pandas": pd.__version__,
+            "platform": platform.platform(), "machine": platform.machine(), "commit": commit,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+def _case_id(r: dict) -> str:
+    return r["name"] + "[" + ",".join(f"{k}={v}" for k, v in sorted(r["params"].items())) + "]"
+
+def run(sizes: dict, groups: list[str], args) -> list[dict]:
+    results = []
+    for g in groups:
+        for name, params, n, setup, fn in GROUPS[g](sizes, args):
+            repeat = 1 if n >= 1_000_000 else args.repeat
+            times = _measure(setup, fn, repeat)
+            r = {"group": g, "name": name, "params": params, "n": n, "repeat": repeat,
+                 "best_s": min(times), "mean_s": sum(times) / len(times), "per_item_us": min(times) / n * 1e6}
+            results.append(r)
+            print(f"{_case_id(r):<62} {r['best_s']*1e3:>11.2f} ms {r['per_item_us']:>10.3f} us/item", flush=True)
+    return results
+
+def compare(results: list[dict], baseline: dict, threshold: float, min_ms: float = 1.0) -> list[dict]:
+    """Casos que empeoraron más que `threshold` (relativo) respecto del baseline. Los casos de menos
+    de `min_ms` en el baseline se muestran pero no cuentan (ruido de medición)."""
+    base = {_case_id(r): r for r in baseline.get("results", [])}
+    worse = []
+    print(f"\n{'caso':<62} {'base ms':>10} {'ahora ms':>10} {'ratio':>7}")
+    for r in results:
+        b = base.get(_case_id(r))
+        if b is None:
+            continue
+        ratio = r["best_s"] / b["best_s"] if b["best_s"] > 0 else float("inf")
+        flag = "  <-- regresión" if ratio > 1 + threshold and b["best_s"] * 1e3 >= min_ms else ""
+        print(f"{_case_id(r):<62} {b['best_s']*1e3:>10.2f} {r['best_s']*1e3:>10.2f} {ratio:>7.2f}{flag}")
+        if flag:
+            worse.append({"case": _case_id(r), "baseline_s": b["best_s"], "now_s": r["best_s"], "ratio": ratio})
+    return worse
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--preset", choices=list(PRESETS), default="quick")
+    ap.add_argument("--bonds", type=int, nargs="+", help="tamaños de universo (reemplaza el preset)")
+    ap.add_argument("--orders", type=int, nargs="+", help="tamaños de log de órdenes (reemplaza el preset)")
+    ap.add_argument("--teams", type=int, nargs="+", help="cantidades de equipos (reemplaza el preset)")
+    ap.add_argument("--only", nargs="+", choices=list(GROUPS), default=list(GROUPS))
+    ap.add_argument("--backend", nargs="+", choices=["memory", "sqlite"], default=["memory", "sqlite"])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    ap.add_argument("--threshold", type=float, default=0.25, help="empeoramiento relativo tolerado")
+    ap.add_argument("--min-ms", type=float, default=1.0, help="casos más rápidos que esto no cuentan como regresión")
+    ap.add_argument("--save-baseline", help="además de --out, guarda los resultados como baseline")
+    a = ap.parse_args()
+
+    sizes = {k: getattr(a, k) or v for k, v in PRESETS[a.preset].items()}
+    scenario_dir = config.SCENARIO_CACHE.get("dir")
+    try:
+        results = run(sizes, a.only, a)
+    finally:
+        if config.SCENARIO_CACHE.get("dir") != scenario_dir:
+            shutil.rmtree(config.SCENARIO_CACHE["dir"], ignore_errors=True)
+    doc = {"meta": {**_meta(), "preset": a.preset, "sizes": sizes}, "results": results}
+    for path in filter(None, (a.out, a.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=1)
+    print(f"\nResultados en {a.out}" + (f" (baseline: {a.save_baseline})" if a.save_baseline else ""))
+    if a.baseline:
+        with open(a.baseline, encoding="utf-8") as f:
+            worse = compare(results, json.load(f), a.threshold, a.min_ms)
+        if worse:
+            print(f"\n{len(worse)} casos empeoraron más de {a.threshold:.0%}.")
+            sys.exit(1)
+        print("\nSin regresiones.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Datos sintéticos reproducibles para los benchmarks: universos de bonos, CSV de escenario y
+logs de órdenes con el mismo formato que produce la app."""
+import numpy as np
+import pandas as pd
+from services.order_log import OrderLog
+
+BOND_COLS = ["bond_id", "nombre", "valor_nominal", "tasa_cupon_anual", "frecuencia_anual",
+             "vencimiento_anios", "spread_bps", "callable", "precio_call", "descripcion"]
+
+def bonds(n: int, seed: int = 0) -> pd.DataFrame:
+    """n bonos con los tipos de load_bonds_csv (B0..Bn-1)."""
+    rng = np.random.default_rng(seed)
+    callable_ = rng.random(n) < 0.2
+    return pd.DataFrame({
+        "bond_id": [f"B{i}" for i in range(n)],
+        "nombre": [f"Bono {i}" for i in range(n)],
+        "valor_nominal": np.full(n, 1000.0),
+        "tasa_cupon_anual": np.round(rng.uniform(0.01, 0.10, n), 4),
+        "frecuencia_anual": rng.choice([1, 2, 4], n),
+        "vencimiento_anios": np.round(rng.uniform(0.5, 30.0, n), 2),
+        "spread_bps": np.round(rng.uniform(20, 600, n), 1),
+        "callable": callable_,
+        "precio_call": np.where(callable_, 1020.0, np.nan),
+        "descripcion": "",
+    })[BOND_COLS]
+
+def bonds_csv(n: int, seed: int = 0, sep: str = ",") -> bytes:
+    """El mismo universo como CSV (bytes, UTF-8) para medir la carga."""
+    return bonds(n, seed).to_csv(index=False, sep=sep).encode("utf-8")
+
+def scenario_csv(n_bonds: int, n_events: int, n_rounds: int = 3, seed: int = 0) -> bytes:
+    """Escenario combinado (filas BOND + filas de evento MARKET/IDIOS) como en ui/moderator."""
+    rng = np.random.default_rng(seed)
+    b = bonds(n_bonds, seed).assign(type="BOND", round="", delta_tasa_bps="", impacto_bps="")
+    idios = rng.random(n_events) < 0.7
+    ev = pd.DataFrame({
+        "type": np.where(idios, "IDIOS", "MARKET"),
+        "round": rng.integers(1, n_rounds + 1, n_events),
+        "bond_id": np.where(idios, np.char.add("B", rng.integers(0, n_bonds, n_events).astype(str)), ""),
+        "delta_tasa_bps": np.where(idios, 0, rng.integers(-50, 51, n_events)),
+        "impacto_bps": np.where(idios, rng.integers(-100, 101, n_events), 0),
+        "descripcion": "evento",
+    })
+    return pd.concat([b, ev], ignore_index=True).to_csv(index=False).encode("utf-8")
+
+def order_chunks(n: int, n_teams: int, n_bonds: int, n_rounds: int = 3, seed: int = 0, chunk: int = 100_000):
+    """n órdenes ejecutadas (formato del OrderLog) en listas de a `chunk`, para no materializar
+    millones de dicts a la vez."""
+    rng = np.random.default_rng(seed)
+    for lo in range(0, n, chunk):
+        m = min(chunk, n - lo)
+        teams = rng.integers(0, n_teams, m); bonds_ = rng.integers(0, n_bonds, m)
+        sides = rng.integers(0, 2, m); qty = rng.integers(1, 100, m).astype(float)
+        px = np.round(rng.uniform(900, 1100, m), 2)
+        ronda = 1 + (lo + np.arange(m)) * n_rounds // max(n, 1)
+        fees = np.round(qty * px * 5e-4, 2)
+        yield [dict(ts=0, team=f"T{t}", bond_id=f"B{b}", side="BUY" if s == 0 else "SELL",
+                    qty=q, price_exec=p, fees=f, ronda=r)
+               for t, b, s, q, p, f, r in zip(teams.tolist(), bonds_.tolist(), sides.tolist(), qty.tolist(),
+                                              px.tolist(), fees.tolist(), ronda.tolist())]
+
+def orders(n: int, n_teams: int, n_bonds: int, n_rounds: int = 3, seed: int = 0) -> list[dict]:
+    """n órdenes ejecutadas repartidas entre equipos, bonos y rondas."""
+    return [od for c in order_chunks(n, n_teams, n_bonds, n_rounds, seed) for od in c]
+
+def order_log(n: int, n_teams: int, n_bonds: int, n_rounds: int = 3, seed: int = 0) -> OrderLog:
+    """Las mismas órdenes en el log columnar de la app (itera filas sin guardarlas como dicts)."""
+    log = OrderLog(capacity=max(16, n))
+    for c in order_chunks(n, n_teams, n_bonds, n_rounds, seed):
+        log.extend(c)
+    return log
+
+def prices(bonds_df: pd.DataFrame, seed: int = 0) -> dict:
+    """Cotización {bond_id: {mid,bid,ask}} alrededor de la par."""
+    rng = np.random.default_rng(seed)
+    mid = np.round(rng.uniform(900, 1100, len(bonds_df)), 2)
+    return {b: {"mid": m, "bid": round(m * 0.999, 2), "ask": round(m * 1.001, 2)}
+            for b, m in zip(bonds_df["bond_id"].tolist(), mid.tolist())}
@@ -13,9 +13,80 @@ DEFAULTS = {
     "cash_inicial": 100000.0,
 }
 
+# Backend del store compartido: "memory" (un proceso) o "sqlite" (varias réplicas sobre el mismo archivo)
+STORE = {
+    "backend": os.environ.get("MB_STORE_BACKEND", "memory"),
+    "sqlite_path": os.environ.get("MB_SQLITE_PATH", "mision_bonos.db"),
+    "poll_s": 0.2,
+    # Journal + snapshots del backend en memoria (restaura los juegos al reiniciar); "" lo desactiva
+    "journal_dir": os.environ.get("MB_JOURNAL_DIR", ".mision_bonos/journal"),
+    "snapshot_every": 50_000,   # registros del journal entre snapshots (acota el replay)
+    "fsync": False,
+    # Memoria acotada: juegos inactivos o fuera del top-LRU se vuelcan a disco y se rehidratan al volver
+    # (con SQLite solo se descarta el snapshot local); al desalojar, la app cierra el motor del juego
+    "max_live_games": 64,
+    "idle_ttl_s": 2 * 3600,
+    "spill_dir": os.environ.get("MB_SPILL_DIR", ".mision_bonos/spill"),
+}
+
+# Auto-sync en vivo: cada `tick_s` la pestaña espera (long-poll) hasta `wait_s`
+# a que cambie la versión del juego; solo si cambió se re-ejecuta la app.
+# wait_s debe quedar bien por debajo de tick_s: mientras el fragment espera, el hilo de la sesión
+# está ocupado y los clics del usuario se encolan detrás (hasta wait_s de demora), y con
+# wait_s >= tick_s los ticks se apilan y la sesión nunca queda libre. Un cambio se ve de inmediato
+# si llega durante la espera y, si no, en el tick siguiente (a lo sumo tick_s - wait_s después).
+LIVE_SYNC = {
+    "tick_s": 1.0,
+    "wait_s": 0.25,
+}
+
+# Persistencia write-behind a Google Sheets (services.sheets_queue): lotes por hoja,
+# latencia máxima acotada y back-off ante errores de cuota
+SHEETS_QUEUE = {
+    "max_latency_s": 2.0,
+    "max_batch_rows": 500,
+    "max_retries": 6,
+}
+
+# Caché en disco de escenarios parseados (services.scenario_cache), por hash del CSV subido; "" la desactiva
+SCENARIO_CACHE = {
+    "dir": os.environ.get("MB_SCENARIO_CACHE_DIR", ".mision_bonos/scenarios"),
+    "max_bytes": 256 * 2**20,
+}
+
+# Escenarios grandes: desde `min_bytes` el moderador ingiere por lotes (services.storage_models.
+# ingest_scenario_stream) y compila el schedule sin guardar la lista de eventos
+STREAM_INGEST = {
+    "min_bytes": 20 * 2**20,
+    "chunksize": 200_000,
+}
+
+# Libro de órdenes por bono (domain.orderbook): la cotización publicada hace de market maker
+# con `mm_depth` por lado y ronda (None = ilimitada); al publicar una ronda se cancelan las órdenes en reposo
+ORDER_BOOK = {
+    "mm_depth": None,
+    "cancel_on_new_round": True,
+}
+
+# Controles pre-trade (domain.risk.RiskGuard); None desactiva cada límite
+RISK = {
+    "max_order_notional": 250_000.0,
+    "max_position": 5_000,            # |posición| máxima por bono (incluye órdenes en reposo)
+    "max_orders_per_round": 200,      # por equipo
+    "allow_short": False,
+}
+
 # Feature flags
 FLAGS = {
     "enable_sheets": True,  # puede estar en False si no hay secretos
+    # Spans de tiempo en los caminos calientes (sync, pricing, leaderboard, tablas) + panel "Rendimiento"
+    "perf_spans": os.environ.get("MB_PERF", "0").lower() in ("1", "true", "yes"),
+}
+
+# Ventana móvil de services.perf: muestras más viejas que window_s no cuentan; max_samples por span y juego
+PERF = {
+    "window_s": 300.0,
+    "max_samples": 4096,
 }
 
 def has_sheets_secrets():
@@ -0,0 +1,78 @@
+import copy
+import numpy as np
+import pandas as pd
+from domain.risk import reason
+
+BATCH_COLS = ["team", "bond_id", "side", "qty"]
+RESULT_COLS = ["i", "team", "bond_id", "side", "qty", "price_exec", "fees", "status", "motivo"]
+
+def order_batch_frame(data, team: str | None = None) -> pd.DataFrame:
+    """Lote de órdenes (DataFrame o lista de dicts) normalizado: team, bond_id, side (mayúsculas),
+    qty (float, NaN si no es numérica). Con `team` todas las órdenes quedan a nombre de ese equipo."""
+    df = data.copy() if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data or []))
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    for c in BATCH_COLS:
+        if c not in df.columns:
+            df[c] = ""
+    out = pd.DataFrame({
+        "team": df["team"].astype(str).str.strip() if team is None else team,
+        "bond_id": df["bond_id"].astype(str).str.strip(),
+        "side": df["side"].astype(str).str.strip().str.upper(),
+        "qty": pd.to_numeric(df["qty"].astype(str).str.replace(",", ".", regex=False).str.strip(), errors="coerce"),
+    })
+    return out.reset_index(drop=True)
+
+def price_batch(df: pd.DataFrame, prices: dict, fee_bps: float) -> pd.DataFrame:
+    """Precio de ejecución (ask para BUY, bid para SELL) y fees de todo el lote en bloque."""
+    bid = df["bond_id"].map({b: p.get("bid") for b, p in prices.items()}).to_numpy(dtype=float)
+    ask = df["bond_id"].map({b: p.get("ask") for b, p in prices.items()}).to_numpy(dtype=float)
+    buy = (df["side"] == "BUY").to_numpy()
+    px = np.where(buy, ask, bid)
+    qty = df["qty"].to_numpy(dtype=float)
+    return df.assign(price_exec=px, fees=np.round(qty * px * fee_bps / 10_000, 2))
+
+def validate_batch(df: pd.DataFrame, teams) -> list[list[dict]]:
+    """Controles de forma vectorizados (lado, cantidad, bono con precio, equipo registrado)."""
+    n = len(df)
+    reasons = [[] for _ in range(n)]
+    checks = (
+        (~df["side"].isin(("BUY", "SELL")).to_numpy(), "side", "side"),
+        (~(df["qty"].to_numpy(dtype=float) > 0), "qty", "qty"),
+        (np.isnan(df["price_exec"].to_numpy(dtype=float)), "price", "bond_id"),
+    )
+    for mask, code, col in checks:
+        for i in np.flatnonzero(mask).tolist():
+            reasons[i].append(reason(code, value=df[col].iat[i]))
+    unknown = ~df["team"].isin(list(teams)).to_numpy()
+    for i in np.flatnonzero(unknown).tolist():
+        reasons[i].append(reason("team", value=df["team"].iat[i]))
+    return reasons
+
+def execute_batch(data, prices: dict, ledger, risk, teams, fee_bps: float, ronda: int, ts: int,
+                  team: str | None = None):
+    """Valida, precia y pasa por los controles pre-trade un lote completo contra la cotización publicada.
+    Los controles de saldo corren en orden sobre una copia del ledger a la que se aplican las órdenes
+    aceptadas (cada orden ve las anteriores del lote). Devuelve (órdenes aceptadas para el store,
+    tabla de resultados por orden). No toca el store: el caller hace un único append_orders."""
+    df = price_batch(order_batch_frame(data, team), prices, fee_bps)
+    reasons = validate_batch(df, teams)
+    sim = copy.deepcopy(ledger)
+    accepted = []
+    status = np.empty(len(df), dtype=object)
+    motivo = np.empty(len(df), dtype=object)
+    rows = df.to_dict("records")
+    for i, row in enumerate(rows):
+        rs = reasons[i] or risk.check(sim, row["team"], row["bond_id"], row["side"], row["qty"],
+                                      row["price_exec"], fee_bps, ronda)
+        if rs:
+            status[i], motivo[i] = "rechazada", "; ".join(r["code"] for r in rs)
+            continue
+        od = dict(ts=ts, team=row["team"], bond_id=row["bond_id"], side=row["side"], qty=float(row["qty"]),
+                  price_exec=float(row["price_exec"]), fees=float(row["fees"]), ronda=ronda)
+        risk.count(row["team"], ronda)
+        sim.apply(od)
+        accepted.append(od)
+        status[i], motivo[i] = "ok", ""
+    res = df.assign(status=status, motivo=motivo)
+    res.insert(0, "i", np.arange(len(df)))
+    return accepted, res[RESULT_COLS]
@@ -1,5 +1,129 @@
+import numpy as np
+import pandas as pd
+
 def effective_ytm(base_rate_anual: float, spread_bps: float, delta_market_bps: float, idios_bps: float) -> float:
     return (base_rate_anual
             + spread_bps / 10000.0
             + delta_market_bps / 10000.0
             + idios_bps / 10000.0)
+
+MAX_ROUNDS = 1_000   # tope de rondas cuando no se indica n_rounds (la matriz es rondas × bonos)
+
+def _round_limit(n_rounds: int) -> int:
+    return int(n_rounds) if n_rounds and int(n_rounds) > 0 else MAX_ROUNDS
+
+def compile_schedule(bond_ids, events, n_rounds: int = 0, liquidity_widen_bp: float = 0.0) -> dict:
+    """Compila los eventos en una matriz (rondas × bonos) de shocks en bps.
+    Fila r-1 = ronda r. Cada ronda lleva solo sus propios eventos (no se acumulan).
+    MARKET mueve todos los bonos; IDIOS solo su bond_id; MIXTO aplica impacto_bps
+    a su bond_id, impacto_resto_bps al resto y ensancha bid/ask en liquidity_widen_bp.
+    Con n_rounds la matriz tiene exactamente n_rounds filas; sin él, tantas como la última ronda
+    con eventos (hasta MAX_ROUNDS). Los eventos con ronda fuera de 1..R se omiten y se cuentan en
+    "skipped" (un CSV con round=10**9 no debe reservar una matriz gigante).
+    """
+    bond_ids = list(bond_ids)
+    idx = {b: j for j, b in enumerate(bond_ids)}
+    events = list(events or [])
+    rounds = [int(e.get("round") or 0) for e in events]
+    R = int(n_rounds) if n_rounds and int(n_rounds) > 0 else max([0] + [r for r in rounds if r <= MAX_ROUNDS])
+    shift = np.zeros((R, len(bond_ids)))
+    widen = np.zeros(R)
+    desc = [[] for _ in range(R)]
+    skipped = 0
+    for e, r in zip(events, rounds):
+        r -= 1
+        if not 0 <= r < R:
+            skipped += 1
+            continue
+        tipo = str(e.get("tipo", "")).upper()
+        j = idx.get(e.get("bond_id"))
+        if tipo == "MARKET":
+            shift[r] += float(e.get("delta_tasa_bps") or 0)
+        elif tipo == "IDIOS":
+            if j is not None:
+                shift[r, j] += float(e.get("impacto_bps") or 0)
+        elif tipo == "MIXTO":
+            resto = float(e.get("impacto_resto_bps") or 0)
+            shift[r] += resto
+            if j is not None:
+                shift[r, j] += float(e.get("impacto_bps") or 0) - resto
+            widen[r] += liquidity_widen_bp
+        else:
+            continue
+        if e.get("descripcion"):
+            desc[r].append(str(e["descripcion"]))
+    return {
+        "bond_ids": bond_ids,
+        "shift_bps": shift,
+        "widen_bps": widen,
+        "descripcion": ["; ".join(d) for d in desc],
+        "skipped": skipped,
+    }
+
+class ScheduleAccumulator:
+    """Versión incremental de compile_schedule para ingestas por lotes (millones de eventos).
+    add() recibe lotes columnares (DataFrame con round, tipo, bond_id, delta_tasa_bps,
+    impacto_bps, descripcion) y los agrega en el momento: MARKET por ronda e IDIOS por
+    (ronda, bond_id), así la memoria depende de rondas × bonos y no de la cantidad de eventos.
+    Se guardan hasta `max_desc` descripciones por ronda. Los eventos con ronda fuera de
+    1..n_rounds (o 1..MAX_ROUNDS sin n_rounds) se omiten y se cuentan en `n_skipped`.
+    """
+    def __init__(self, max_desc: int = 20, n_rounds: int = 0):
+        self.max_desc = max_desc
+        self.n_rounds = n_rounds
+        self.market = np.zeros(0)
+        self.idios = {}          # (ronda, bond_id) -> bps acumulados
+        self.desc = {}           # ronda -> [descripciones]
+        self.n_events = 0
+        self.n_skipped = 0
+
+    def add(self, events):
+        if events is None or not len(events):
+            return
+        r = np.asarray(events["round"], dtype=np.int64)
+        tipo = np.asarray(events["tipo"], dtype=object)
+        valid = (r >= 1) & (r <= _round_limit(self.n_rounds))
+        self.n_events += int(valid.sum())
+        self.n_skipped += int((~valid).sum())
+        top = int(r[valid].max()) if valid.any() else 0
+        if top > len(self.market):
+            self.market = np.pad(self.market, (0, top - len(self.market)))
+        mk = valid & (tipo == "MARKET")
+        if mk.any():
+            np.add.at(self.market, r[mk] - 1, np.asarray(events["delta_tasa_bps"], dtype=float)[mk])
+        idi = valid & (tipo == "IDIOS")
+        if idi.any():
+            sums = pd.Series(np.asarray(events["impacto_bps"], dtype=float)[idi]).groupby(
+                [r[idi], np.asarray(events["bond_id"], dtype=object)[idi]], dropna=True).sum()
+            for key, v in sums.items():
+                self.idios[key] = self.idios.get(key, 0.0) + v
+        desc = np.asarray(events["descripcion"], dtype=object)
+        has = valid & (desc != "") & pd.notna(desc)
+        for rr, d in zip(r[has].tolist(), desc[has].tolist()):
+            lst = self.desc.setdefault(rr, [])
+            if len(lst) < self.max_desc:
+                lst.append(str(d))
+
+    def compile(self, bond_ids, n_rounds: int = 0, liquidity_widen_bp: float = 0.0) -> dict:
+        """Mismo formato que compile_schedule. `liquidity_widen_bp` se acepta por simetría (los
+        lotes columnares no traen eventos MIXTO)."""
+        bond_ids = list(bond_ids)
+        idx = {b: j for j, b in enumerate(bond_ids)}
+        if n_rounds and int(n_rounds) > 0:
+            R = int(n_rounds)
+        else:
+            R = max(len(self.market), max(self.desc, default=0), max((r for r, _ in self.idios), default=0))
+        shift = np.zeros((R, len(bond_ids)))
+        m = self.market[:R]
+        shift[:len(m)] += m[:, None]
+        for (r, b), v in self.idios.items():
+            j = idx.get(b)
+            if j is not None and r <= R:
+                shift[r - 1, j] += v
+        return {
+            "bond_ids": bond_ids,
+            "shift_bps": shift,
+            "widen_bps": np.zeros(R),
+            "descripcion": ["; ".join(self.desc.get(r, [])) for r in range(1, R + 1)],
+            "skipped": self.n_skipped,
+        }
@@ -1,3 +1,6 @@
+import heapq
+import numpy as np
+
 def compute_positions(orders: list[dict]):
     # Muy simple: BUY suma qty, SELL resta qty, agrupado por (team_id, bond_id)
     pos = {}
@@ -7,15 +10,38 @@ def compute_positions(orders: list[dict]):
         pos[key] = pos.get(key, 0.0) + qty
     return pos  # dict[(team_id,bond_id)] -> qty
 
-def compute_portfolio_value(positions_by_team: dict, prices_mid: dict, cash_inicial_by_team: dict):
-    # Suma cash_inicial + Σ(qty * mid)
-    vals = {}
-    for (team_id, bond_id), qty in positions_by_team.items():
-        mid = prices_mid.get(bond_id, 0.0)
-        vals[team_id] = vals.get(team_id, 0.0) + qty * mid
-    # add cash
-    for t, cash in (cash_inicial_by_team or {}).items():
-        vals[t] = vals.get(t, 0.0) + cash
-    items = [{"team_id": t, "valor_portafolio": v} for t, v in vals.items()]
-    items.sort(key=lambda x: x["valor_portafolio"], reverse=True)
-    return items
+def compute_portfolio_value(positions_by_team: dict, prices_mid: dict, cash_inicial_by_team: dict, k: int | None = None):
+    # Suma cash_inicial + Σ(qty * mid), vía matriz equipos × bonos; k limita a los k mejores
+    teams, bonds, Q = positions_matrix(positions_by_team)
+    known = set(teams)
+    extra = [t for t in (cash_inicial_by_team or {}) if t not in known]
+    teams = teams + extra
+    Q = np.vstack([Q, np.zeros((len(extra), Q.shape[1]))])
+    cash = np.array([(cash_inicial_by_team or {}).get(t, 0.0) for t in teams], dtype=float)
+    mid = np.array([prices_mid.get(b, 0.0) for b in bonds], dtype=float)
+    vals = portfolio_values(Q, cash, mid)
+    ranked = top_k(teams, vals, len(teams) if k is None else k)
+    return [{"team_id": t, "valor_portafolio": v} for t, v in ranked]
+
+# ==============================
+# Valoración matricial + top-K
+# ==============================
+def positions_matrix(positions_by_team: dict):
+    """(team_id, bond_id) -> qty a matriz densa. Devuelve (teams, bonds, Q)."""
+    teams, bonds = {}, {}
+    for (t, b) in positions_by_team:
+        teams.setdefault(t, len(teams)); bonds.setdefault(b, len(bonds))
+    Q = np.zeros((len(teams), len(bonds)))
+    for (t, b), qty in positions_by_team.items():
+        Q[teams[t], bonds[b]] += qty
+    return list(teams), list(bonds), Q
+
+def portfolio_values(Q: np.ndarray, cash: np.ndarray, mid: np.ndarray) -> np.ndarray:
+    """Valor de todos los equipos con un producto matriz-vector: cash + Q @ mid (mid NaN → 0)."""
+    mid = np.nan_to_num(np.asarray(mid, dtype=float), nan=0.0)
+    return np.asarray(cash, dtype=float) + Q @ mid
+
+def top_k(teams, values, k: int) -> list[tuple]:
+    """Los k mejores (team, valor) vía heap, sin ordenar todo el campo."""
+    best = heapq.nlargest(k, range(len(teams)), key=values.__getitem__)
+    return [(teams[i], float(values[i])) for i in best]
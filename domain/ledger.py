@@ -1,3 +1,6 @@
+import numpy as np
+from domain.leaderboard import portfolio_values
+
 def apply_coupon_if_due(team_positions, bonds, frac_anio: float, ronda: int):
     # Stub MVP: no-op
     return []
@@ -5,3 +8,165 @@ def apply_coupon_if_due(team_positions, bonds, frac_anio: float, ronda: int):
 def apply_call_if_flagged(positions, bond, call_price: float):
     # Stub MVP: no-op
     return []
+
+# ==============================
+# Ledger incremental de cash / fees / posiciones
+# ==============================
+CASH_INICIAL = 100_000.0
+
+class TeamLedger:
+    """Agregado por equipo que se actualiza en O(1) con cada orden.
+    Posiciones en una fila por equipo (columnas = bonos según orden de aparición), cash y fees en
+    vectores por equipo; crecen por duplicación (append amortizado).
+    Mismas reglas que el replay completo: BUY resta q*px+fee, SELL suma q*px-fee.
+    """
+    def __init__(self, cash_inicial: float = CASH_INICIAL):
+        self.cash_inicial = cash_inicial
+        self.teams = []          # fila -> team
+        self.bonds = []          # columna -> bond_id
+        self.team_index = {}
+        self.bond_index = {}
+        self._rows = []          # posiciones por equipo (una fila puede ser más corta que bonds: ceros)
+        self._owned = set()      # filas propias; las demás se comparten con un fork y se copian al escribir
+        self._ncols = 8          # capacidad de columnas de las filas
+        self._cash = np.full(8, cash_inicial)
+        self._fees = np.zeros(8)
+        self.n_orders = 0
+
+    def _team(self, t) -> int:
+        i = self.team_index.get(t)
+        if i is None:
+            i = len(self.teams)
+            if i == len(self._cash):
+                cash = np.full(2 * i, self.cash_inicial); cash[:i] = self._cash
+                fees = np.zeros(2 * i); fees[:i] = self._fees
+                self._cash, self._fees = cash, fees
+            self.teams.append(t)
+            self.team_index[t] = i
+            self._rows.append(np.zeros(self._ncols))
+            self._owned.add(i)
+        return i
+
+    def _bond(self, b) -> int:
+        j = self.bond_index.get(b)
+        if j is None:
+            j = len(self.bonds)
+            if j == self._ncols:
+                self._ncols *= 2
+            self.bonds.append(b)
+            self.bond_index[b] = j
+        return j
+
+    def _row(self, i: int, j: int) -> np.ndarray:
+        """Fila del equipo i propia de este ledger y con lugar para la columna j (copy-on-write)."""
+        row = self._rows[i]
+        if i not in self._owned or j >= len(row):
+            new = np.zeros(max(self._ncols, len(row)))
+            new[:len(row)] = row
+            self._rows[i] = row = new
+            self._owned.add(i)
+        return row
+
+    def apply(self, od: dict):
+        i = self._team(od["team"]); j = self._bond(od["bond_id"])
+        q = float(od["qty"]); px = float(od["price_exec"]); fee = float(od["fees"])
+        sign = 1.0 if od["side"] == "BUY" else -1.0
+        self._row(i, j)[j] += sign * q
+        self._cash[i] -= sign * q * px + fee
+        self._fees[i] += fee
+        self.n_orders += 1
+
+    def apply_many(self, orders):
+        for od in orders:
+            self.apply(od)
+
+    def fork(self) -> "TeamLedger":
+        """Copia para el próximo commit: aplicar órdenes a la copia no toca al ledger de un snapshot ya
+        publicado. Las filas de posiciones se comparten y cada una se copia recién cuando se escribe
+        (copy-on-write por equipo), así que un commit cuesta O(equipos) en referencias y cash/fees más
+        O(bonos) por equipo tocado, no O(equipos × bonos)."""
+        led = TeamLedger.__new__(TeamLedger)
+        led.__dict__.update(self.__dict__)
+        led.teams, led.bonds = list(self.teams), list(self.bonds)
+        led.team_index, led.bond_index = dict(self.team_index), dict(self.bond_index)
+        led._rows = list(self._rows)
+        led._cash, led._fees = self._cash.copy(), self._fees.copy()
+        led._owned = set()
+        self._owned = set()      # desde ahora las filas son de los dos: ninguno escribe sin copiar
+        return led
+
+    @classmethod
+    def rebuild(cls, orders, cash_inicial: float = CASH_INICIAL):
+        """Replay completo del log de órdenes (solo para reconstruir o verificar)."""
+        led = cls(cash_inicial)
+        led.apply_many(orders or [])
+        return led
+
+    # ---- vistas ----
+    @property
+    def positions(self) -> np.ndarray:
+        """Matriz densa equipos × bonos armada con las filas (copia)."""
+        Q = np.zeros((len(self.teams), len(self.bonds)))
+        for i, row in enumerate(self._rows):
+            n = min(len(row), Q.shape[1])
+            Q[i, :n] = row[:n]
+        return Q
+
+    @property
+    def cash(self) -> np.ndarray:
+        return self._cash[:len(self.teams)]
+
+    @property
+    def fees(self) -> np.ndarray:
+        return self._fees[:len(self.teams)]
+
+    def nbytes(self) -> int:
+        return sum(r.nbytes for r in self._rows) + self._cash.nbytes + self._fees.nbytes
+
+    def has_team(self, team: str) -> bool:
+        return team in self.team_index
+
+    def team_cash(self, team: str) -> float:
+        i = self.team_index.get(team)
+        return self.cash_inicial if i is None else float(self._cash[i])
+
+    def position(self, team: str, bond_id) -> float:
+        i = self.team_index.get(team); j = self.bond_index.get(bond_id)
+        if i is None or j is None or j >= len(self._rows[i]):
+            return 0.0
+        return float(self._rows[i][j])
+
+    def team_positions(self, team: str) -> dict:
+        i = self.team_index.get(team)
+        if i is None:
+            return {}
+        row = self._rows[i][:len(self.bonds)]
+        return {self.bonds[j]: float(row[j]) for j in np.flatnonzero(row)}
+
+    def mid_vector(self, prices: dict) -> np.ndarray:
+        """Mids alineados con las columnas del ledger (solo bonos operados; sin precio → 0)."""
+        return np.array([prices.get(b, {}).get("mid", 0.0) for b in self.bonds], dtype=float)
+
+    def values(self, prices: dict) -> np.ndarray:
+        """Valor de portafolio de cada equipo del ledger: cash + Q @ mid."""
+        return portfolio_values(self.positions, self.cash, self.mid_vector(prices))
+
+    def as_dicts(self):
+        """(pos, cash, fees) con la misma forma que el replay clásico: pos[(team, bond)] -> qty."""
+        Q = self.positions
+        pos = {(self.teams[i], self.bonds[j]): float(Q[i, j]) for i, j in zip(*np.nonzero(Q))}
+        cash = dict(zip(self.teams, self.cash.tolist()))
+        fees = dict(zip(self.teams, self.fees.tolist()))
+        return pos, cash, fees
+
+    def verify(self, orders, tol: float = 1e-6) -> list[str]:
+        """Compara contra un replay completo; devuelve la lista de diferencias (vacía si cuadra)."""
+        ref = TeamLedger.rebuild(orders, self.cash_inicial)
+        diffs = []
+        if ref.n_orders != self.n_orders:
+            diffs.append(f"n_orders: {self.n_orders} != {ref.n_orders}")
+        for name, mine, other in zip(("pos", "cash", "fees"), self.as_dicts(), ref.as_dicts()):
+            for k in set(mine) | set(other):
+                if abs(mine.get(k, 0.0) - other.get(k, 0.0)) > tol:
+                    diffs.append(f"{name}[{k}]: {mine.get(k, 0.0)} != {other.get(k, 0.0)}")
+        return diffs
@@ -0,0 +1,228 @@
+import heapq
+import itertools
+from collections import deque
+
+BUY, SELL = 0, 1
+SIDES = ("BUY", "SELL")
+MM_TEAM = "__MM__"      # contraparte de los fills contra la cotización publicada
+TICK = 0.01
+
+def to_ticks(px: float) -> int:
+    return int(round(px / TICK))
+
+def from_ticks(t: int) -> float:
+    return round(t * TICK, 2)
+
+# Orden en reposo: lista mutable [oid, team, side, ticks, qty, ronda]
+_OID, _TEAM, _SIDE, _PX, _QTY, _RONDA = range(6)
+
+# ==============================
+# Libro por bono
+# ==============================
+class OrderBook:
+    """Libro límite de un bono con prioridad precio-tiempo.
+    Cada lado es un heap de niveles de precio (en ticks) más un dict nivel -> deque FIFO de
+    órdenes. Cancelar es O(1): la orden queda con qty 0 y se limpia al llegar a la cabeza
+    del nivel; los niveles vacíos se descartan del heap en forma perezosa.
+    La cotización publicada (bid/ask del moderador) actúa como market maker: siempre está del
+    otro lado con profundidad `mm_depth` por ronda (None = ilimitada). A igual precio las
+    órdenes de los equipos tienen prioridad sobre el market maker.
+    """
+    def __init__(self, bond_id):
+        self.bond_id = bond_id
+        self._levels = ({}, {})      # [BUY] bids, [SELL] asks: ticks -> deque
+        self._heaps = ([], [])       # bids como -ticks (max-heap), asks como ticks
+        self.mm = None               # (bid_ticks, ask_ticks)
+        self._mm_left = [None, None] # profundidad restante del MM: [compra (bid), venta (ask)]
+
+    def set_quote(self, bid: float, ask: float, depth: float | None = None):
+        self.mm = (to_ticks(bid), to_ticks(ask))
+        self._mm_left = [depth, depth]
+
+    def best(self, side: int):
+        """Mejor nivel vivo de un lado: (ticks, deque) o None."""
+        heap, levels = self._heaps[side], self._levels[side]
+        while heap:
+            t = -heap[0] if side == BUY else heap[0]
+            q = levels.get(t)
+            if q is not None:
+                while q and q[0][_QTY] <= 0:
+                    q.popleft()
+                if q:
+                    return t, q
+                del levels[t]
+            heapq.heappop(heap)
+        return None
+
+    def _rest(self, order: list):
+        side, t = order[_SIDE], order[_PX]
+        q = self._levels[side].get(t)
+        if q is None:
+            q = self._levels[side][t] = deque()
+            heapq.heappush(self._heaps[side], -t if side == BUY else t)
+        q.append(order)
+
+    def match(self, order: list, on_fill, on_done):
+        """Cruza `order` (mutable) contra el libro y el market maker; llama on_fill(precio_ticks,
+        qty, orden_reposo | None) por cada ejecución y on_done(orden_reposo, cancelada) cuando una
+        orden en reposo se completa o se cancela por self-trade. Devuelve la qty sin ejecutar."""
+        side, opp = order[_SIDE], 1 - order[_SIDE]
+        limit = order[_PX]                # None = orden de mercado
+        qty = order[_QTY]
+        mm_px = None if self.mm is None else (self.mm[1] if side == BUY else self.mm[0])
+        while qty > 0:
+            top = self.best(opp)
+            mm_ok = mm_px is not None and self._mm_left[opp] != 0
+            if top is None and not mm_ok:
+                break
+            # el mejor precio entre libro y MM (empate -> libro)
+            use_book = top is not None and (not mm_ok or (top[0] <= mm_px if side == BUY else top[0] >= mm_px))
+            px = top[0] if use_book else mm_px
+            if limit is not None and (px > limit if side == BUY else px < limit):
+                break
+            if use_book:
+                q = top[1]
+                resting = q[0]
+                if resting[_TEAM] == order[_TEAM]:      # self-trade: se cancela la orden en reposo
+                    resting[_QTY] = 0
+                    q.popleft()
+                    on_done(resting, True)
+                    continue
+                f = min(qty, resting[_QTY])
+                resting[_QTY] -= f
+                qty -= f
+                on_fill(px, f, resting)
+                if resting[_QTY] <= 0:
+                    q.popleft()
+                    on_done(resting, False)
+            else:
+                left = self._mm_left[opp]
+                f = qty if left is None else min(qty, left)
+                if left is not None:
+                    self._mm_left[opp] = left - f
+                qty -= f
+                on_fill(px, f, None)
+        order[_QTY] = qty
+        return qty
+
+    def depth(self, side: int, levels: int = 5) -> list[tuple[float, float]]:
+        """Primeros `levels` niveles vivos de un lado: [(precio, qty total)]."""
+        book = self._levels[side]
+        prices = sorted(book, reverse=(side == BUY))
+        out = []
+        for t in prices:
+            qty = sum(o[_QTY] for o in book[t] if o[_QTY] > 0)
+            if qty > 0:
+                out.append((from_ticks(t), qty))
+                if len(out) == levels:
+                    break
+        return out
+
+# ==============================
+# Motor de matching (todos los bonos de un juego)
+# ==============================
+class MatchingEngine:
+    """Libros por bono + índice de órdenes en reposo.
+    submit() acepta órdenes límite (price) o de mercado (price=None, IOC: lo no ejecutado se
+    descarta); con ioc=True una orden límite tampoco queda en reposo (mercado con precio tope).
+    Devuelve un dict con el estado, los fills y las órdenes propias en reposo
+    canceladas por self-trade. fills_to_orders() convierte los fills al formato del
+    OrderLog/ledger (una fila por equipo involucrado, sin el MM).
+    """
+    def __init__(self, mm_depth: float | None = None):
+        self.mm_depth = mm_depth
+        self.books = {}
+        self.open = {}            # oid -> orden en reposo
+        self._ids = itertools.count(1)
+        self.n_orders = 0
+        self.n_fills = 0
+
+    def book(self, bond_id) -> OrderBook:
+        b = self.books.get(bond_id)
+        if b is None:
+            b = self.books[bond_id] = OrderBook(bond_id)
+        return b
+
+    def set_quotes(self, prices: dict):
+        """Cotización del market maker por bono ({bond_id: {"bid","ask",...}}); repone su profundidad."""
+        for bond_id, p in prices.items():
+            self.book(bond_id).set_quote(p["bid"], p["ask"], self.mm_depth)
+
+    def submit(self, team: str, bond_id, side: str, qty: float, price: float | None = None, ronda: int = 0,
+               ioc: bool = False) -> dict:
+        self.n_orders += 1
+        if side not in SIDES:
+            return {"status": "rejected", "reason": "Lado de orden inválido", "filled_qty": 0.0, "fills": []}
+        if not qty or qty <= 0:
+            return {"status": "rejected", "reason": "Cantidad inválida", "filled_qty": 0.0, "fills": []}
+        if price is not None and price <= 0:
+            return {"status": "rejected", "reason": "Precio límite inválido", "filled_qty": 0.0, "fills": []}
+        s = SIDES.index(side)
+        oid = next(self._ids)
+        order = [oid, team, s, None if price is None else to_ticks(price), float(qty), ronda]
+        fills, cancelled = [], []
+
+        def on_fill(px, f, resting):
+            other = MM_TEAM if resting is None else resting[_TEAM]
+            fills.append({
+                "bond_id": bond_id, "price": from_ticks(px), "qty": f,
+                "buyer": team if s == BUY else other, "seller": other if s == BUY else team,
+                "aggressor": side, "resting_oid": None if resting is None else resting[_OID],
+            })
+
+        def on_done(resting, was_cancelled):
+            self.open.pop(resting[_OID], None)
+            if was_cancelled:
+                cancelled.append(resting[_OID])
+
+        book = self.book(bond_id)
+        left = book.match(order, on_fill, on_done)
+        self.n_fills += len(fills)
+        filled = float(qty) - left
+        rests = price is not None and not ioc
+        if left > 0 and rests:
+            book._rest(order)
+            self.open[oid] = order
+            status = "partial" if filled else "resting"
+        else:
+            status = "filled" if left == 0 else ("partial" if filled else "unfilled")
+        return {"oid": oid, "status": status, "filled_qty": filled, "resting_qty": left if rests else 0.0,
+                "fills": fills, "cancelled": cancelled}
+
+    def cancel(self, oid: int, team: str | None = None) -> bool:
+        order = self.open.get(oid)
+        if order is None or (team is not None and order[_TEAM] != team):
+            return False
+        order[_QTY] = 0
+        del self.open[oid]
+        return True
+
+    def cancel_all(self, team: str | None = None) -> int:
+        oids = [oid for oid, o in self.open.items() if team is None or o[_TEAM] == team]
+        for oid in oids:
+            self.cancel(oid)
+        return len(oids)
+
+    def open_orders(self, team: str | None = None) -> list[dict]:
+        return [{"oid": o[_OID], "team": o[_TEAM], "bond_id": bond, "side": SIDES[o[_SIDE]],
+                 "price": from_ticks(o[_PX]), "qty": o[_QTY], "ronda": o[_RONDA]}
+                for bond, b in self.books.items() for lv in b._levels for q in lv.values() for o in q
+                if o[_QTY] > 0 and (team is None or o[_TEAM] == team)]
+
+    def depth(self, bond_id, levels: int = 5) -> dict:
+        b = self.books.get(bond_id)
+        if b is None:
+            return {"bids": [], "asks": [], "mm": None}
+        mm = None if b.mm is None else (from_ticks(b.mm[0]), from_ticks(b.mm[1]))
+        return {"bids": b.depth(BUY, levels), "asks": b.depth(SELL, levels), "mm": mm}
+
+def fills_to_orders(fills: list[dict], fee_bps: float, ronda: int, ts: int) -> list[dict]:
+    """Fills -> órdenes del log (BUY para el comprador, SELL para el vendedor; el MM no se registra)."""
+    out = []
+    for f in fills:
+        fee = round(f["qty"] * f["price"] * fee_bps / 10_000, 2)
+        for team, side in ((f["buyer"], "BUY"), (f["seller"], "SELL")):
+            if team != MM_TEAM:
+                out.append(dict(ts=ts, team=team, bond_id=f["bond_id"], side=side, qty=f["qty"],
+                                price_exec=f["price"], fees=fee, ronda=ronda))
+    return out
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 def price_bond_mid(valor_nominal: float, tasa_cupon_anual: float, frecuencia_anual: int,
                    vencimiento_anios: float, ytm_anual: float) -> float:
@@ -20,3 +21,76 @@ def bid_ask_from_mid(mid: float, bid_bp: float, ask_bp: float):
     b = mid * (1 - (bid_bp / 10000.0))
     a = mid * (1 + (ask_bp / 10000.0))
     return b, a
+
+# ==============================
+# Versión vectorizada (tabla completa de bonos)
+# ==============================
+_BOND_FIELDS = (
+    ("valor_nominal", 1000.0),
+    ("tasa_cupon_anual", 0.0),
+    ("frecuencia_anual", 2.0),
+    ("vencimiento_anios", 1.0),
+    ("spread_bps", 0.0),
+)
+
+def bond_arrays(bonds) -> dict:
+    """Columnas numéricas de una tabla de bonos (DataFrame o lista de dicts) como arrays float."""
+    if bonds is None:
+        bonds = []
+    if hasattr(bonds, "columns"):
+        n = len(bonds)
+        return {k: (bonds[k].to_numpy(dtype=float) if k in bonds.columns else np.full(n, d))
+                for k, d in _BOND_FIELDS}
+    bonds = list(bonds)
+    return {k: np.fromiter((float(b.get(k, d)) for b in bonds), dtype=float, count=len(bonds))
+            for k, d in _BOND_FIELDS}
+
+def price_bonds_vec(valor_nominal, tasa_cupon_anual, frecuencia_anual, vencimiento_anios, ytm_anual,
+                    bid_bp=0.0, ask_bp=0.0):
+    """MID/BID/ASK de muchos bonos en una llamada (arrays o escalares, con broadcasting).
+    Misma convención que price_bond_mid, pero con la anualidad en forma cerrada:
+    PV cupones = C * (1 - (1+i)^-N) / i. Devuelve (mid, bid, ask) como arrays.
+    """
+    Vn, c, f, T, y = np.broadcast_arrays(
+        np.asarray(valor_nominal, dtype=float),
+        np.asarray(tasa_cupon_anual, dtype=float),
+        np.asarray(frecuencia_anual, dtype=float),
+        np.maximum(np.asarray(vencimiento_anios, dtype=float), 0.0),
+        np.asarray(ytm_anual, dtype=float),
+    )
+    ok = f > 0
+    f = np.where(ok, f, 1.0)
+    N = np.where(ok, np.ceil(T * f), 0.0)
+    i = y / f
+    C = Vn * (c / f)
+    disc = np.power(1.0 + i, -N)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(np.abs(i) > 1e-12, (1.0 - disc) / i, N)
+    mid = np.where(N > 0, C * annuity + Vn * disc, Vn)
+    bid = mid * (1 - np.asarray(bid_bp, dtype=float) / 10000.0)
+    ask = mid * (1 + np.asarray(ask_bp, dtype=float) / 10000.0)
+    return mid, bid, ask
+
+def price_round(bonds, schedule: dict, ronda: int, base_rate: float, frac_anio: float,
+                bid_bp: float, ask_bp: float):
+    """Reprecia toda la tabla para `ronda` (1..R) con el schedule de domain.events.compile_schedule.
+    `bonds` puede ser la tabla o el dict de bond_arrays. Devuelve (mid, bid, ask).
+    """
+    arr = bonds if isinstance(bonds, dict) else bond_arrays(bonds)
+    shift = schedule["shift_bps"][ronda - 1]
+    widen = schedule["widen_bps"][ronda - 1]
+    ytm = base_rate + (arr["spread_bps"] + shift) / 10000.0
+    T = arr["vencimiento_anios"] - (ronda - 1) * frac_anio
+    return price_bonds_vec(arr["valor_nominal"], arr["tasa_cupon_anual"], arr["frecuencia_anual"],
+                           T, ytm, bid_bp + widen, ask_bp + widen)
+
+def price_grid(bonds, schedule: dict, base_rate: float, frac_anio: float, bid_bp: float, ask_bp: float):
+    """Grilla (rondas × bonos) de MID/BID/ASK para todas las rondas del schedule en una pasada."""
+    arr = bonds if isinstance(bonds, dict) else bond_arrays(bonds)
+    shift = np.asarray(schedule["shift_bps"], dtype=float)
+    widen = np.asarray(schedule["widen_bps"], dtype=float)[:, None]
+    elapsed = np.arange(shift.shape[0], dtype=float)[:, None]
+    ytm = base_rate + (arr["spread_bps"][None, :] + shift) / 10000.0
+    T = arr["vencimiento_anios"][None, :] - elapsed * frac_anio
+    return price_bonds_vec(arr["valor_nominal"], arr["tasa_cupon_anual"], arr["frecuencia_anual"],
+                           T, ytm, bid_bp + widen, ask_bp + widen)
@@ -0,0 +1,114 @@
+from domain.orders import can_exec_order
+
+# Códigos de rechazo (estables, para bots / reportes); el mensaje es para mostrar en la UI
+REASONS = {
+    "side": "Lado de orden inválido",
+    "qty": "Cantidad inválida",
+    "price": "Sin precio de referencia para el bono",
+    "cash": "Cash insuficiente",
+    "position": "Posición insuficiente",
+    "notional": "Nocional por orden sobre el límite",
+    "position_limit": "Posición máxima por bono superada",
+    "rate": "Demasiadas órdenes en esta ronda",
+    "team": "Equipo no registrado",
+    "trading": "Trading cerrado",
+}
+
+def reason(code: str, **detail) -> dict:
+    return {"code": code, "message": REASONS[code], **detail}
+
+class RiskGuard:
+    """Controles pre-trade en O(1) contra los saldos del ledger incremental.
+    Revisa cash, posición disponible, nocional máximo por orden, posición máxima por bono y
+    órdenes por equipo y ronda. Lo comprometido por órdenes límite en reposo se reserva
+    (cash para compras, títulos para ventas) y se libera con los fills o la cancelación, así
+    un equipo no puede comprometer dos veces el mismo saldo.
+    check() devuelve la lista de rechazos ([] = aprobada), cada uno {"code", "message", ...}.
+    """
+    def __init__(self, max_order_notional: float | None = None, max_position: float | None = None,
+                 max_orders_per_round: int | None = None, allow_short: bool = False):
+        self.max_order_notional = max_order_notional
+        self.max_position = max_position
+        self.max_orders_per_round = max_orders_per_round
+        self.allow_short = allow_short
+        self._count = {}          # (team, ronda) -> órdenes enviadas
+        self._cash = {}           # team -> cash reservado por compras en reposo
+        self._buy = {}            # (team, bond) -> qty reservada por compras en reposo
+        self._sell = {}           # (team, bond) -> qty reservada por ventas en reposo
+        self._open = {}           # oid -> [team, bond, side, px, qty, fee_bps]
+
+    def check(self, ledger, team: str, bond_id, side: str, qty: float, px: float | None,
+              fee_bps: float, ronda: int) -> list[dict]:
+        if side not in ("BUY", "SELL"):
+            return [reason("side", value=side)]
+        if not qty or qty <= 0:
+            return [reason("qty", value=qty)]
+        if px is None or px <= 0:
+            return [reason("price", value=px)]
+        out = []
+        n = self._count.get((team, ronda), 0)
+        if self.max_orders_per_round is not None and n >= self.max_orders_per_round:
+            out.append(reason("rate", limit=self.max_orders_per_round, value=n))
+        notional = qty * px
+        if self.max_order_notional is not None and notional > self.max_order_notional:
+            out.append(reason("notional", limit=self.max_order_notional, value=round(notional, 2)))
+        pos = ledger.position(team, bond_id)
+        cash_free = ledger.team_cash(team) - self._cash.get(team, 0.0)
+        qty_free = pos - self._sell.get((team, bond_id), 0.0)
+        if side == "SELL" and self.allow_short:
+            qty_free = float("inf")
+        ok, msg = can_exec_order(cash_free, qty_free, side, qty, px, fee_bps)
+        if not ok:
+            code = "cash" if side == "BUY" else "position"
+            need = round(notional * (1 + fee_bps / 10_000), 2) if side == "BUY" else qty
+            out.append(reason(code, available=round(cash_free, 2) if side == "BUY" else qty_free, required=need))
+        if self.max_position is not None:
+            after = pos + self._buy.get((team, bond_id), 0.0) + qty if side == "BUY" \
+                else pos - self._sell.get((team, bond_id), 0.0) - qty
+            if abs(after) > self.max_position:
+                out.append(reason("position_limit", limit=self.max_position, value=after))
+        return out
+
+    def count(self, team: str, ronda: int):
+        """Registra una orden aceptada para el límite por ronda."""
+        self._count[(team, ronda)] = self._count.get((team, ronda), 0) + 1
+
+    # ---- reservas de órdenes en reposo ----
+    def reserve(self, oid: int, team: str, bond_id, side: str, qty: float, px: float, fee_bps: float):
+        self._open[oid] = [team, bond_id, side, px, 0.0, fee_bps]
+        self._adjust(oid, qty)
+
+    def release(self, oid: int, qty: float | None = None):
+        """Libera `qty` (o todo lo pendiente) de la reserva de una orden."""
+        o = self._open.get(oid)
+        if o is None:
+            return
+        self._adjust(oid, -(o[4] if qty is None else min(qty, o[4])))
+        if o[4] <= 1e-12:
+            del self._open[oid]
+
+    def _adjust(self, oid: int, dq: float):
+        team, bond, side, px, _, fee_bps = o = self._open[oid]
+        o[4] += dq
+        if side == "BUY":
+            self._cash[team] = self._cash.get(team, 0.0) + dq * px * (1 + fee_bps / 10_000)
+            self._buy[(team, bond)] = self._buy.get((team, bond), 0.0) + dq
+        else:
+            self._sell[(team, bond)] = self._sell.get((team, bond), 0.0) + dq
+
+    def on_result(self, res: dict, team: str, bond_id, side: str, price: float | None, fee_bps: float):
+        """Actualiza reservas con el resultado de MatchingEngine.submit()."""
+        for f in res.get("fills", ()):
+            if f.get("resting_oid") is not None:
+                self.release(f["resting_oid"], f["qty"])
+        for oid in res.get("cancelled", ()):
+            self.release(oid)
+        if res.get("resting_qty") and price is not None:
+            self.reserve(res["oid"], team, bond_id, side, res["resting_qty"], price, fee_bps)
+
+    def reserved(self, team: str) -> float:
+        return self._cash.get(team, 0.0)
+
+    def clear(self):
+        """Suelta todas las reservas (p.ej. al cancelar el libro completo en una ronda nueva)."""
+        self._cash.clear(); self._buy.clear(); self._sell.clear(); self._open.clear()
@@ -0,0 +1,43 @@
+import hashlib
+import numpy as np
+from domain.events import compile_schedule
+from domain.pricing import bond_arrays, price_grid
+
+def bond_ids(bonds) -> list:
+    if bonds is None:
+        return []
+    if hasattr(bonds, "columns"):
+        return bonds["bond_id"].tolist()
+    return [b.get("bond_id") for b in bonds]
+
+def scenario_key(bonds, events, *params) -> str:
+    """Huella de bonos + eventos + parámetros: si no cambia, la grilla precalculada sigue válida."""
+    arr = bond_arrays(bonds)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(bond_ids(bonds)).encode())
+    for k in sorted(arr):
+        h.update(np.ascontiguousarray(arr[k]).tobytes())
+    h.update(repr(list(events or [])).encode())
+    h.update(repr(params).encode())
+    return h.hexdigest()
+
+def precompute_scenario(bonds, events, base_rate: float, frac_anio: float, bid_bp: float, ask_bp: float,
+                        liquidity_widen_bp: float = 0.0, n_rounds: int = 0, prev: dict | None = None) -> dict:
+    """Compila los eventos y precalcula la grilla de precios de todas las rondas.
+    Devuelve {key, bond_ids, schedule, mid, bid, ask, prices}; `prices[r-1]` es el dict
+    {bond_id: {mid,bid,ask}} (redondeado) listo para publicar la ronda r.
+    Si `prev` tiene la misma clave se reutiliza sin recalcular.
+    """
+    key = scenario_key(bonds, events, base_rate, frac_anio, bid_bp, ask_bp, liquidity_widen_bp, n_rounds)
+    if prev is not None and prev.get("key") == key:
+        return prev
+    ids = bond_ids(bonds)
+    sched = compile_schedule(ids, events, n_rounds=n_rounds, liquidity_widen_bp=liquidity_widen_bp)
+    mid, bid, ask = price_grid(bonds, sched, base_rate, frac_anio, bid_bp, ask_bp)
+    mid, bid, ask = np.round(mid, 2), np.round(bid, 2), np.round(ask, 2)
+    prices = [
+        {b: {"mid": m, "bid": bd, "ask": a} for b, m, bd, a in zip(ids, mr, br, ar)}
+        for mr, br, ar in zip(mid.tolist(), bid.tolist(), ask.tolist())
+    ]
+    return {"key": key, "bond_ids": ids, "schedule": sched,
+            "mid": mid, "bid": bid, "ask": ask, "prices": prices}
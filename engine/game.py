@@ -0,0 +1,217 @@
+import threading
+import pandas as pd
+from domain.scenario import precompute_scenario, bond_ids
+from domain.orderbook import MatchingEngine, fills_to_orders
+from domain.risk import RiskGuard, reason
+from domain.bulk import execute_batch
+from engine.valuation import portfolio_value, team_positions_frame, LEADERBOARD_COLS
+from services.order_log import now_us
+from services import perf
+
+class GameError(Exception):
+    """Operación que no corresponde al estado actual del juego (el mensaje es para mostrar)."""
+
+class GameEngine:
+    """Lógica de un juego (game_code) sin Streamlit, sobre un store compartido.
+    Moderador: load_bonds, set_scenario (eventos + grilla precalculada), publish_next_round,
+    set_trading. Equipos: register_team, submit_order (libro + controles pre-trade),
+    submit_bulk, cancel_order. Lectura: snapshot, leaderboard, positions, verify_ledger.
+    close() suelta lo que el motor tiene en el proceso cuando el juego sale de memoria.
+    El libro de órdenes y las reservas de riesgo viven en el proceso (uno por motor); todo lo
+    demás está en el store, así que varias instancias del mismo juego ven el mismo estado.
+    `sheets` (opcional) es la cola write-behind (enqueue_orders / enqueue_prices).
+    view() cachea vistas derivadas (DataFrames) por versión del store, compartidas entre sesiones.
+    """
+    def __init__(self, store, game_code: str, n_rounds: int = 3, sheets=None,
+                 mm_depth: float | None = None, cancel_on_new_round: bool = True, risk: dict | None = None,
+                 max_views: int = 256):
+        self.store = store
+        self.game_code = game_code
+        self.n_rounds = n_rounds
+        self.sheets = sheets
+        self.cancel_on_new_round = cancel_on_new_round
+        self.book = MatchingEngine(mm_depth=mm_depth)
+        self.risk = RiskGuard(**(risk or {}))
+        self._lock = threading.Lock()      # serializa libro + riesgo + commit de fills
+        self._book_round = None
+        self.max_views = max_views
+        self._views = {}                   # nombre -> (versiones, valor), en orden de uso (LRU)
+        self._views_lock = threading.Lock()
+
+    # ---- lectura ----
+    def snapshot(self) -> dict:
+        return self.store.snapshot(self.game_code)
+
+    def version(self) -> int:
+        return self.store.version(self.game_code)
+
+    def wait_for_change(self, since: int, timeout: float) -> bool:
+        return self.store.wait_for_change(self.game_code, since, timeout)
+
+    def commit(self, **updates):
+        self.store.commit(self.game_code, **updates)
+
+    def view(self, name, snap, keys: tuple, fn):
+        """Valor derivado del snapshot (p.ej. un DataFrame) compartido por todas las sesiones del juego:
+        `fn()` solo se recalcula cuando cambia la versión de alguna de las claves `keys` del store.
+        El valor es de solo lectura para quien lo recibe."""
+        tag = tuple(snap["versions"].get(k, 0) for k in keys)
+        with self._views_lock:
+            hit = self._views.pop(name, None)
+            if hit is not None:
+                self._views[name] = hit
+        if hit is not None and hit[0] == tag:
+            return hit[1]
+        val = fn()
+        with self._views_lock:
+            cur = self._views.get(name)
+            # no pisar una vista más nueva calculada por otra sesión
+            if cur is None or all(a >= b for a, b in zip(tag, cur[0])):
+                self._views.pop(name, None)
+                self._views[name] = (tag, val)
+                while len(self._views) > self.max_views:
+                    del self._views[next(iter(self._views))]
+        return val
+
+    # ---- moderador ----
+    def load_bonds(self, bonds: pd.DataFrame):
+        self.commit(bonds=bonds)
+
+    def set_scenario(self, events, base_rate: float, frac_anio: float, bid_bp: float, ask_bp: float,
+                     liquidity_widen_bp: float = 0.0, bonds=None) -> dict:
+        """Guarda los eventos y la grilla de precios de todas las rondas (reutiliza la anterior si no cambió)."""
+        snap = self.snapshot()
+        bonds = snap["bonds"] if bonds is None else bonds
+        if bonds is None:
+            raise GameError("Carga bonos primero.")
+        with perf.span(self.game_code, "pricing"):
+            grid = precompute_scenario(bonds, events, base_rate, frac_anio, bid_bp, ask_bp, liquidity_widen_bp,
+                                       n_rounds=self.n_rounds, prev=snap.get("grid"))
+        self.commit(events=events, grid=grid)
+        return grid
+
+    def publish_next_round(self) -> dict:
+        """Publica la siguiente ronda desde la grilla precalculada (prices + round + trading_on en un commit)."""
+        with self.store.transaction(self.game_code) as g:
+            if g["bonds"] is None or g["events"] is None or g.get("grid") is None:
+                raise GameError("Carga bonos y define eventos primero.")
+            grid = g["grid"]
+            r = g["round"] + 1
+            if r > min(self.n_rounds, len(grid["prices"])):
+                raise GameError(f"Ya se publicaron los {self.n_rounds} eventos.")
+            g.update(prices=grid["prices"][r-1], round=r, trading_on=True)
+        if self.sheets is not None:
+            self.sheets.enqueue_prices(self.game_code, r, grid["prices"][r-1])
+        return {"round": r, "prices": grid["prices"][r-1], "descripcion": grid["schedule"]["descripcion"][r-1]}
+
+    def set_trading(self, on: bool):
+        self.commit(trading_on=bool(on))
+
+    # ---- equipos / órdenes ----
+    def register_team(self, team: str):
+        team = team.strip()
+        if not team:
+            raise GameError("Ingresa un nombre de equipo.")
+        self.store.register_team(self.game_code, team)
+
+    def append_orders(self, ods: list[dict]):
+        """Lote de órdenes en un solo commit del store (+ cola hacia Sheets)."""
+        if not ods:
+            return
+        self.store.append_orders(self.game_code, ods)
+        perf.count(self.game_code, "orders", len(ods))
+        if self.sheets is not None:
+            self.sheets.enqueue_orders(self.game_code, ods)
+
+    def _sync_book(self, snap: dict):
+        """Cotización del market maker al día con la ronda publicada (llamar con el lock tomado)."""
+        if self._book_round != snap["round"] and snap["prices"]:
+            if self._book_round is not None and self.cancel_on_new_round:
+                self.book.cancel_all()
+                self.risk.clear()
+            self.book.set_quotes(snap["prices"])
+            self._book_round = snap["round"]
+
+    def submit_order(self, team: str, bond_id, side: str, qty: float, price: float | None = None,
+                     fee_bps: float = 5.0) -> dict:
+        """Controles pre-trade y envío al libro; los fills van al store en un solo commit.
+        price=None es orden de mercado: se envía IOC con tope en el precio contra el que se hizo el control
+        de riesgo (ask / bid publicado), así no ejecuta en niveles peores que dejen el cash o la posición
+        fuera de lo aprobado. Rechazos: status "rejected" con la lista `reasons`."""
+        with perf.span(self.game_code, "submit_order"), self._lock:
+            snap = self.snapshot()
+            self._sync_book(snap)
+            ronda = snap["round"]
+            if not snap["trading_on"]:
+                reasons = [reason("trading")]
+            elif team not in snap["teams"]:
+                reasons = [reason("team", value=team)]
+            else:
+                quote = snap["prices"].get(bond_id, {})
+                ref_px = price if price is not None else quote.get("ask" if side == "BUY" else "bid")
+                reasons = self.risk.check(snap["ledger"], team, bond_id, side, qty, ref_px, fee_bps, ronda)
+            if reasons:
+                return {"status": "rejected", "reason": "; ".join(r["message"] for r in reasons),
+                        "reasons": reasons, "filled_qty": 0.0, "fills": []}
+            self.risk.count(team, ronda)
+            res = self.book.submit(team, bond_id, side, qty, ref_px, ronda=ronda, ioc=price is None)
+            self.risk.on_result(res, team, bond_id, side, price, fee_bps)
+            self.append_orders(fills_to_orders(res["fills"], fee_bps, ronda, now_us()))
+        return res
+
+    def submit_bulk(self, data, fee_bps: float = 5.0, team: str | None = None) -> pd.DataFrame:
+        """Lote contra la cotización publicada (domain.bulk) y un único commit; tabla de resultados por orden."""
+        with perf.span(self.game_code, "submit_bulk"), self._lock:
+            snap = self.snapshot()
+            if not snap["trading_on"]:
+                raise GameError("Trading está cerrado.")
+            accepted, res = execute_batch(data, snap["prices"], snap["ledger"], self.risk, snap["teams"],
+                                          fee_bps, snap["round"], now_us(), team=team)
+            self.append_orders(accepted)
+        return res
+
+    def cancel_order(self, team: str, oid: int) -> bool:
+        with self._lock:
+            ok = self.book.cancel(oid, team=team)
+            if ok:
+                self.risk.release(oid)
+        return ok
+
+    def open_orders(self, team: str | None = None) -> list[dict]:
+        with self._lock:
+            self._sync_book(self.snapshot())
+            return self.book.open_orders(team)
+
+    def depth(self, bond_id, levels: int = 5) -> dict:
+        with self._lock:
+            self._sync_book(self.snapshot())
+            return self.book.depth(bond_id, levels)
+
+    def close(self):
+        """Suelta el estado en proceso: cancela el libro (las órdenes en reposo no están en el store),
+        libera las reservas de riesgo y vacía las vistas. El store no se toca. Idempotente; si el motor
+        se vuelve a usar, el libro se cotiza de nuevo con la ronda publicada."""
+        with self._lock:
+            self.book.cancel_all()
+            self.book.books.clear()
+            self.risk.clear()
+            self._book_round = None
+        with self._views_lock:
+            self._views.clear()
+
+    # ---- valoración ----
+    def leaderboard(self, k: int | None = None, snap: dict | None = None) -> pd.DataFrame:
+        snap = self.snapshot() if snap is None else snap
+        if snap["bonds"] is None or not snap["teams"]:
+            return pd.DataFrame(columns=LEADERBOARD_COLS)
+        with perf.span(self.game_code, "leaderboard"):
+            return portfolio_value(list(snap["teams"]), snap["prices"], snap["ledger"], k=k)
+
+    def positions(self, team: str, snap: dict | None = None):
+        """(posiciones por bono, fila de valor/cash) del equipo."""
+        snap = self.snapshot() if snap is None else snap
+        return team_positions_frame(team, bond_ids(snap["bonds"]), snap["prices"], snap["ledger"])
+
+    def verify_ledger(self, snap: dict | None = None) -> list[str]:
+        snap = self.snapshot() if snap is None else snap
+        return snap["ledger"].verify(snap["orders"])
@@ -0,0 +1,64 @@
+import math
+import pandas as pd
+from services.scenario_cache import load_scenario_cached
+
+SAMPLE_BONDS_CSV = """bond_id,nombre,valor_nominal,tasa_cupon_anual,frecuencia_anual,vencimiento_anios,spread_bps,callable,precio_call,descripcion
+B1,Bono Soberano 3y,1000,0.06,2,3,80,FALSE,,Core
+B2,Bono Corp AAA 5y,1000,0.05,2,5,120,TRUE,1020,Callable
+B3,Bono HY 4y,1000,0.08,4,4,300,FALSE,,High Yield
+"""
+
+# ==============================
+# Carga de bonos
+# ==============================
+def load_bonds_csv(uploaded_or_text) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """CSV de bonos -> (DataFrame tipado, reporte de rechazos) con el lector columnar compartido y
+    caché en disco por contenido. El reporte (storage_models.REJECTED_COLS) va aparte para que no
+    viaje con los bonos al store."""
+    sc = load_scenario_cached(uploaded_or_text, venc_default=3.0, bonds_only=True)
+    return sc["bonds"].copy(), sc["rejected"]
+
+# ==============================
+# Modelo de precios (MVP, escalar; la grilla usa domain.pricing vectorizado)
+# ==============================
+def price_bond_mid(row, ytm_anual: float, frac_anio: float, rounds_elapsed: int) -> float:
+    Vn   = float(row["valor_nominal"])
+    c    = float(row["tasa_cupon_anual"])
+    f    = int(row["frecuencia_anual"])
+    T0   = float(row["vencimiento_anios"])
+    # Ajustar time-to-maturity según rondas transcurridas
+    T    = max(0.0, T0 - rounds_elapsed * frac_anio)
+    if T <= 0:  # al vencimiento, valor nominal
+        return Vn
+    C    = Vn * (c / f)
+    i    = ytm_anual / f
+    N    = max(1, math.ceil(T * f))  # pagos restantes
+    # PV de cupones + principal
+    pv_c = sum(C / ((1 + i) ** k) for k in range(1, N + 1))
+    pv_p = Vn / ((1 + i) ** N)
+    return float(pv_c + pv_p)
+
+def bid_ask_from_mid(mid: float, bid_bp: float, ask_bp: float) -> tuple[float,float]:
+    bid = mid * (1 - bid_bp/10_000)
+    ask = mid * (1 + ask_bp/10_000)
+    return float(bid), float(ask)
+
+def effective_ytm(row, base_rate_anual: float, market_bps: float, idios_bps: float) -> float:
+    return base_rate_anual + row["spread_bps"]/10_000 + market_bps/10_000 + idios_bps/10_000
+
+# ==============================
+# Propuesta de 3 eventos adaptativos
+# ==============================
+def propose_events(bonds_df: pd.DataFrame, e1_market_bps: int, e2_idios_bps: int, e3_delta_good_bps: int, e3_delta_rest_bps: int):
+    """Devuelve lista de 3 eventos paramétricos y adaptativos al dataset."""
+    hi = bonds_df.sort_values("spread_bps", ascending=False).iloc[0]["bond_id"]
+    lo = bonds_df.sort_values("spread_bps", ascending=True).iloc[0]["bond_id"]
+    return [
+        {"round": 1, "tipo": "MARKET", "bond_id": None, "delta_tasa_bps": e1_market_bps, "impacto_bps": 0,
+         "descripcion": f"Shock de tasa global {e1_market_bps:+} bps"},
+        {"round": 2, "tipo": "IDIOS", "bond_id": hi, "delta_tasa_bps": 0, "impacto_bps": e2_idios_bps,
+         "descripcion": f"Widening idiosincrático en {hi}: {e2_idios_bps:+} bps"},
+        {"round": 3, "tipo": "MIXTO", "bond_id": lo, "delta_tasa_bps": 0, "impacto_bps": e3_delta_good_bps,
+         "impacto_resto_bps": e3_delta_rest_bps,
+         "descripcion": f"Flight-to-quality: {lo} {e3_delta_good_bps:+} bps; resto {e3_delta_rest_bps:+} bps (y +liquidez)"}
+    ]
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from domain.ledger import TeamLedger
+from domain.leaderboard import top_k
+
+LEADERBOARD_COLS = ["team","valor_portafolio","cash"]
+
+def compute_positions(orders: list[dict]):
+    # Replay completo (referencia/verificación); el juego lee el ledger incremental de domain.ledger.
+    pos = {}   # (team,bond) -> qty
+    cash = {}  # team -> cash
+    fees = {}  # team -> fees
+    for od in orders:
+        t = od["team"]; b = od["bond_id"]; side = od["side"]
+        q = float(od["qty"]); px = float(od["price_exec"])
+        fee = float(od["fees"])
+        fees[t] = fees.get(t, 0.0) + fee
+        if side == "BUY":
+            cash[t] = cash.get(t, 100_000.0) - q*px - fee
+            pos[(t,b)] = pos.get((t,b), 0.0) + q
+        else:
+            cash[t] = cash.get(t, 100_000.0) + q*px - fee
+            pos[(t,b)] = pos.get((t,b), 0.0) - q
+    # completar cash inicial si equipo no operó
+    teams = set([od["team"] for od in orders])
+    for t in teams:
+        cash.setdefault(t, 100_000.0)
+    return pos, cash, fees
+
+def portfolio_value(teams, prices_dict, ledger: TeamLedger, k: int | None = None):
+    """
+    Versión robusta: nunca lanza KeyError; devuelve DF vacío con columnas esperadas si no hay datos.
+    Valora a todos los equipos con un producto matriz-vector sobre el ledger; k -> solo top-K (heap).
+    """
+    teams = list(teams)
+    if not teams:
+        return pd.DataFrame(columns=LEADERBOARD_COLS)
+    led_vals = ledger.values(prices_dict)
+    rows = [ledger.team_index.get(t) for t in teams]
+    cash = np.array([ledger.cash_inicial if i is None else ledger.cash[i] for i in rows])
+    vals = np.array([ledger.cash_inicial if i is None else led_vals[i] for i in rows])
+    best = top_k(teams, vals, len(teams) if k is None else k)
+    pos_of = {t: n for n, t in enumerate(teams)}
+    return pd.DataFrame({
+        "team": [t for t, _ in best],
+        "valor_portafolio": np.round([v for _, v in best], 2),
+        "cash": np.round([cash[pos_of[t]] for t, _ in best], 2),
+    })
+
+def team_positions_frame(team: str, bond_ids, prices: dict, ledger: TeamLedger):
+    """(posiciones por bono con su mid, fila de valor/cash del equipo)."""
+    pos = ledger.team_positions(team)
+    rows = [dict(bond_id=b, qty=pos.get(b, 0.0), mid=prices.get(b, {}).get("mid", np.nan)) for b in bond_ids]
+    return pd.DataFrame(rows), portfolio_value([team], prices, ledger)
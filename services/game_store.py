@@ -0,0 +1,315 @@
+import os
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+from domain.ledger import TeamLedger
+from services.order_log import OrderLog
+
+def new_game() -> dict:
+    return {
+        "round": 0,
+        "prices": {},
+        "orders": OrderLog(),
+        "ledger": TeamLedger(),
+        "teams": frozenset(),
+        "bonds": None,
+        "events": None,
+        "grid": None,
+        "trading_on": False,
+        "version": 0,      # sube en cada commit que cambia algo
+        "versions": {},    # clave -> versión del último commit que la cambió
+    }
+
+_META = ("version", "versions")
+_LOGGED = ("orders", "ledger")   # van al journal como registros "orders", no dentro de "commit"
+_PLAIN = (int, float, bool, str, tuple, list, dict, set, frozenset, type(None))
+
+def _same(a, b) -> bool:
+    """¿Mismo valor? Identidad, o igualdad para tipos simples (evita bumps por listas recreadas)."""
+    if a is b:
+        return True
+    if type(a) is type(b) and isinstance(a, _PLAIN):
+        try:
+            return bool(a == b)
+        except Exception:
+            return False
+    return False
+
+def game_nbytes(game: dict) -> int:
+    """Estimación de memoria de un juego (arrays del log/ledger, bonos y grilla)."""
+    n = game["orders"].nbytes() + game["ledger"].nbytes()
+    bonds = game.get("bonds")
+    if bonds is not None and hasattr(bonds, "memory_usage"):
+        n += int(bonds.memory_usage(deep=True).sum())
+    grid = game.get("grid")
+    if grid is not None:
+        n += sum(grid[k].nbytes for k in ("mid", "bid", "ask")) + grid["schedule"]["shift_bps"].nbytes
+    return n
+
+class GameStore:
+    """Store compartido por proceso, una entrada por game_code.
+    - Escrituras: un lock por game_code (lock striping); cada commit arma un dict nuevo y lo
+      publica con una sola asignación, así varias claves (prices + round + trading_on) cambian juntas.
+    - Lecturas: snapshot() devuelve el último dict publicado sin tomar locks; tratarlo como solo lectura.
+      Un snapshot publicado no cambia después: append_orders trabaja sobre copias del log
+      (OrderLog.fork, que comparte las columnas append-only) y del ledger (TeamLedger.fork, que
+      copia solo las filas de los equipos que toca), así que orders, ledger y versions de un mismo
+      snapshot siempre cuadran entre sí.
+    - Versiones: cada juego lleva un contador monótono `version` y `versions[clave]`, la versión
+      del último commit que cambió esa clave. Un commit que no cambia nada no sube la versión.
+      wait_for_change() permite long-polling sobre la versión (sin recargar ni re-leer todo).
+    - Journal (opcional, services.journal): cada mutación se escribe antes de aplicarse y de
+      publicarse; el snapshot periódico se toma del estado ya publicado (con su versión), así que
+      un juego restaurado (último snapshot + cola del journal, en su primer acceso) vuelve con la
+      misma versión.
+    - Memoria acotada: los juegos sin acceso por más de `idle_ttl_s`, y los menos usados cuando
+      hay más de `max_live_games` vivos, salen de memoria (snapshot del journal o archivo en
+      `spill_dir`) y se rehidratan solos en el siguiente acceso. Los juegos vacíos se descartan.
+      Al desalojar también se poda el lock del juego y se llama `on_evict(gc)` (fuera del lock),
+      para que quien guarda estado por juego (p.ej. el motor con su libro) lo suelte.
+    """
+    def __init__(self, journal=None, max_live_games: int = 0, idle_ttl_s: float = 0.0,
+                 spill_dir: str | None = None, sweep_every_s: float = 30.0, on_evict=None):
+        self._games = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self.on_evict = on_evict
+        self._journal = journal
+        self.max_live_games = max_live_games
+        self.idle_ttl_s = idle_ttl_s
+        self.spill_dir = spill_dir
+        self.sweep_every_s = sweep_every_s
+        self._last_used = {}
+        self._last_sweep = time.monotonic()
+        self.evictions = 0
+        self.rehydrations = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _lock(self, gc: str) -> threading.Condition:
+        # Condition sobre el lock del juego: sirve de lock y para despertar a quien espera versión
+        lock = self._locks.get(gc)
+        if lock is None:
+            with self._registry_lock:
+                lock = self._locks.setdefault(gc, threading.Condition(threading.Lock()))
+        return lock
+
+    @contextmanager
+    def _locked(self, gc: str):
+        """Toma el lock del juego; si mientras esperaba lo podaron (juego desalojado), toma el nuevo."""
+        while True:
+            cond = self._lock(gc)
+            with cond:
+                if self._locks.get(gc) is cond:
+                    yield cond
+                    return
+
+    # ---- residencia en memoria (LRU / TTL + spill) ----
+    def _spill_path(self, gc: str) -> str | None:
+        return os.path.join(self.spill_dir, quote(gc, safe="") + ".game") if self.spill_dir else None
+
+    def _load(self, gc: str) -> dict:
+        """Trae un juego a memoria (llamar con el lock del juego tomado)."""
+        game = None
+        if self._journal is not None and self._journal.has(gc):
+            game = self._journal.restore(gc, new_game)
+        else:
+            path = self._spill_path(gc)
+            if path and os.path.exists(path):
+                with open(path, "rb") as fh:
+                    game = pickle.load(fh)
+                os.remove(path)
+        if game is None:
+            game = new_game()
+        else:
+            self.rehydrations += 1
+        self._games[gc] = game
+        return game
+
+    def _evict(self, gc: str):
+        with self._locked(gc) as cond:
+            game = self._games.pop(gc, None)
+            self._last_used.pop(gc, None)
+            if game is not None and game["version"] > 0:
+                if self._journal is not None:
+                    self._journal.snapshot(gc, game)
+                    self._journal.release(gc)
+                elif self.spill_dir:
+                    path = self._spill_path(gc)
+                    with open(path + ".tmp", "wb") as fh:
+                        pickle.dump(game, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(path + ".tmp", path)
+                else:
+                    self._games[gc] = game   # sin dónde volcarlo: se queda en memoria
+                    return
+            with self._registry_lock:
+                del self._locks[gc]
+            cond.notify_all()                # quien espera versión en este lock pasa al nuevo
+        if game is None:
+            return
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(gc)
+
+    def sweep(self, now: float | None = None):
+        """Desaloja juegos inactivos (TTL) y luego los menos usados hasta respetar max_live_games.
+        Un solo hilo barre a la vez; los demás siguen de largo (on_evict puede tomar locks de otro juego)."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._sweep(time.monotonic() if now is None else now)
+        finally:
+            self._sweep_lock.release()
+
+    def _sweep(self, now: float):
+        self._last_sweep = now
+        by_age = sorted(self._last_used.items(), key=lambda kv: kv[1])
+        if self.idle_ttl_s:
+            for gc, t in by_age:
+                if now - t > self.idle_ttl_s:
+                    self._evict(gc)
+        if self.max_live_games:
+            extra = len(self._games) - self.max_live_games
+            for gc, _ in by_age:
+                if extra <= 0:
+                    break
+                if gc in self._games:
+                    self._evict(gc); extra -= 1
+
+    def _touch(self, gc: str):
+        now = time.monotonic()
+        self._last_used[gc] = now
+        if now - self._last_sweep > self.sweep_every_s:
+            self.sweep(now)
+
+    def stats(self) -> dict:
+        live = list(self._games.values())
+        return {
+            "live_games": len(live),
+            "live_bytes": sum(game_nbytes(g) for g in live),
+            "spilled_games": len(set(self.game_codes()) - set(self._games)),
+            "evictions": self.evictions,
+            "rehydrations": self.rehydrations,
+        }
+
+    def snapshot(self, gc: str) -> dict:
+        snap = self._games.get(gc)
+        if snap is None:
+            with self._locked(gc):
+                snap = self._games.get(gc)
+                if snap is None:
+                    snap = self._load(gc)
+        self._touch(gc)
+        return snap
+
+    def game_codes(self) -> list[str]:
+        codes = set(self._games)
+        if self._journal is not None:
+            codes.update(self._journal.game_codes())
+        if self.spill_dir:
+            codes.update(unquote(f[:-len(".game")]) for f in os.listdir(self.spill_dir) if f.endswith(".game"))
+        return sorted(codes)
+
+    def version(self, gc: str) -> int:
+        return self.snapshot(gc)["version"]
+
+    def _live_version(self, gc: str) -> int:
+        snap = self._games.get(gc)
+        return 0 if snap is None else snap["version"]
+
+    @contextmanager
+    def transaction(self, gc: str, touched=()):
+        """Read-modify-write atómico: entrega un borrador del juego y lo publica al salir sin error.
+        `touched` marca claves mutadas in situ (p.ej. orders), que no se detectan por comparación.
+        """
+        with self._locked(gc) as cond:
+            cur = self._games.get(gc)
+            if cur is None:
+                cur = self._load(gc)
+            self._last_used[gc] = time.monotonic()
+            draft = dict(cur)
+            yield draft
+            changed = set(touched) | {k for k, v in draft.items()
+                                      if k not in _META and not _same(v, cur.get(k))}
+            if not changed:
+                return
+            v = cur["version"] + 1
+            draft["version"] = v
+            draft["versions"] = {**cur["versions"], **{k: v for k in changed}}
+            if self._journal is not None:
+                payload = {k: draft[k] for k in changed if k not in _LOGGED}
+                if payload:
+                    self._journal.append(gc, ("commit", payload))
+            self._games[gc] = draft
+            cond.notify_all()
+            if self._journal is not None:
+                self._journal.maybe_snapshot(gc, draft)
+
+    def wait_for_change(self, gc: str, since: int, timeout: float) -> bool:
+        """Bloquea hasta que la versión del juego supere `since` o venza `timeout`.
+        Devuelve True si hubo cambio."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.version(gc) > since:
+                return True
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            with self._locked(gc) as cond:
+                # también despierta si desalojan el juego (su lock se poda): se vuelve a mirar arriba
+                if cond.wait_for(lambda: self._live_version(gc) > since or self._locks.get(gc) is not cond,
+                                 timeout=left) and self._live_version(gc) > since:
+                    return True
+
+    def commit(self, gc: str, **updates):
+        """Publica varias claves de una vez."""
+        with self.transaction(gc) as g:
+            g.update(updates)
+
+    def register_team(self, gc: str, team: str):
+        with self.transaction(gc) as g:
+            g["teams"] = g["teams"] | {team}
+
+    def append_order(self, gc: str, od: dict):
+        """Agrega la orden al log y al ledger del juego bajo su lock."""
+        self.append_orders(gc, [od])
+
+    def append_orders(self, gc: str, orders: list[dict]):
+        """Agrega un lote de órdenes en un solo commit (una sola versión nueva)."""
+        if not orders:
+            return
+        orders = list(orders)
+        with self.transaction(gc, touched=("orders", "ledger")) as g:
+            pos = None
+            if self._journal is not None:
+                pos = self._journal.append(gc, ("orders", orders))   # antes de tocar el borrador
+            try:
+                g["orders"] = g["orders"].fork()
+                g["ledger"] = g["ledger"].fork()
+                for od in orders:
+                    g["orders"].append(od)
+                    g["ledger"].apply(od)
+            except Exception:
+                if pos is not None:
+                    self._journal.rollback(gc, pos)
+                raise
+
+def create_store(cfg: dict):
+    """Instancia el backend configurado en config.STORE ("memory" por defecto, o "sqlite")."""
+    backend = (cfg or {}).get("backend", "memory")
+    if backend == "memory":
+        journal = None
+        if cfg.get("journal_dir"):
+            from services.journal import Journal
+            journal = Journal(cfg["journal_dir"], snapshot_every=cfg.get("snapshot_every", 50_000),
+                              fsync=cfg.get("fsync", False))
+        return GameStore(journal=journal, max_live_games=cfg.get("max_live_games", 0),
+                         idle_ttl_s=cfg.get("idle_ttl_s", 0.0), spill_dir=cfg.get("spill_dir") or None)
+    if backend == "sqlite":
+        from services.sqlite_store import SqliteGameStore
+        return SqliteGameStore(cfg.get("sqlite_path", "mision_bonos.db"), poll_s=cfg.get("poll_s", 0.2),
+                               max_live_games=cfg.get("max_live_games", 0), idle_ttl_s=cfg.get("idle_ttl_s", 0.0))
+    raise ValueError(f"Backend de store desconocido: {backend}")
@@ -0,0 +1,166 @@
+import os
+import pickle
+import struct
+from urllib.parse import quote, unquote
+
+_FRAME = struct.Struct("<I")   # largo del registro (pickle) que sigue
+
+def _write_frame(fh, record):
+    data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    fh.write(_FRAME.pack(len(data)))
+    fh.write(data)
+
+def _read_frames(path: str):
+    """Registros completos del journal y el offset donde termina el último válido
+    (un registro cortado por un crash se descarta)."""
+    with open(path, "rb") as fh:
+        buf = fh.read()
+    out, pos = [], 0
+    while pos + _FRAME.size <= len(buf):
+        (n,) = _FRAME.unpack_from(buf, pos)
+        end = pos + _FRAME.size + n
+        if end > len(buf):
+            break
+        out.append(pickle.loads(buf[pos + _FRAME.size:end]))
+        pos = end
+    return out, pos
+
+def apply_record(game: dict, record):
+    """Aplica un registro del journal sobre el dict de un juego."""
+    kind, payload = record
+    if kind == "orders":
+        for od in payload:
+            game["orders"].append(od)
+            game["ledger"].apply(od)
+        keys = ("orders", "ledger")
+    else:   # "commit"
+        game.update(payload)
+        keys = tuple(payload)
+    game["version"] = v = game["version"] + 1
+    game["versions"] = {**game["versions"], **{k: v for k in keys}}
+
+class Journal:
+    """Journal append-only por juego + snapshots compactos periódicos.
+    Archivos en `root`: <gc>.snap (pickle del juego completo, con su generación) y
+    <gc>.<gen>.journal (registros posteriores a ese snapshot, con framing de largo + pickle).
+    Cada `snapshot_every` registros se escribe un snapshot nuevo (tmp + os.replace) y se abre
+    el journal de la generación siguiente, así al reiniciar solo se re-aplica la cola:
+    el tiempo de restauración queda acotado aunque el juego lleve millones de órdenes.
+    Las llamadas a append() / maybe_snapshot() deben venir serializadas por juego (lock del store).
+    """
+    def __init__(self, root: str, snapshot_every: int = 50_000, fsync: bool = False):
+        self.root = root
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._open = {}    # gc -> {"fh", "gen", "count"}
+        os.makedirs(root, exist_ok=True)
+
+    def _base(self, gc: str) -> str:
+        return os.path.join(self.root, quote(gc, safe=""))
+
+    def _journal_path(self, gc: str, gen: int) -> str:
+        return f"{self._base(gc)}.{gen}.journal"
+
+    def _handle(self, gc: str, gen: int = 0) -> dict:
+        h = self._open.get(gc)
+        if h is None:
+            h = self._open[gc] = {"fh": open(self._journal_path(gc, gen), "ab"), "gen": gen, "count": 0}
+        return h
+
+    def append(self, gc: str, record) -> int:
+        """Escribe un registro; devuelve el offset donde empieza (para rollback())."""
+        h = self._handle(gc)
+        pos = h["fh"].tell()
+        _write_frame(h["fh"], record)
+        h["fh"].flush()
+        if self.fsync:
+            os.fsync(h["fh"].fileno())
+        h["count"] += 1
+        return pos
+
+    def rollback(self, gc: str, pos: int):
+        """Descarta el último registro (escrito en `pos`) si el commit que lo escribió falló."""
+        h = self._handle(gc)
+        h["fh"].truncate(pos)
+        h["fh"].flush()
+        h["count"] -= 1
+
+    def maybe_snapshot(self, gc: str, game: dict):
+        """Compacta si ya se escribieron `snapshot_every` registros. `game` es el estado publicado
+        que incluye todos los registros escritos (con su versión ya subida)."""
+        h = self._open.get(gc)
+        if h is not None and h["count"] >= self.snapshot_every:
+            self.snapshot(gc, game)
+
+    def snapshot(self, gc: str, game: dict):
+        h = self._handle(gc)
+        gen = h["gen"] + 1
+        tmp = self._base(gc) + ".snap.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump({"game_code": gc, "gen": gen, "game": game}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._base(gc) + ".snap")
+        h["fh"].close()
+        old = self._journal_path(gc, h["gen"])
+        self._open[gc] = {"fh": open(self._journal_path(gc, gen), "ab"), "gen": gen, "count": 0}
+        if os.path.exists(old):
+            os.remove(old)
+
+    def restore(self, gc: str, new_game) -> dict:
+        """Último snapshot + cola del journal. `new_game` crea el juego vacío si no hay snapshot."""
+        snap_path = self._base(gc) + ".snap"
+        gen, game = 0, None
+        if os.path.exists(snap_path):
+            with open(snap_path, "rb") as fh:
+                snap = pickle.load(fh)
+            gen, game = snap["gen"], snap["game"]
+        if game is None:
+            game = new_game()
+        path = self._journal_path(gc, gen)
+        count = 0
+        if os.path.exists(path):
+            records, good_end = _read_frames(path)
+            for rec in records:
+                apply_record(game, rec)
+            count = len(records)
+            if good_end < os.path.getsize(path):
+                with open(path, "r+b") as fh:
+                    fh.truncate(good_end)
+        self._cleanup(gc, gen)
+        self._open[gc] = {"fh": open(path, "ab"), "gen": gen, "count": count}
+        return game
+
+    def has(self, gc: str) -> bool:
+        return os.path.exists(self._base(gc) + ".snap") or os.path.exists(self._journal_path(gc, 0))
+
+    def release(self, gc: str):
+        """Cierra el journal abierto de un juego (p.ej. al sacarlo de memoria)."""
+        h = self._open.pop(gc, None)
+        if h is not None:
+            h["fh"].close()
+
+    def _cleanup(self, gc: str, gen: int):
+        prefix = quote(gc, safe="") + "."
+        for name in os.listdir(self.root):
+            if name.startswith(prefix) and name.endswith(".journal"):
+                g = name[len(prefix):-len(".journal")]
+                if g.isdigit() and int(g) < gen:
+                    os.remove(os.path.join(self.root, name))
+
+    def game_codes(self) -> list[str]:
+        codes = set()
+        for name in os.listdir(self.root):
+            if name.endswith(".snap"):
+                codes.add(unquote(name[:-len(".snap")]))
+            elif name.endswith(".journal"):
+                codes.add(unquote(name[:-len(".journal")].rsplit(".", 1)[0]))
+        return sorted(codes)
+
+    def restore_all(self, new_game) -> dict:
+        return {gc: self.restore(gc, new_game) for gc in self.game_codes()}
+
+    def close(self):
+        for h in self._open.values():
+            h["fh"].close()
+        self._open.clear()
@@ -0,0 +1,159 @@
+import time
+import numpy as np
+import pandas as pd
+
+ORDER_COLS = ["ts","team","bond_id","side","qty","price_exec","fees","ronda"]
+SIDES = ["BUY", "SELL"]
+
+def now_us() -> int:
+    """Timestamp UTC en microsegundos (formato int64 del log)."""
+    return time.time_ns() // 1000
+
+def _ts_us(ts) -> int:
+    if ts is None:
+        return now_us()
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    return int(pd.Timestamp(ts).value // 1000)
+
+class _Intern:
+    """Tabla de strings -> código entero (team / bond_id)."""
+    def __init__(self):
+        self.names = []
+        self.codes = {}
+
+    def code(self, name) -> int:
+        c = self.codes.get(name)
+        if c is None:
+            c = len(self.names)
+            self.names.append(name)
+            self.codes[name] = c
+        return c
+
+class OrderLog:
+    """Log de órdenes columnar y append-only.
+    qty/price_exec/fees en float64, ronda en int16, ts en int64 (µs UTC), side en int8
+    (0=BUY, 1=SELL) y team/bond_id internados como códigos int32. Crece por duplicación.
+    Iterar devuelve dicts (compatibilidad con el formato lista-de-dicts).
+    """
+    _DTYPES = {"ts": np.int64, "team": np.int32, "bond_id": np.int32, "side": np.int8,
+               "qty": np.float64, "price_exec": np.float64, "fees": np.float64, "ronda": np.int16}
+
+    def __init__(self, capacity: int = 1024):
+        self._n = 0
+        self._cols = {k: np.zeros(capacity, dtype=dt) for k, dt in self._DTYPES.items()}
+        self.teams = _Intern()
+        self.bonds = _Intern()
+
+    def __len__(self):
+        return self._n
+
+    def _grow(self, need: int):
+        cap = len(self._cols["ts"])
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        for k, arr in self._cols.items():
+            new = np.zeros(cap, dtype=arr.dtype)
+            new[:self._n] = arr[:self._n]
+            self._cols[k] = new
+
+    def append(self, od: dict) -> int:
+        """Agrega una orden (dict con las claves de ORDER_COLS); devuelve su índice."""
+        i = self._n
+        self._grow(i + 1)
+        c = self._cols
+        c["ts"][i] = _ts_us(od.get("ts"))
+        c["team"][i] = self.teams.code(od["team"])
+        c["bond_id"][i] = self.bonds.code(od["bond_id"])
+        c["side"][i] = 0 if od["side"] == "BUY" else 1
+        c["qty"][i] = od["qty"]
+        c["price_exec"][i] = od["price_exec"]
+        c["fees"][i] = od["fees"]
+        c["ronda"][i] = od.get("ronda", 0)
+        self._n = i + 1   # publicar la fila solo cuando está completa
+        return i
+
+    def extend(self, orders):
+        for od in orders:
+            self.append(od)
+
+    def fork(self) -> "OrderLog":
+        """Log nuevo sobre las mismas columnas, con su propio largo (O(1), sin copiar filas).
+        Sus appends escriben más allá del largo de este, así que este log no cambia; usar solo
+        sobre la última versión (los stores forkean el snapshot publicado bajo el lock del juego)."""
+        log = OrderLog.__new__(OrderLog)
+        log.__dict__.update(self.__dict__)
+        log._cols = dict(self._cols)
+        return log
+
+    def column(self, name: str) -> np.ndarray:
+        """Vista (sin copia) de una columna hasta la última fila publicada."""
+        return self._cols[name][:self._n]
+
+    def row(self, i: int) -> dict:
+        c = self._cols
+        return {
+            "ts": int(c["ts"][i]),
+            "team": self.teams.names[c["team"][i]],
+            "bond_id": self.bonds.names[c["bond_id"][i]],
+            "side": SIDES[c["side"][i]],
+            "qty": float(c["qty"][i]),
+            "price_exec": float(c["price_exec"][i]),
+            "fees": float(c["fees"][i]),
+            "ronda": int(c["ronda"][i]),
+        }
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self.row(i)
+
+    def __getstate__(self):
+        # Al serializar (snapshots / spill) solo viajan las filas usadas, no la capacidad libre
+        st = dict(self.__dict__)
+        st["_cols"] = {k: a[:self._n].copy() for k, a in self._cols.items()}
+        return st
+
+    def __setstate__(self, st):
+        self.__dict__.update(st)
+        if self._n == 0:
+            self._cols = {k: np.zeros(16, dtype=a.dtype) for k, a in self._cols.items()}
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._cols.values())
+
+    def select(self, team=None, bond_id=None, ronda=None) -> np.ndarray:
+        """Índices de las filas que cumplen los filtros (None = sin filtro), comparando códigos en bloque."""
+        mask = np.ones(self._n, dtype=bool)
+        for col, intern, val in (("team", self.teams, team), ("bond_id", self.bonds, bond_id)):
+            if val is not None:
+                code = intern.codes.get(val)
+                if code is None:
+                    return np.empty(0, dtype=np.intp)
+                mask &= self.column(col) == code
+        if ronda is not None:
+            mask &= self.column("ronda") == ronda
+        return np.flatnonzero(mask)
+
+    def to_frame(self, start: int = 0, stop: int | None = None, rows: np.ndarray | None = None) -> pd.DataFrame:
+        """DataFrame de las filas [start, stop) armado sobre vistas de las columnas (o de las filas `rows`,
+        p.ej. una página de select()). team / bond_id / side salen como Categorical sobre los códigos
+        (sin materializar strings).
+        """
+        if rows is None:
+            n = self._n if stop is None else min(stop, self._n)
+            sl = slice(start, n)
+        else:
+            sl = np.asarray(rows, dtype=np.intp)
+        c = self._cols
+        return pd.DataFrame({
+            "ts": c["ts"][sl].view("datetime64[us]"),
+            "team": pd.Categorical.from_codes(c["team"][sl], categories=pd.Index(self.teams.names, dtype=object)),
+            "bond_id": pd.Categorical.from_codes(c["bond_id"][sl], categories=pd.Index(self.bonds.names, dtype=object)),
+            "side": pd.Categorical.from_codes(c["side"][sl], categories=SIDES),
+            "qty": c["qty"][sl],
+            "price_exec": c["price_exec"][sl],
+            "fees": c["fees"][sl],
+            "ronda": c["ronda"][sl],
+        }, index=None if rows is None else sl, copy=False)
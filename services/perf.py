@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+import numpy as np
+import config
+
+# Bordes de los histogramas (ms, escala logarítmica); el último bucket es "> 5 s"
+HIST_EDGES_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+class PerfRecorder:
+    """Duraciones de spans y contadores por juego en ventanas móviles.
+    Cada (juego, span) guarda las últimas `max_samples` muestras (t, ms) y se recorta a `window_s`
+    al resumir; los contadores (reruns, órdenes) guardan (t, n) para calcular tasas por segundo.
+    Thread-safe: las sesiones de Streamlit y el motor registran desde hilos distintos.
+    """
+    def __init__(self, window_s: float = 300.0, max_samples: int = 4096):
+        self.window_s = window_s
+        self.max_samples = max_samples
+        self._spans = {}      # gc -> span -> deque[(t, ms)]
+        self._counts = {}     # gc -> nombre -> deque[(t, n)]
+        self._lock = threading.Lock()
+
+    def _series(self, table: dict, gc: str, name: str) -> deque:
+        s = table.setdefault(gc, {}).get(name)
+        if s is None:
+            s = table[gc][name] = deque(maxlen=self.max_samples)
+        return s
+
+    def record(self, gc: str, span: str, ms: float, now: float | None = None):
+        with self._lock:
+            self._series(self._spans, gc, span).append((time.time() if now is None else now, ms))
+
+    def count(self, gc: str, name: str, n: int = 1, now: float | None = None):
+        with self._lock:
+            self._series(self._counts, gc, name).append((time.time() if now is None else now, n))
+
+    @contextmanager
+    def span(self, gc: str, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(gc, name, (time.perf_counter() - t0) * 1e3)
+
+    def games(self) -> list[str]:
+        with self._lock:
+            return sorted(set(self._spans) | set(self._counts))
+
+    def reset(self, gc: str | None = None):
+        with self._lock:
+            for table in (self._spans, self._counts):
+                if gc is None:
+                    table.clear()
+                else:
+                    table.pop(gc, None)
+
+    def summary(self, gc: str, now: float | None = None) -> dict:
+        """{"window_s", "spans": {span: {count, p50_ms, p95_ms, max_ms, total_ms, hist}}, "rates": {nombre: por s}}."""
+        now = time.time() if now is None else now
+        since = now - self.window_s
+        with self._lock:
+            spans = {k: [ms for t, ms in s if t >= since] for k, s in self._spans.get(gc, {}).items()}
+            counts = {k: [(t, n) for t, n in s if t >= since] for k, s in self._counts.get(gc, {}).items()}
+        out = {"window_s": self.window_s, "spans": {}, "rates": {}, "totals": {}}
+        for name, ms in spans.items():
+            if not ms:
+                continue
+            a = np.asarray(ms)
+            hist = np.bincount(np.searchsorted(HIST_EDGES_MS, a), minlength=len(HIST_EDGES_MS) + 1)
+            out["spans"][name] = {
+                "count": len(a),
+                "p50_ms": float(np.percentile(a, 50)),
+                "p95_ms": float(np.percentile(a, 95)),
+                "max_ms": float(a.max()),
+                "total_ms": float(a.sum()),
+                "hist": hist.tolist(),
+            }
+        for name, ev in counts.items():
+            if not ev:
+                continue
+            # tasa sobre lo transcurrido desde la primera muestra (ventana completa como máximo)
+            elapsed = max(now - ev[0][0], 1.0)
+            total = sum(n for _, n in ev)
+            out["rates"][name] = total / elapsed
+            out["totals"][name] = total
+        return out
+
+    def export(self, gc: str | None = None) -> dict:
+        """Resumen exportable a JSON (un juego o todos), con los bordes de los histogramas."""
+        gcs = [gc] if gc is not None else self.games()
+        return {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "hist_edges_ms": HIST_EDGES_MS,
+                "games": {g: self.summary(g) for g in gcs}}
+
+# ==============================
+# Recorder del proceso (activado por config.FLAGS["perf_spans"])
+# ==============================
+_recorder = None
+
+def enabled() -> bool:
+    return bool(config.FLAGS.get("perf_spans"))
+
+def recorder() -> PerfRecorder:
+    global _recorder
+    if _recorder is None:
+        _recorder = PerfRecorder(**config.PERF)
+    return _recorder
+
+_NOSPAN = nullcontext()
+
+def span(gc: str, name: str):
+    """`with perf.span(gc, "sync"): ...` — no hace nada si la instrumentación está apagada."""
+    return recorder().span(gc, name) if enabled() else _NOSPAN
+
+def count(gc: str, name: str, n: int = 1):
+    if enabled():
+        recorder().count(gc, name, n)
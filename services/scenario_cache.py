@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+import config
+from services.storage_models import load_scenario, raw_bytes
+
+_PARTS = ("bonds", "events", "rejected")
+_FORMAT = 1   # subir si cambia el layout o el parser (invalida entradas viejas)
+
+def scenario_hash(raw, **params) -> str:
+    """Hash del contenido subido + parámetros del lector."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{_FORMAT}|{sorted(params.items())!r}|".encode())
+    h.update(raw if isinstance(raw, bytes) else str(raw).encode())
+    return h.hexdigest()
+
+# ==============================
+# Formato columnar: un .npy por columna
+# ==============================
+def _write_frame(path: str, df: pd.DataFrame):
+    """Numéricas/bool como .npy; texto como códigos int32 (.npy, -1 = None) + categorías (.npy unicode)."""
+    os.makedirs(path)
+    cols = []
+    for i, c in enumerate(df.columns):
+        s = df[c]
+        if s.dtype.kind in "biuf":
+            np.save(os.path.join(path, f"{i}.npy"), s.to_numpy())
+            cols.append({"name": c, "kind": "num"})
+        else:
+            codes, cats = pd.factorize(s.to_numpy(dtype=object), use_na_sentinel=True)
+            np.save(os.path.join(path, f"{i}.npy"), codes.astype(np.int32))
+            np.save(os.path.join(path, f"{i}.cats.npy"), np.asarray([str(x) for x in cats], dtype=str))
+            cols.append({"name": c, "kind": "str"})
+    with open(os.path.join(path, "meta.json"), "w") as fh:
+        json.dump({"columns": cols, "rows": len(df)}, fh)
+
+def _read_frame(path: str) -> pd.DataFrame:
+    with open(os.path.join(path, "meta.json")) as fh:
+        meta = json.load(fh)
+    data = {}
+    for i, col in enumerate(meta["columns"]):
+        arr = np.load(os.path.join(path, f"{i}.npy"), mmap_mode="r")
+        if col["kind"] == "num":
+            data[col["name"]] = arr
+        else:
+            cats = np.load(os.path.join(path, f"{i}.cats.npy")).astype(object)
+            out = np.empty(len(arr), dtype=object)
+            ok = arr >= 0
+            out[ok] = cats[arr[ok]]
+            out[~ok] = None
+            data[col["name"]] = out
+    return pd.DataFrame(data, index=pd.RangeIndex(meta["rows"]), copy=False)
+
+def _dir_bytes(path: str) -> int:
+    return sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+
+# ==============================
+# Caché en disco
+# ==============================
+class ScenarioCache:
+    """Escenarios ya parseados en disco, por hash del contenido subido.
+    Cada entrada es un directorio <hash>/ con bonds/, events/ y rejected/ en formato columnar
+    (.npy por columna, abiertos con mmap al leer). Se escribe en un tmp y se publica con
+    os.replace, así un proceso concurrente nunca ve una entrada a medias. Al superar
+    `max_bytes` se borran las entradas menos usadas (mtime, que se toca en cada hit).
+    """
+    def __init__(self, root: str, max_bytes: int = 256 * 2**20):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str) -> dict | None:
+        path = self._path(key)
+        try:
+            sc = {p: _read_frame(os.path.join(path, p)) for p in _PARTS}
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None   # no está, a medias o la desalojó otra réplica entre la lectura y el utime
+        return sc
+
+    def put(self, key: str, sc: dict):
+        tmp = self._path(f".{key}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(tmp)
+        try:
+            for p in _PARTS:
+                _write_frame(os.path.join(tmp, p), sc[p])
+            os.replace(tmp, self._path(key))
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)   # otra réplica ya la publicó o disco lleno
+            return
+        self._enforce_cap()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, bytes, path) de cada entrada publicada."""
+        out = []
+        for e in os.scandir(self.root):
+            if e.is_dir() and not e.name.startswith("."):
+                size = sum(_dir_bytes(os.path.join(e.path, p)) for p in _PARTS if os.path.isdir(os.path.join(e.path, p)))
+                out.append((e.stat().st_mtime, size, e.path))
+        return out
+
+    def _enforce_cap(self):
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes or len(entries) <= 1:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                entries = entries[1:]
+                self.stats["evictions"] += 1
+
+    def load(self, file_like, **params) -> dict:
+        """load_scenario con caché: hit -> columnas mmap, miss -> parsea y guarda."""
+        raw = raw_bytes(file_like)
+        key = scenario_hash(raw, **params)
+        sc = self.get(key)
+        if sc is not None:
+            self.stats["hits"] += 1
+            return sc
+        self.stats["misses"] += 1
+        t0 = time.perf_counter()
+        sc = load_scenario(raw, **params)
+        sc["parse_s"] = time.perf_counter() - t0
+        self.put(key, sc)
+        return sc
+
+_default = None
+
+def default_cache() -> ScenarioCache | None:
+    """Caché del proceso según config.SCENARIO_CACHE (None si está desactivada)."""
+    global _default
+    cfg = config.SCENARIO_CACHE
+    if not cfg.get("dir"):
+        return None
+    if _default is None:
+        _default = ScenarioCache(cfg["dir"], cfg.get("max_bytes", 256 * 2**20))
+    return _default
+
+def load_scenario_cached(file_like, **params) -> dict:
+    cache = default_cache()
+    if cache is None:
+        return load_scenario(file_like, **params)
+    return cache.load(file_like, **params)
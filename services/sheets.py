@@ -1,40 +1,105 @@
+import hashlib
 import json
+import threading
+import time
 import streamlit as st
 
+# Caché por proceso: un cliente autorizado por service account, un handle por spreadsheet y por
+# worksheet, y lecturas con TTL que nuestras propias escrituras invalidan.
+READ_TTL_S = 10.0
+_lock = threading.Lock()
+_clients = {}        # sha(service account) -> cliente gspread
+_spreadsheets = {}   # (sha, key_or_url) -> Spreadsheet
+_worksheets = {}     # (spreadsheet id, hoja) -> Worksheet
+_tables = {}         # (spreadsheet id, hoja) -> (vence, filas)
+_gens = {}           # (spreadsheet id, hoja) o spreadsheet id -> invalidaciones (descarta lecturas en vuelo)
+
 def has_secrets():
     return "gcp_service_account" in st.secrets and "SPREADSHEET_KEY" in st.secrets
 
+def _secret_key() -> str:
+    return hashlib.sha256(str(st.secrets["gcp_service_account"]).encode()).hexdigest()
+
 def get_client():
-    import gspread
-    from google.oauth2.service_account import Credentials
-    info = json.loads(st.secrets["gcp_service_account"])
-    scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-    creds = Credentials.from_service_account_info(info, scopes=scopes)
-    return gspread.authorize(creds)
+    skey = _secret_key()
+    client = _clients.get(skey)
+    if client is None:
+        import gspread
+        from google.oauth2.service_account import Credentials
+        info = json.loads(st.secrets["gcp_service_account"])
+        scopes = ["https://www.googleapis.com/auth/spreadsheets"]
+        creds = Credentials.from_service_account_info(info, scopes=scopes)
+        client = gspread.authorize(creds)
+        with _lock:
+            client = _clients.setdefault(skey, client)
+    return client
 
 def open_spreadsheet(key_or_url: str):
     if not has_secrets():
         raise RuntimeError("Faltan secretos: gcp_service_account / SPREADSHEET_KEY")
-    client = get_client()
-    return client.open_by_key(key_or_url) if len(key_or_url) < 60 else client.open_by_url(key_or_url)
+    k = (_secret_key(), key_or_url)
+    sh = _spreadsheets.get(k)
+    if sh is None:
+        client = get_client()
+        sh = client.open_by_key(key_or_url) if len(key_or_url) < 60 else client.open_by_url(key_or_url)
+        with _lock:
+            sh = _spreadsheets.setdefault(k, sh)
+    return sh
+
+def _sh_id(sh):
+    return getattr(sh, "id", None) or id(sh)
+
+def _worksheet(sh, sheet_name: str):
+    k = (_sh_id(sh), sheet_name)
+    ws = _worksheets.get(k)
+    if ws is None:
+        ws = sh.worksheet(sheet_name)
+        with _lock:
+            ws = _worksheets.setdefault(k, ws)
+    return ws
+
+def invalidate(sh, sheet_name: str | None = None):
+    """Descarta lecturas cacheadas de una hoja (o de todo el spreadsheet) tras escribir en ella."""
+    sid = _sh_id(sh)
+    g = sid if sheet_name is None else (sid, sheet_name)
+    with _lock:
+        _gens[g] = _gens.get(g, 0) + 1
+        for k in [k for k in _tables if k[0] == sid and (sheet_name is None or k[1] == sheet_name)]:
+            del _tables[k]
 
-# Stubs de lectura/escritura (para implementar en la iteración siguiente)
-def read_table(sh, sheet_name: str) -> list[dict]:
-    ws = sh.worksheet(sheet_name)
-    rows = ws.get_all_records()
-    return rows
+def _gen(k) -> tuple:
+    return _gens.get(k[0], 0), _gens.get(k, 0)
+
+def read_table(sh, sheet_name: str, ttl: float = READ_TTL_S) -> list[dict]:
+    """Filas de la hoja con caché de `ttl` s. Si la hoja se invalida mientras se lee, lo leído se
+    devuelve pero no se cachea (puede ser anterior a la escritura)."""
+    k = (_sh_id(sh), sheet_name)
+    hit = _tables.get(k)
+    now = time.monotonic()
+    if hit is not None and hit[0] > now:
+        return list(hit[1])
+    gen = _gen(k)
+    rows = _worksheet(sh, sheet_name).get_all_records()
+    with _lock:
+        if _gen(k) == gen:
+            _tables[k] = (now + ttl, rows)
+    return list(rows)
 
 def clear_and_write(sh, sheet_name: str, header: list[str], rows: list[list]) -> None:
     try:
-        ws = sh.worksheet(sheet_name)
+        ws = _worksheet(sh, sheet_name)
     except Exception:
         ws = sh.add_worksheet(title=sheet_name, rows=1, cols=len(header))
+        with _lock:
+            _worksheets[(_sh_id(sh), sheet_name)] = ws
     ws.clear()
     ws.append_row(header)
     if rows:
         ws.append_rows(rows)
+    invalidate(sh, sheet_name)
 
 def write_rows_append(sh, sheet_name: str, rows: list[list]) -> None:
-    ws = sh.worksheet(sheet_name)
+    ws = _worksheet(sh, sheet_name)
     if rows:
         ws.append_rows(rows)
+        invalidate(sh, sheet_name)
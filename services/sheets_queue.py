@@ -0,0 +1,167 @@
+import atexit
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+ORDERS_SHEET = "Orders"
+PRICES_SHEET = "Prices"
+ORDERS_HEADER = ["game_code","ts","team","bond_id","side","qty","price_exec","fees","ronda"]
+PRICES_HEADER = ["game_code","ronda","bond_id","mid","bid","ask"]
+
+def order_row(gc: str, od: dict) -> list:
+    ts = od.get("ts")
+    if isinstance(ts, int):
+        ts = datetime.fromtimestamp(ts / 1e6, tz=timezone.utc).isoformat()
+    return [gc, ts, od["team"], od["bond_id"], od["side"], od["qty"], od["price_exec"], od["fees"], od.get("ronda", 0)]
+
+def price_rows(gc: str, ronda: int, prices: dict) -> list[list]:
+    return [[gc, ronda, b, p.get("mid"), p.get("bid"), p.get("ask")] for b, p in prices.items()]
+
+def is_retryable(exc: Exception) -> bool:
+    """Errores de cuota / transitorios de la API (gspread.exceptions.APIError con 429 o 5xx)."""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status in (429, 500, 502, 503, 504):
+        return True
+    msg = str(exc)
+    return "RESOURCE_EXHAUSTED" in msg or "Quota exceeded" in msg or "429" in msg
+
+class SheetsWriteBehind:
+    """Cola write-behind hacia Google Sheets.
+    enqueue() solo agrega filas en memoria; un hilo de fondo junta todo lo pendiente por hoja y lo
+    manda con append_rows de a lo sumo `max_batch_rows` filas. Un lote sale cuando lo pendiente más
+    viejo cumple `max_latency_s` o cuando hay `max_batch_rows` filas. Ante errores de cuota reintenta
+    con back-off exponencial (hasta `backoff_max_s`) sin perder el orden de las filas; tras
+    `max_retries` o un error no reintentable ese tramo se descarta y queda en `errors` (los últimos
+    `max_errors`). close() (registrado con atexit) vacía la cola.
+    `sh` es cualquier objeto con worksheet(name) / add_worksheet(...) (gspread o un fake en memoria).
+    `on_write(sheet_name)` se llama tras cada lote enviado (p.ej. sheets.invalidate para la caché de lecturas).
+    """
+    def __init__(self, sh, max_latency_s: float = 2.0, max_batch_rows: int = 500, max_retries: int = 6,
+                 backoff_s: float = 1.0, backoff_max_s: float = 60.0, headers: dict | None = None,
+                 sleep=time.sleep, start: bool = True, on_write=None, max_errors: int = 100):
+        self.sh = sh
+        self.on_write = on_write
+        self.max_latency_s = max_latency_s
+        self.max_batch_rows = max_batch_rows
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.backoff_max_s = backoff_max_s
+        self.headers = headers if headers is not None else {ORDERS_SHEET: ORDERS_HEADER, PRICES_SHEET: PRICES_HEADER}
+        self._sleep = sleep
+        self._cond = threading.Condition()
+        self._pending = {}        # hoja -> filas (en orden de llegada)
+        self._oldest = None       # monotonic del primer enqueue pendiente
+        self._in_flight = 0
+        self._stop = False
+        self._ws = {}
+        self.stats = {"batches": 0, "rows": 0, "retries": 0, "dropped_rows": 0}
+        self.errors = deque(maxlen=max_errors)
+        self._thread = None
+        if start:
+            self.start()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sheets-write-behind", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # ---- productores ----
+    def enqueue(self, sheet_name: str, rows: list[list]):
+        if not rows:
+            return
+        with self._cond:
+            self._pending.setdefault(sheet_name, []).extend(rows)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._cond.notify_all()
+
+    def enqueue_orders(self, gc: str, orders: list[dict]):
+        self.enqueue(ORDERS_SHEET, [order_row(gc, od) for od in orders])
+
+    def enqueue_prices(self, gc: str, ronda: int, prices: dict):
+        self.enqueue(PRICES_SHEET, price_rows(gc, ronda, prices))
+
+    def pending_rows(self) -> int:
+        with self._cond:
+            return sum(len(r) for r in self._pending.values()) + self._in_flight
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Fuerza el envío de lo pendiente y espera a que se vacíe la cola."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._oldest = float("-inf") if self._pending else self._oldest
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    def close(self, timeout: float | None = 30.0):
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ---- consumidor ----
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        rows = sum(len(r) for r in self._pending.values())
+        return rows >= self.max_batch_rows or time.monotonic() - self._oldest >= self.max_latency_s
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop and not self._due():
+                    wait = None if not self._pending else max(0.0, self._oldest + self.max_latency_s - time.monotonic())
+                    self._cond.wait(wait)
+                if self._stop and not self._pending:
+                    return
+                batch, self._pending, self._oldest = self._pending, {}, None
+                self._in_flight = sum(len(r) for r in batch.values())
+            for sheet_name, rows in batch.items():
+                for lo in range(0, len(rows), self.max_batch_rows):
+                    self._send(sheet_name, rows[lo:lo + self.max_batch_rows])
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _worksheet(self, name: str):
+        ws = self._ws.get(name)
+        if ws is None:
+            try:
+                ws = self.sh.worksheet(name)
+            except Exception:
+                header = self.headers.get(name)
+                ws = self.sh.add_worksheet(title=name, rows=1, cols=len(header or []) or 10)
+                if header:
+                    ws.append_row(header)
+            self._ws[name] = ws
+        return ws
+
+    def _send(self, sheet_name: str, rows: list[list]):
+        delay = self.backoff_s
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._worksheet(sheet_name).append_rows(rows)
+                self.stats["batches"] += 1
+                self.stats["rows"] += len(rows)
+                if self.on_write is not None:
+                    self.on_write(sheet_name)
+                return
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self.stats["dropped_rows"] += len(rows)
+                    self.errors.append(f"{sheet_name}: {e!r}")
+                    return
+                self.stats["retries"] += 1
+                self._sleep(delay)
+                delay = min(delay * 2, self.backoff_max_s)
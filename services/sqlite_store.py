@@ -0,0 +1,299 @@
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from services.game_store import new_game, game_nbytes, _same, _META
+from services.order_log import _ts_us
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_code  TEXT PRIMARY KEY,
+    version    INTEGER NOT NULL DEFAULT 0,
+    versions   TEXT    NOT NULL DEFAULT '{}',
+    round      INTEGER NOT NULL DEFAULT 0,
+    trading_on INTEGER NOT NULL DEFAULT 0,
+    prices     BLOB,
+    bonds      BLOB,
+    events     BLOB,
+    grid       BLOB
+);
+CREATE TABLE IF NOT EXISTS teams (
+    game_code TEXT NOT NULL,
+    team      TEXT NOT NULL,
+    PRIMARY KEY (game_code, team)
+);
+CREATE TABLE IF NOT EXISTS orders (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_code  TEXT    NOT NULL,
+    ts         INTEGER NOT NULL,
+    team       TEXT    NOT NULL,
+    bond_id    TEXT    NOT NULL,
+    side       TEXT    NOT NULL,
+    qty        REAL    NOT NULL,
+    price_exec REAL    NOT NULL,
+    fees       REAL    NOT NULL,
+    ronda      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_orders_game ON orders (game_code, id);
+CREATE INDEX IF NOT EXISTS ix_orders_team ON orders (game_code, team);
+"""
+
+# Claves guardadas como columnas de `games`: escalares tal cual, el resto serializado con pickle
+_SCALARS = ("round", "trading_on")
+_BLOBS = ("prices", "bonds", "events", "grid")
+_BLOB_DEFAULTS = {"prices": {}, "bonds": None, "events": None, "grid": None}
+_ORDER_COLS = ("ts", "team", "bond_id", "side", "qty", "price_exec", "fees", "ronda")
+
+class SqliteGameStore:
+    """Backend del store sobre SQLite local (modo WAL), compartido por varias réplicas del server.
+    Misma interfaz que GameStore. Cada réplica guarda un snapshot local por juego y solo lo
+    refresca cuando cambia games.version (lookup por PK); las órdenes nuevas se leen por cola
+    (id > último visto) y se aplican al OrderLog/ledger locales sin releer todo el log.
+    En transaction() solo se persisten las columnas de `games`; órdenes y equipos van por
+    append_order(s) / register_team.
+    Los snapshots locales son una caché de la base: con `idle_ttl_s` / `max_live_games` se descartan
+    (junto con su lock) igual que los juegos del GameStore en memoria, y se avisa a `on_evict(gc)`.
+    """
+    def __init__(self, path: str, poll_s: float = 0.2, max_live_games: int = 0, idle_ttl_s: float = 0.0,
+                 sweep_every_s: float = 30.0, on_evict=None):
+        self.path = path
+        self.poll_s = poll_s
+        self._tls = threading.local()
+        self._local = {}            # gc -> {"snap": dict, "last_id": int}
+        self._local_locks = {}
+        self._registry_lock = threading.Lock()
+        self.max_live_games = max_live_games
+        self.idle_ttl_s = idle_ttl_s
+        self.sweep_every_s = sweep_every_s
+        self.on_evict = on_evict
+        self._last_used = {}
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+        self.evictions = 0
+        self._con().executescript(_SCHEMA)
+
+    # ---- conexión por hilo ----
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._tls, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._tls.con = con
+        return con
+
+    @contextmanager
+    def _tx(self):
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+
+    def _local_lock(self, gc: str) -> threading.Lock:
+        lock = self._local_locks.get(gc)
+        if lock is None:
+            with self._registry_lock:
+                lock = self._local_locks.setdefault(gc, threading.Lock())
+        return lock
+
+    @contextmanager
+    def _local_locked(self, gc: str):
+        """Toma el lock local del juego; si mientras esperaba lo podaron (desalojo), toma el nuevo."""
+        while True:
+            lock = self._local_lock(gc)
+            with lock:
+                if self._local_locks.get(gc) is lock:
+                    yield
+                    return
+
+    # ---- snapshots locales acotados (LRU / TTL) ----
+    def _evict(self, gc: str):
+        with self._local_locked(gc):
+            loc = self._local.pop(gc, None)
+            self._last_used.pop(gc, None)
+            with self._registry_lock:
+                del self._local_locks[gc]
+        if loc is None:
+            return
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(gc)
+
+    def sweep(self, now: float | None = None):
+        """Descarta snapshots locales inactivos (TTL) y luego los menos usados hasta max_live_games.
+        Un solo hilo barre a la vez; los demás siguen de largo."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic() if now is None else now
+            self._last_sweep = now
+            by_age = sorted(self._last_used.items(), key=lambda kv: kv[1])
+            if self.idle_ttl_s:
+                for gc, t in by_age:
+                    if now - t > self.idle_ttl_s:
+                        self._evict(gc)
+            if self.max_live_games:
+                extra = len(self._local) - self.max_live_games
+                for gc, _ in by_age:
+                    if extra <= 0:
+                        break
+                    if gc in self._local:
+                        self._evict(gc); extra -= 1
+        finally:
+            self._sweep_lock.release()
+
+    def _touch(self, gc: str):
+        now = time.monotonic()
+        self._last_used[gc] = now
+        if now - self._last_sweep > self.sweep_every_s:
+            self.sweep(now)
+
+    # ---- lectura ----
+    def version(self, gc: str) -> int:
+        row = self._con().execute("SELECT version FROM games WHERE game_code=?", (gc,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def game_codes(self) -> list[str]:
+        return [r[0] for r in self._con().execute("SELECT game_code FROM games")]
+
+    def snapshot(self, gc: str) -> dict:
+        loc = self._local.get(gc)
+        v = self.version(gc)
+        if loc is None or loc["snap"]["version"] != v:
+            with self._local_locked(gc):
+                snap = self._refresh(gc)
+        else:
+            snap = loc["snap"]
+        self._touch(gc)
+        return snap
+
+    def _refresh(self, gc: str) -> dict:
+        """Trae al snapshot local lo que cambió desde la versión que tiene (llamar con el lock local
+        tomado): solo los blobs y equipos cuya versión subió, y la cola de órdenes nuevas. El snapshot
+        anterior no se toca (orders / ledger se forkean), así que sigue valiendo para quien lo tenga."""
+        con = self._con()
+        row = con.execute("SELECT version, versions, round, trading_on FROM games WHERE game_code=?",
+                          (gc,)).fetchone()
+        if row is None:
+            con.execute("INSERT OR IGNORE INTO games (game_code) VALUES (?)", (gc,))
+            return self._refresh(gc)
+        loc = self._local.get(gc)
+        if loc is not None and loc["snap"]["version"] == row[0]:
+            return loc["snap"]
+        versions = json.loads(row[1])
+        if loc is None:
+            loc = {"snap": new_game(), "last_id": 0}
+            stale = set(_BLOBS) | {"teams"}
+        else:
+            old = loc["snap"]["versions"]
+            stale = {k for k in (*_BLOBS, "teams") if versions.get(k, 0) != old.get(k, 0)}
+        snap = dict(loc["snap"])
+        snap["version"] = row[0]
+        snap["versions"] = versions
+        snap["round"] = row[2]
+        snap["trading_on"] = bool(row[3])
+        blobs = [k for k in _BLOBS if k in stale]
+        if blobs:
+            vals = con.execute(f"SELECT {', '.join(blobs)} FROM games WHERE game_code=?", (gc,)).fetchone()
+            for k, blob in zip(blobs, vals):
+                snap[k] = pickle.loads(blob) if blob is not None else _BLOB_DEFAULTS[k]
+        if "teams" in stale:
+            snap["teams"] = frozenset(r[0] for r in con.execute("SELECT team FROM teams WHERE game_code=?", (gc,)))
+        last_id = loc["last_id"]
+        rows = con.execute(
+            "SELECT id, ts, team, bond_id, side, qty, price_exec, fees, ronda FROM orders "
+            "WHERE game_code=? AND id>? ORDER BY id", (gc, last_id)).fetchall()
+        if rows:
+            snap["orders"] = snap["orders"].fork()
+            snap["ledger"] = snap["ledger"].fork()
+            for r in rows:
+                od = dict(zip(_ORDER_COLS, r[1:]))
+                snap["orders"].append(od)
+                snap["ledger"].apply(od)
+            last_id = rows[-1][0]
+        self._local[gc] = {"snap": snap, "last_id": last_id}
+        return snap
+
+    def stats(self) -> dict:
+        live = [loc["snap"] for loc in list(self._local.values())]
+        return {
+            "live_games": len(live),
+            "live_bytes": sum(game_nbytes(g) for g in live),
+            "spilled_games": 0,
+            "evictions": self.evictions,
+            "rehydrations": 0,
+        }
+
+    def wait_for_change(self, gc: str, since: int, timeout: float) -> bool:
+        """Polling barato sobre games.version hasta `timeout`."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.version(gc) > since:
+                return True
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            time.sleep(min(self.poll_s, left))
+
+    # ---- escritura ----
+    def _bump(self, con, gc: str, keys) -> int:
+        version, versions = con.execute(
+            "SELECT version, versions FROM games WHERE game_code=?", (gc,)).fetchone()
+        v = version + 1
+        versions = json.loads(versions)
+        versions.update({k: v for k in keys})
+        con.execute("UPDATE games SET version=?, versions=? WHERE game_code=?", (v, json.dumps(versions), gc))
+        return v
+
+    @contextmanager
+    def transaction(self, gc: str, touched=()):
+        """Read-modify-write atómico (BEGIN IMMEDIATE) sobre las columnas del juego."""
+        self.snapshot(gc)   # asegura la fila
+        with self._tx() as con:
+            with self._local_locked(gc):
+                cur = self._refresh(gc)
+            draft = dict(cur)
+            yield draft
+            changed = set(touched) | {k for k, v in draft.items()
+                                      if k not in _META and not _same(v, cur.get(k))}
+            cols = [k for k in changed if k in _SCALARS or k in _BLOBS]
+            if cols:
+                vals = [int(draft[k]) if k in _SCALARS else pickle.dumps(draft[k], protocol=pickle.HIGHEST_PROTOCOL)
+                        for k in cols]
+                con.execute(f"UPDATE games SET {', '.join(f'{k}=?' for k in cols)} WHERE game_code=?",
+                            (*vals, gc))
+            if changed:
+                self._bump(con, gc, changed)
+
+    def commit(self, gc: str, **updates):
+        with self.transaction(gc) as g:
+            g.update(updates)
+
+    def register_team(self, gc: str, team: str):
+        self.snapshot(gc)
+        with self._tx() as con:
+            cur = con.execute("INSERT OR IGNORE INTO teams (game_code, team) VALUES (?, ?)", (gc, team))
+            if cur.rowcount:
+                self._bump(con, gc, ("teams",))
+
+    def append_orders(self, gc: str, orders: list[dict]):
+        """Inserta un lote de órdenes en una sola transacción (executemany)."""
+        if not orders:
+            return
+        self.snapshot(gc)
+        rows = [(gc, _ts_us(od.get("ts")), od["team"], od["bond_id"], od["side"], float(od["qty"]),
+                 float(od["price_exec"]), float(od["fees"]), int(od.get("ronda", 0))) for od in orders]
+        with self._tx() as con:
+            con.executemany(
+                "INSERT INTO orders (game_code, ts, team, bond_id, side, qty, price_exec, fees, ronda) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._bump(con, gc, ("orders", "ledger"))
+
+    def append_order(self, gc: str, od: dict):
+        self.append_orders(gc, [od])
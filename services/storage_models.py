@@ -1,18 +1,43 @@
-import csv, io
+import codecs, csv, io, os, re, warnings
+import numpy as np
+import pandas as pd
+from domain.events import ScheduleAccumulator
 
 EXPECTED_BOND_COLS = ["bond_id","nombre","valor_nominal","tasa_cupon_anual",
                       "frecuencia_anual","vencimiento_anios","spread_bps",
                       "callable","precio_call","descripcion"]
 EXPECTED_EVENT_COLS = ["round","tipo","bond_id","delta_tasa_bps","impacto_bps","descripcion"]
 
-def _to_text(file_like):
-    if isinstance(file_like, str):
-        return io.StringIO(file_like)
-    raw = None
+TRUE_VALUES = ("TRUE","1","SI","SÍ","YES","Y","T")
+EVENT_TYPES = {"market": "MARKET", "idios": "IDIOS", "idiosincratico": "IDIOS", "idiosincrático": "IDIOS"}
+
+# Coerción por columna de bono: (tipo, default si la celda viene vacía o no se puede leer)
+BOND_NUMERIC = {
+    "valor_nominal": ("float", 1000.0),
+    "tasa_cupon_anual": ("float", 0.0),
+    "frecuencia_anual": ("int", 2),
+    "vencimiento_anios": ("float", 1.0),
+    "spread_bps": ("float", 0.0),
+}
+EVENT_NUMERIC = {
+    "round": ("int", 1),
+    "delta_tasa_bps": ("float", 0.0),
+    "impacto_bps": ("float", 0.0),
+}
+REJECTED_COLS = ["fila", "columna", "valor", "default"]
+
+def raw_bytes(file_like) -> bytes | str | None:
+    """Contenido crudo de un upload / archivo / texto (sin decodificar)."""
+    if isinstance(file_like, (str, bytes)):
+        return file_like
     if hasattr(file_like, "getvalue"):
-        raw = file_like.getvalue()
-    elif hasattr(file_like, "read"):
-        raw = file_like.read()
+        return file_like.getvalue()
+    if hasattr(file_like, "read"):
+        return file_like.read()
+    return None
+
+def _to_text(file_like):
+    raw = raw_bytes(file_like)
     if raw is None:
         return io.StringIO("")
     if isinstance(raw, bytes):
@@ -37,68 +62,288 @@ def _sniff(sample):
             quoting = csv.QUOTE_MINIMAL
         return _D
 
-def _norm(h): 
+def _norm(h):
     return (h or "").strip().lower()
 
-def parse_scenario_csv(file_like):
-    text = _to_text(file_like)
+# ==============================
+# Lectura columnar
+# ==============================
+def _read_header(text):
+    """Lee la cabecera de un stream de texto y devuelve (dialecto, cabecera normalizada)."""
     sample = text.read(4096)
     text.seek(0)
     dialect = _sniff(sample)
-    reader = csv.reader(text, dialect)
-
     try:
-        header = next(reader)
+        header = next(csv.reader(io.StringIO(text.readline()), dialect))
     except StopIteration:
-        return [], []
+        return dialect, None
+    return dialect, [_norm(h) for h in header]
+
+_CHUNK_SLACK = 8   # columnas de sobra al leer por lotes (filas más largas que la cabecera)
+_BAD_LINE = re.compile(r"Skipping line (\d+): expected \d+ fields, saw (\d+)")
+
+def _csv_reader(text, dialect, header, chunksize=None):
+    """pd.read_csv de strings. Por lotes no se puede usar usecols (pandas lo valida contra cada
+    lote), así que se leen `_CHUNK_SLACK` columnas extra que _clean descarta. Filas con aún más
+    campos: el engine C las trunca si abren el lote y si no las omite con un aviso (ver _csv_chunks)."""
+    kw = dict(sep=dialect.delimiter, quotechar=dialect.quotechar or '"',
+              skipinitialspace=bool(dialect.skipinitialspace), header=None,
+              dtype=str, keep_default_na=False, na_filter=False, engine="c")
+    if chunksize is None:
+        return pd.read_csv(text, names=range(len(header)), usecols=range(len(header)), **kw)
+    return pd.read_csv(text, names=range(len(header) + _CHUNK_SLACK), index_col=False,
+                       on_bad_lines="warn", chunksize=chunksize, **kw)
+
+def _csv_chunks(text, dialect, header, chunksize):
+    """Lotes de _csv_reader junto con las filas que el parser omitió por tener demasiados campos,
+    como reporte de rechazos (fila = línea de datos, 1-based). on_bad_lines con callable exige el
+    engine python (mucho más lento), así que se capturan los avisos del engine C."""
+    reader = _csv_reader(text, dialect, header, chunksize=chunksize)
+    while True:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", pd.errors.ParserWarning)
+            chunk = next(reader, None)
+        bad = [m for w in caught for m in _BAD_LINE.finditer(str(w.message))]
+        dropped = pd.DataFrame({"fila": [int(m[1]) for m in bad], "columna": "",
+                                "valor": [f"{m[2]} campos" for m in bad], "default": "fila omitida"},
+                               columns=REJECTED_COLS)
+        if chunk is None:
+            if len(dropped):
+                yield pd.DataFrame(columns=range(len(header) + _CHUNK_SLACK), dtype=object), dropped
+            return
+        yield chunk, dropped
+
+def _clean(df: pd.DataFrame, header: list) -> pd.DataFrame:
+    """Cabeceras, strip y descarte de filas vacías; el índice queda como número de fila de datos (1-based)."""
+    df = df.iloc[:, :len(header)]
+    df.columns = header
+    df = df.loc[:, ~df.columns.duplicated()]
+    df = df.apply(lambda s: s.str.strip())
+    df.index = pd.RangeIndex(df.index.start + 1, df.index.stop + 1, name="fila")
+    if len(df.columns):
+        df = df[(df != "").any(axis=1)]
+    return df
+
+def read_csv_frame(file_like) -> pd.DataFrame:
+    """CSV -> DataFrame de strings (sin NaN) con cabeceras normalizadas.
+    Detecta encoding y separador; filas cortas se completan con "" y las largas se truncan
+    al ancho de la cabecera. Las filas totalmente vacías se descartan.
+    """
+    text = _to_text(file_like)
+    dialect, header = _read_header(text)
+    if header is None:
+        return pd.DataFrame()
+    return _clean(_csv_reader(text, dialect, header), header)
+
+def _coerce(s: pd.Series, kind: str, default, rejected: list, col: str, percent: bool = True) -> np.ndarray:
+    """Columna de texto -> float64/int64 en bloque (coma decimal y % tolerados).
+    Celdas vacías toman `default`; las que no se pueden leer también, pero quedan en `rejected`.
+    """
+    txt = s.str.replace(",", ".", regex=False)
+    if percent:
+        txt = txt.str.replace("%", "", regex=False)
+    num = pd.to_numeric(txt.str.strip(), errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    bad = np.isnan(num) & (s.to_numpy() != "")
+    if bad.any():
+        rejected.append(pd.DataFrame({"fila": s.index[bad], "columna": col,
+                                      "valor": s.to_numpy()[bad], "default": default}))
+    num = np.where(np.isnan(num), default, num)
+    return np.trunc(num).astype(np.int64) if kind == "int" else num
+
+def _bool(s: pd.Series) -> np.ndarray:
+    return s.str.upper().isin(TRUE_VALUES).to_numpy()
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name] if name in df.columns else pd.Series("", index=df.index, dtype=object)
+
+def row_types(df: pd.DataFrame) -> pd.Series:
+    """Tipo normalizado por fila: "bond", "market", "idios" o "" (desconocido).
+    Sin columna `type`, una fila con bond_id y nombre es un bono."""
+    t = _col(df, "type").str.lower().replace({k: v.lower() for k, v in EVENT_TYPES.items()})
+    implicit = (t == "") & (_col(df, "bond_id") != "") & (_col(df, "nombre") != "")
+    return t.mask(implicit, "bond")
+
+def bonds_frame(df: pd.DataFrame, rejected: list, venc_default: float = 1.0, keep_extra: bool = False) -> pd.DataFrame:
+    """Bonos tipados a partir de las filas (ya filtradas) de read_csv_frame."""
+    out = {"bond_id": _col(df, "bond_id").to_numpy(dtype=object),
+           "nombre": _col(df, "nombre").to_numpy(dtype=object)}
+    for c, (kind, d) in BOND_NUMERIC.items():
+        out[c] = _coerce(_col(df, c), kind, venc_default if c == "vencimiento_anios" else d, rejected, c)
+    out["callable"] = _bool(_col(df, "callable"))
+    pc = _col(df, "precio_call")
+    out["precio_call"] = np.where(pc.to_numpy() == "", np.nan, _coerce(pc, "float", np.nan, rejected, "precio_call"))
+    out["descripcion"] = _col(df, "descripcion").to_numpy(dtype=object)
+    bonds = pd.DataFrame(out, index=df.index)
+    if keep_extra:
+        extra = [c for c in df.columns if c not in bonds.columns]
+        bonds = pd.concat([bonds, df[extra]], axis=1)
+    return bonds.reset_index(drop=True)
+
+def events_frame(df: pd.DataFrame, types: pd.Series, rejected: list) -> pd.DataFrame:
+    out = {"round": _coerce(_col(df, "round"), "int", 1, rejected, "round"),
+           "tipo": np.where(types.to_numpy() == "market", "MARKET", "IDIOS").astype(object)}
+    bid = _col(df, "bond_id").to_numpy(dtype=object)
+    out["bond_id"] = np.where(bid == "", None, bid)
+    for c in ("delta_tasa_bps", "impacto_bps"):
+        out[c] = _coerce(_col(df, c), "float", 0.0, rejected, c)
+    out["descripcion"] = _col(df, "descripcion").to_numpy(dtype=object)
+    out["publicado"] = np.zeros(len(df), dtype=bool)
+    return pd.DataFrame(out).reset_index(drop=True)
+
+def _rejected_frame(rejected: list) -> pd.DataFrame:
+    rejected = [r for r in rejected if len(r)]
+    if not rejected:
+        return pd.DataFrame(columns=REJECTED_COLS)
+    return pd.concat(rejected, ignore_index=True).sort_values(["fila", "columna"], kind="stable").reset_index(drop=True)
+
+def split_scenario(df: pd.DataFrame, venc_default: float = 1.0, bonds_only: bool = False) -> dict:
+    """Filas de read_csv_frame -> {"bonds", "events", "rejected"} separando tipos con máscaras."""
+    rejected = []
+    types = row_types(df) if len(df.columns) else pd.Series(dtype=object)
+    if bonds_only:
+        is_bond = (types == "bond") | (types == "")
+    else:
+        is_bond = types == "bond"
+    is_event = types.isin(("market", "idios"))
+    bonds = bonds_frame(df[is_bond.to_numpy()], rejected, venc_default, keep_extra=bonds_only)
+    events = events_frame(df[is_event.to_numpy()], types[is_event], rejected)
+    return {"bonds": bonds, "events": events, "rejected": _rejected_frame(rejected)}
+
+def load_scenario(file_like, venc_default: float = 1.0, bonds_only: bool = False) -> dict:
+    """Lector único de escenarios. Devuelve {"bonds", "events", "rejected"} como DataFrames.
+    Las filas se separan con máscaras por tipo; `rejected` lista las celdas no vacías que no se
+    pudieron convertir (fila de datos 1-based, columna, valor original, default aplicado).
+    `bonds_only` trata como bono toda fila sin tipo (CSV de solo bonos, sin columna `type`).
+    """
+    return split_scenario(read_csv_frame(file_like), venc_default, bonds_only)
+
+# ==============================
+# Ingesta por streaming (archivos muy grandes)
+# ==============================
+class _Prefixed(io.RawIOBase):
+    """Stream binario que entrega primero `head` (ya leído para detectar encoding) y luego el resto."""
+    def __init__(self, head: bytes, rest):
+        self._head = head
+        self._rest = rest
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._head:
+            n = min(len(b), len(self._head))
+            b[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        data = self._rest.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    @staticmethod
+    def text(head: str, rest):
+        """Equivalente para streams de texto: muestra ya leída + resto."""
+        return io.TextIOWrapper(io.BufferedReader(_Prefixed(head.encode("utf-8"), _Encoder(rest))),
+                                encoding="utf-8", newline="")
+
+class _Encoder:
+    """Adapta un stream de texto a read(n) -> bytes utf-8."""
+    def __init__(self, text):
+        self._text = text
+
+    def read(self, n: int) -> bytes:
+        return self._text.read(max(1, n // 4)).encode("utf-8")
+
+def _open_stream(file_like, sample_bytes: int = 1 << 16):
+    """Upload / archivo / bytes / texto / Path -> (stream de texto decodificado de a bloques, muestra).
+    El encoding se decide sobre los primeros `sample_bytes` (BOM, utf-8 o latin-1)."""
+    if isinstance(file_like, str):
+        return io.StringIO(file_like), file_like[:4096]
+    if isinstance(file_like, os.PathLike):
+        file_like = open(file_like, "rb")
+    if isinstance(file_like, bytes):
+        file_like = io.BytesIO(file_like)
+    if hasattr(file_like, "seekable") and file_like.seekable():
+        file_like.seek(0)
+    head = file_like.read(sample_bytes)
+    if isinstance(head, str):
+        return _Prefixed.text(head, file_like), head[:4096]
+    if head.startswith(codecs.BOM_UTF8):
+        enc = "utf-8-sig"
+    else:
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+            enc = "utf-8"
+        except UnicodeDecodeError:
+            enc = "latin-1"
+    sample = codecs.getincrementaldecoder(enc)(errors="replace").decode(head, final=False)
+    raw = io.BufferedReader(_Prefixed(head, file_like), buffer_size=sample_bytes)
+    return io.TextIOWrapper(raw, encoding=enc, errors="replace", newline=""), sample[:4096]
+
+def iter_scenario(file_like, chunksize: int = 200_000, venc_default: float = 1.0):
+    """Generador de lotes {"bonds", "events", "rejected"} leyendo el CSV de a `chunksize` filas.
+    Decodifica de a bloques: la memoria queda acotada por el lote, no por el tamaño del archivo."""
+    text, sample = _open_stream(file_like)
+    dialect = _sniff(sample)
+    header = next(csv.reader(io.StringIO(text.readline()), dialect), None)
+    if not header:
+        return
     header = [_norm(h) for h in header]
+    for chunk, dropped in _csv_chunks(text, dialect, header, chunksize):
+        batch = split_scenario(_clean(chunk, header), venc_default)
+        if len(dropped):
+            batch["rejected"] = _rejected_frame([batch["rejected"], dropped])
+        yield batch
+
+def ingest_scenario_stream(file_like, n_rounds: int = 0, liquidity_widen_bp: float = 0.0,
+                           chunksize: int = 200_000, max_rejected: int = 1000) -> dict:
+    """Ingesta por lotes que alimenta directo el schedule (sin guardar la lista de eventos).
+    Devuelve {"bonds", "schedule", "n_events", "n_skipped", "n_rejected", "rejected"}; `rejected`
+    se recorta a las primeras `max_rejected` celdas y `n_skipped` cuenta los eventos con ronda
+    fuera de 1..n_rounds."""
+    acc = ScheduleAccumulator(n_rounds=n_rounds)
+    bonds, rejected = [], []
+    n_rej = 0
+    for batch in iter_scenario(file_like, chunksize=chunksize):
+        if len(batch["bonds"]):
+            bonds.append(batch["bonds"])
+        acc.add(batch["events"])
+        rej = batch["rejected"]
+        n_rej += len(rej)
+        kept = sum(len(r) for r in rejected)
+        if len(rej) and kept < max_rejected:
+            rejected.append(rej.iloc[:max_rejected - kept])
+    bonds = pd.concat(bonds, ignore_index=True) if bonds else bonds_frame(pd.DataFrame(), [])
+    return {
+        "bonds": bonds,
+        "schedule": acc.compile(bonds["bond_id"].tolist(), n_rounds=n_rounds, liquidity_widen_bp=liquidity_widen_bp),
+        "n_events": acc.n_events,
+        "n_skipped": acc.n_skipped,
+        "n_rejected": n_rej,
+        "rejected": _rejected_frame(rejected),
+    }
 
-    def row_to_dict(row):
-        if len(row) < len(header):
-            row += [""] * (len(header) - len(row))
-        elif len(row) > len(header):
-            row = row[:len(header)]
-        return {header[i]: (row[i].strip() if isinstance(row[i], str) else row[i]) for i in range(len(header))}
-
-    bonds, events = [], []
-    for raw in reader:
-        if not any(str(x).strip() for x in raw):
-            continue
-        row = row_to_dict(raw)
-        t = _norm(row.get("type",""))
-        if not t and row.get("bond_id") and row.get("nombre"):
-            t = "bond"
-
-        def _f(x, d=0.0):
-            try: return float(str(x).replace(",", ".").strip())
-            except Exception: return float(d)
-        def _i(x, d=0):
-            try: return int(float(str(x).replace(",", ".").strip()))
-            except Exception: return int(d)
-
-        if t == "bond":
-            callable_raw = str(row.get("callable","")).strip().upper()
-            bonds.append({
-                "bond_id": row.get("bond_id","").strip(),
-                "nombre": row.get("nombre","").strip(),
-                "valor_nominal": _f(row.get("valor_nominal",1000),1000),
-                "tasa_cupon_anual": _f(row.get("tasa_cupon_anual",0),0),
-                "frecuencia_anual": _i(row.get("frecuencia_anual",2),2),
-                "vencimiento_anios": _f(row.get("vencimiento_anios",1),1),
-                "spread_bps": _f(row.get("spread_bps",0),0),
-                "callable": callable_raw in ("TRUE","1","SI","YES","Y","T"),
-                "precio_call": (_f(row.get("precio_call",0),0) if row.get("precio_call") not in (None,"") else None),
-                "descripcion": row.get("descripcion",""),
-            })
-        elif t in ("market","idios","idiosincratico","idiosincrático"):
-            tipo = "MARKET" if t == "market" else "IDIOS"
-            events.append({
-                "round": _i(row.get("round",1),1),
-                "tipo": tipo,
-                "bond_id": (row.get("bond_id") or "").strip() or None,
-                "delta_tasa_bps": _f(row.get("delta_tasa_bps",0),0),
-                "impacto_bps": _f(row.get("impacto_bps",0),0),
-                "descripcion": row.get("descripcion",""),
-                "publicado": False,
-            })
-    return bonds, events
+def _records(df: pd.DataFrame) -> list[dict]:
+    recs = df.astype(object).where(df.notna(), None).to_dict("records")
+    return recs
+
+def bond_records(df: pd.DataFrame) -> list[dict]:
+    bonds = _records(df)
+    for b in bonds:
+        b["callable"] = bool(b["callable"])
+        b["frecuencia_anual"] = int(b["frecuencia_anual"])
+    return bonds
+
+def event_records(df: pd.DataFrame) -> list[dict]:
+    events = _records(df)
+    for e in events:
+        e["round"] = int(e["round"])
+        e["publicado"] = False
+    return events
+
+def scenario_records(sc: dict):
+    """Resultado de load_scenario -> (bonos, eventos) como listas de dicts."""
+    return bond_records(sc["bonds"]), event_records(sc["events"])
+
+def parse_scenario_csv(file_like):
+    """Compatibilidad: (bonos, eventos) como listas de dicts."""
+    return scenario_records(load_scenario(file_like))
@@ -0,0 +1,47 @@
+import pytest
+
+# ==============================
+# Fake en memoria de gspread (Spreadsheet / Worksheet) para la cola write-behind
+# ==============================
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+class FakeAPIError(Exception):
+    """Como gspread.exceptions.APIError: el código HTTP viaja en `response.status_code`."""
+    def __init__(self, status_code: int = 429):
+        super().__init__(f"APIError [{status_code}]")
+        self.response = FakeResponse(status_code)
+
+class FakeWorksheet:
+    def __init__(self, title: str):
+        self.title = title
+        self.rows = []
+        self.calls = []       # tamaño de cada append_rows
+        self.fail = []        # códigos HTTP a devolver en las próximas llamadas
+
+    def append_row(self, row):
+        self.rows.append(list(row))
+
+    def append_rows(self, rows):
+        self.calls.append(len(rows))
+        if self.fail:
+            raise FakeAPIError(self.fail.pop(0))
+        self.rows.extend(list(r) for r in rows)
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.sheets = {}
+
+    def worksheet(self, name: str) -> FakeWorksheet:
+        if name not in self.sheets:
+            raise KeyError(name)    # gspread levanta WorksheetNotFound
+        return self.sheets[name]
+
+    def add_worksheet(self, title: str, rows: int, cols: int) -> FakeWorksheet:
+        ws = self.sheets[title] = FakeWorksheet(title)
+        return ws
+
+@pytest.fixture
+def fake_sheet():
+    return FakeSpreadsheet()
@@ -0,0 +1,21 @@
+from domain.bulk import execute_batch
+from domain.ledger import TeamLedger
+from domain.risk import RiskGuard
+
+PRICES = {"X": {"bid": 99.0, "ask": 100.0}}
+
+def test_execute_batch_accept_reject_table():
+    led = TeamLedger(cash_inicial=1_000.0)
+    data = [
+        {"team": "A", "bond_id": "X", "side": "buy", "qty": "4"},
+        {"team": "A", "bond_id": "X", "side": "BUY", "qty": 7},      # ve la compra anterior del lote
+        {"team": "A", "bond_id": "X", "side": "SELL", "qty": 3},
+        {"team": "A", "bond_id": "Y", "side": "BUY", "qty": 1},
+        {"team": "Z", "bond_id": "X", "side": "BUY", "qty": 1},
+        {"team": "A", "bond_id": "X", "side": "HOLD", "qty": "0"},
+    ]
+    accepted, res = execute_batch(data, PRICES, led, RiskGuard(), {"A"}, fee_bps=0.0, ronda=1, ts=0)
+    assert res["status"].tolist() == ["ok", "rechazada", "ok", "rechazada", "rechazada", "rechazada"]
+    assert res["motivo"].tolist() == ["", "cash", "", "price", "team", "side; qty"]
+    assert [(od["side"], od["qty"], od["price_exec"]) for od in accepted] == [("BUY", 4.0, 100.0), ("SELL", 3.0, 99.0)]
+    assert led.n_orders == 0                 # el ledger del snapshot no se toca
@@ -0,0 +1,67 @@
+from engine.game import GameEngine
+from services.game_store import GameStore
+
+PRICES = {"X": {"bid": 99.0, "ask": 100.0, "mid": 99.5}}
+
+def _engine(mm_depth=None, **risk):
+    store = GameStore()
+    store.commit("G", prices=PRICES, round=1, trading_on=True, teams=frozenset({"A", "B"}))
+    return GameEngine(store, "G", mm_depth=mm_depth, risk=risk)
+
+def test_market_order_capped_at_risk_checked_price():
+    # detrás del MM hay una venta a 105: la compra de mercado no debe pasar del ask con que se aprobó
+    eng = _engine(mm_depth=10, allow_short=True)
+    eng.submit_order("B", "X", "SELL", 50, 105.0)
+    res = eng.submit_order("A", "X", "BUY", 30)
+    assert res["filled_qty"] == 10 and res["resting_qty"] == 0
+    assert {f["price"] for f in res["fills"]} == {100.0}
+    assert eng.open_orders("A") == []
+    led = eng.snapshot()["ledger"]
+    assert led.position("A", "X") == 10
+    assert led.team_cash("A") >= led.cash_inicial - 30 * 100.0 * (1 + 5 / 10_000)
+
+def test_market_sell_capped_at_bid():
+    eng = _engine(mm_depth=5, allow_short=True)
+    eng.submit_order("B", "X", "BUY", 20, 90.0)
+    res = eng.submit_order("A", "X", "SELL", 20)
+    assert res["filled_qty"] == 5 and {f["price"] for f in res["fills"]} == {99.0}
+
+def test_rejected_when_cash_insufficient():
+    eng = _engine()
+    res = eng.submit_order("A", "X", "BUY", 10_000)
+    assert res["status"] == "rejected" and [r["code"] for r in res["reasons"]] == ["cash"]
+    assert len(eng.snapshot()["orders"]) == 0
+
+def test_view_recomputes_only_when_its_keys_change():
+    eng = GameEngine(GameStore(), "G")
+    calls = []
+    def fn():
+        calls.append(1)
+        return len(calls)
+    old = eng.snapshot()
+    assert eng.view("v", old, ("prices",), fn) == 1
+    eng.register_team("A")                                   # otra clave: no invalida
+    assert eng.view("v", eng.snapshot(), ("prices",), fn) == 1
+    eng.commit(prices={"X": {"mid": 1.0}})
+    new = eng.snapshot()
+    assert eng.view("v", new, ("prices",), fn) == 2
+    assert eng.view("v", old, ("prices",), fn) == 3          # un snapshot viejo no pisa la vista nueva
+    assert eng.view("v", new, ("prices",), fn) == 2
+
+def test_views_are_bounded_lru():
+    eng = GameEngine(GameStore(), "G", max_views=2)
+    snap = eng.snapshot()
+    for name in ("a", "b", "a", "c"):
+        eng.view(name, snap, ("prices",), lambda: name)
+    assert list(eng._views) == ["a", "c"]
+
+def test_close_releases_book_risk_and_views():
+    eng = _engine()
+    res = eng.submit_order("A", "X", "BUY", 5, 95.0)
+    assert res["status"] == "resting" and eng.risk.reserved("A") > 0
+    eng.view("v", eng.snapshot(), ("prices",), lambda: 1)
+    eng.close()
+    assert eng.book.open == {} and eng.book.books == {} and eng.risk.reserved("A") == 0.0 and eng._views == {}
+    eng.close()                                              # idempotente
+    assert eng.submit_order("A", "X", "BUY", 1)["status"] == "filled"    # se vuelve a cotizar solo
+    assert eng.snapshot()["ledger"].position("A", "X") == 1
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from domain.events import MAX_ROUNDS, ScheduleAccumulator, compile_schedule
+
+EVENTS = [
+    {"round": 1, "tipo": "MARKET", "delta_tasa_bps": 10, "descripcion": "a"},
+    {"round": 2, "tipo": "IDIOS", "bond_id": "B2", "impacto_bps": 5},
+    {"round": 10**9, "tipo": "MARKET", "delta_tasa_bps": 99},
+    {"round": 0, "tipo": "MARKET", "delta_tasa_bps": 99},
+]
+
+def test_compile_schedule_clips_to_n_rounds():
+    sc = compile_schedule(["B1", "B2"], EVENTS, n_rounds=3)
+    assert sc["shift_bps"].shape == (3, 2) and sc["skipped"] == 2
+    assert sc["shift_bps"].tolist() == [[10, 10], [0, 5], [0, 0]]
+    assert sc["descripcion"] == ["a", "", ""]
+
+def test_compile_schedule_without_n_rounds_is_bounded():
+    sc = compile_schedule(["B1", "B2"], EVENTS + [{"round": MAX_ROUNDS + 1, "tipo": "MARKET"}])
+    assert sc["shift_bps"].shape == (2, 2) and sc["skipped"] == 3
+
+def test_accumulator_matches_compile_schedule():
+    df = pd.DataFrame([{"bond_id": None, "impacto_bps": 0.0, "delta_tasa_bps": 0.0, "descripcion": "", **e}
+                       for e in EVENTS])
+    acc = ScheduleAccumulator(n_rounds=3)
+    acc.add(df)
+    sc = acc.compile(["B1", "B2"], n_rounds=3)
+    assert acc.n_events == 2 and acc.n_skipped == 2 and len(acc.market) <= 3
+    np.testing.assert_array_equal(sc["shift_bps"], compile_schedule(["B1", "B2"], EVENTS, n_rounds=3)["shift_bps"])
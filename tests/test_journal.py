@@ -0,0 +1,46 @@
+import os
+import pytest
+from services.game_store import GameStore
+from services.journal import Journal
+
+def _od(team, qty, bond="X"):
+    return dict(ts=0, team=team, bond_id=bond, side="BUY", qty=qty, price_exec=100.0, fees=1.0, ronda=1)
+
+def _fill(store):
+    for i in range(11):
+        if i % 3 == 0:
+            store.commit("G", round=i + 1)
+        else:
+            store.append_orders("G", [_od("A", i), _od("B", 1)])
+
+@pytest.mark.parametrize("every", [1, 4, 1000])
+def test_restore_matches_live_version(tmp_path, every):
+    store = GameStore(journal=Journal(str(tmp_path), snapshot_every=every))
+    _fill(store)
+    live = store.snapshot("G")
+    store._journal.close()
+    back = GameStore(journal=Journal(str(tmp_path), snapshot_every=every)).snapshot("G")
+    assert back["version"] == live["version"] and back["versions"] == live["versions"]
+    assert back["round"] == live["round"] and len(back["orders"]) == len(live["orders"])
+    assert back["ledger"].as_dicts() == live["ledger"].as_dicts()
+
+def test_failed_batch_is_not_replayed(tmp_path):
+    store = GameStore(journal=Journal(str(tmp_path)))
+    store.append_orders("G", [_od("A", 1)])
+    with pytest.raises(KeyError):
+        store.append_orders("G", [_od("A", 2), {"team": "A"}])
+    assert store.version("G") == 1 and len(store.snapshot("G")["orders"]) == 1
+    store._journal.close()
+    back = GameStore(journal=Journal(str(tmp_path))).snapshot("G")
+    assert back["version"] == 1 and len(back["orders"]) == 1
+
+def test_torn_tail_record_is_dropped(tmp_path):
+    store = GameStore(journal=Journal(str(tmp_path)))
+    store.append_orders("G", [_od("A", 1)])
+    store.append_orders("G", [_od("A", 2)])
+    store._journal.close()
+    path = os.path.join(str(tmp_path), "G.0.journal")
+    with open(path, "r+b") as fh:
+        fh.truncate(os.path.getsize(path) - 3)
+    back = GameStore(journal=Journal(str(tmp_path))).snapshot("G")
+    assert back["version"] == 1 and [od["qty"] for od in back["orders"]] == [1.0]
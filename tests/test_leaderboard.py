@@ -0,0 +1,15 @@
+import numpy as np
+from domain.leaderboard import compute_portfolio_value, top_k
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(0)
+    teams = [f"T{i}" for i in range(200)]
+    vals = rng.integers(0, 50, size=200).astype(float)      # con empates
+    full = sorted(zip(teams, vals.tolist()), key=lambda tv: tv[1], reverse=True)
+    for k in (1, 10, 200, 500):
+        assert top_k(teams, vals, k) == full[:k]
+
+def test_portfolio_value_includes_teams_without_positions():
+    pos = {("A", "X"): 2.0, ("B", "Y"): 1.0}
+    out = compute_portfolio_value(pos, {"X": 10.0, "Y": 100.0}, {"A": 0.0, "B": 0.0, "C": 50.0}, k=2)
+    assert out == [{"team_id": "B", "valor_portafolio": 100.0}, {"team_id": "C", "valor_portafolio": 50.0}]
@@ -0,0 +1,41 @@
+import random
+from domain.ledger import TeamLedger
+
+def _orders(n, seed=0):
+    rng = random.Random(seed)
+    return [dict(ts=i, team=f"T{rng.randrange(12)}", bond_id=f"B{rng.randrange(20)}",
+                 side=rng.choice(["BUY", "SELL"]), qty=rng.randint(1, 50),
+                 price_exec=round(rng.uniform(90, 110), 2), fees=round(rng.uniform(0, 2), 2), ronda=1)
+            for i in range(n)]
+
+def test_incremental_matches_rebuild():
+    orders = _orders(2000)
+    led = TeamLedger()
+    for od in orders:                      # 12 equipos y 20 bonos: la matriz crece varias veces
+        led.apply(od)
+    assert led.n_orders == 2000 and led.verify(orders) == []
+    assert led.as_dicts() == TeamLedger.rebuild(orders).as_dicts()
+
+def test_verify_reports_differences():
+    orders = _orders(50)
+    led = TeamLedger.rebuild(orders[:-1])
+    diffs = led.verify(orders)
+    last = orders[-1]
+    assert diffs[0] == "n_orders: 49 != 50"
+    assert any(d.startswith(f"cash[{last['team']}]") for d in diffs)
+
+def test_fork_copies_only_touched_rows():
+    orders = _orders(500)
+    base = TeamLedger.rebuild(orders)
+    led = base.fork()
+    od = dict(orders[0], qty=1000)
+    led.apply(od)
+    led.apply(dict(od, team="NUEVO", bond_id="B_NUEVO"))
+    i = base.team_index[od["team"]]
+    assert base.as_dicts() == TeamLedger.rebuild(orders).as_dicts()       # el original no cambia
+    assert led.verify(orders + [od, dict(od, team="NUEVO", bond_id="B_NUEVO")]) == []
+    assert base.teams == TeamLedger.rebuild(orders).teams and "NUEVO" not in base.team_index
+    assert [k for k in range(len(base.teams)) if led._rows[k] is not base._rows[k]] == [i]
+    base.apply(od)                                      # tras el fork el original tampoco pisa filas compartidas
+    assert led.team_positions(od["team"]) == base.team_positions(od["team"])
+    assert led.team_cash("NUEVO") < led.cash_inicial and base.team_cash("NUEVO") == base.cash_inicial
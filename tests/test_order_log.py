@@ -0,0 +1,43 @@
+import pickle
+from services.order_log import OrderLog
+
+def _orders(n):
+    return [dict(ts=1_700_000_000_000_000 + i, team="AB"[i % 2], bond_id=f"B{i % 3}",
+                 side="BUY" if i % 4 else "SELL", qty=float(i + 1), price_exec=100.0 + i, fees=0.5, ronda=1 + i % 2)
+            for i in range(n)]
+
+def _log(orders):
+    log = OrderLog(capacity=4)             # fuerza el crecimiento por duplicación
+    log.extend(orders)
+    return log
+
+def test_to_frame_matches_rows():
+    orders = _orders(10)
+    log = _log(orders)
+    assert list(log) == orders
+    df = log.to_frame()
+    assert len(df) == 10 and df["team"].tolist() == [od["team"] for od in orders]
+    assert df["side"].tolist() == [od["side"] for od in orders] and df["qty"].tolist() == [od["qty"] for od in orders]
+    assert df["ts"].iloc[3].value // 1000 == orders[3]["ts"]
+    part = log.to_frame(4, 7)
+    assert part["price_exec"].tolist() == [104.0, 105.0, 106.0]
+
+def test_pickle_round_trip():
+    orders = _orders(10)
+    back = pickle.loads(pickle.dumps(_log(orders)))
+    assert list(back) == orders
+    back.append(_orders(11)[-1])
+    assert len(back) == 11 and back.row(10)["bond_id"] == "B1"
+
+
+def test_select_filters_and_pages():
+    orders = _orders(40)
+    log = _log(orders)
+    rows = log.select(team="A", ronda=1)
+    assert rows.tolist() == [i for i, od in enumerate(orders) if od["team"] == "A" and od["ronda"] == 1]
+    page = log.to_frame(rows=rows[5:10])
+    assert page.index.tolist() == rows[5:10].tolist() and set(page["team"]) == {"A"}
+    assert page["qty"].tolist() == [orders[i]["qty"] for i in rows[5:10]]
+    assert log.select(team="A", bond_id="B1").tolist() == [i for i, od in enumerate(orders)
+                                                           if od["team"] == "A" and od["bond_id"] == "B1"]
+    assert len(log.select(team="nadie")) == 0 and len(log.to_frame(rows=rows[100:])) == 0
@@ -0,0 +1,54 @@
+from domain.orderbook import MatchingEngine, MM_TEAM
+
+PRICES = {"X": {"bid": 99.0, "ask": 100.0, "mid": 99.5}}
+
+def test_price_time_priority_and_partial_rest():
+    eng = MatchingEngine()
+    a = eng.submit("A", "X", "SELL", 5, 101.0)
+    b = eng.submit("B", "X", "SELL", 5, 101.0)
+    res = eng.submit("C", "X", "BUY", 8, 101.0)
+    assert [(f["seller"], f["qty"]) for f in res["fills"]] == [("A", 5), ("B", 3)]
+    assert res["status"] == "filled"
+    assert a["oid"] not in eng.open and eng.open[b["oid"]][4] == 2
+
+def test_self_trade_cancels_own_resting_order():
+    eng = MatchingEngine()
+    own = eng.submit("A", "X", "SELL", 5, 101.0)
+    eng.submit("B", "X", "SELL", 5, 102.0)
+    res = eng.submit("A", "X", "BUY", 5, 102.0)
+    assert res["cancelled"] == [own["oid"]]
+    assert [(f["seller"], f["price"]) for f in res["fills"]] == [("B", 102.0)]
+    assert eng.open_orders("A") == [] and eng.open == {}
+
+def test_lazy_cancel_skips_cancelled_orders():
+    eng = MatchingEngine()
+    a = eng.submit("A", "X", "BUY", 5, 99.0)
+    eng.submit("B", "X", "BUY", 5, 99.0)
+    assert not eng.cancel(a["oid"], team="B")      # solo el dueño cancela
+    assert eng.cancel(a["oid"], team="A")
+    assert not eng.cancel(a["oid"])
+    assert eng.depth("X")["bids"] == [(99.0, 5)]
+    res = eng.submit("C", "X", "SELL", 5, 99.0)
+    assert [f["buyer"] for f in res["fills"]] == ["B"]
+    assert eng.depth("X")["bids"] == [] and eng.books["X"].best(0) is None
+
+def test_market_maker_depth_and_market_order_ioc():
+    eng = MatchingEngine(mm_depth=10)
+    eng.set_quotes(PRICES)
+    res = eng.submit("A", "X", "BUY", 15)
+    assert res["status"] == "partial" and res["filled_qty"] == 10 and res["resting_qty"] == 0
+    assert res["fills"][0]["seller"] == MM_TEAM and eng.open == {}
+
+def test_ioc_limit_does_not_rest():
+    eng = MatchingEngine()
+    res = eng.submit("A", "X", "BUY", 5, 100.0, ioc=True)
+    assert res["status"] == "unfilled" and res["resting_qty"] == 0 and eng.open == {}
+
+def test_capped_ioc_does_not_walk_past_the_quote():
+    # orden de mercado con tope en el ask publicado: no barre la venta a 105 detrás del MM
+    eng = MatchingEngine(mm_depth=10)
+    eng.set_quotes(PRICES)
+    eng.submit("B", "X", "SELL", 50, 105.0)
+    res = eng.submit("A", "X", "BUY", 30, 100.0, ioc=True)
+    assert res["filled_qty"] == 10 and {f["price"] for f in res["fills"]} == {100.0}
+    assert res["resting_qty"] == 0 and eng.open_orders("A") == []
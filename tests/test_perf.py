@@ -0,0 +1,23 @@
+from services.perf import HIST_EDGES_MS, PerfRecorder
+
+def test_summary_percentiles_rates_and_window():
+    rec = PerfRecorder(window_s=60.0)
+    for i, ms in enumerate([1.0] * 90 + [100.0] * 10):
+        rec.record("G", "sync", ms, now=1000.0 + i * 0.1)
+    rec.record("G", "sync", 5000.0, now=900.0)               # fuera de la ventana
+    rec.count("G", "orders", 5, now=1000.0)
+    rec.count("G", "orders", 5, now=1010.0)
+    s = rec.summary("G", now=1020.0)
+    sp = s["spans"]["sync"]
+    assert sp["count"] == 100 and sp["p50_ms"] == 1.0 and sp["p95_ms"] == 100.0 and sp["max_ms"] == 100.0
+    assert len(sp["hist"]) == len(HIST_EDGES_MS) + 1 and sp["hist"][3] == 90 and sp["hist"][9] == 10
+    assert s["rates"]["orders"] == 10 / 20 and s["totals"]["orders"] == 10
+    assert rec.summary("H", now=1020.0)["spans"] == {}
+
+def test_samples_bounded_and_reset():
+    rec = PerfRecorder(max_samples=10)
+    for i in range(50):
+        rec.record("G", "sync", float(i))
+    assert rec.summary("G")["spans"]["sync"]["count"] == 10
+    rec.reset("G")
+    assert rec.games() == []
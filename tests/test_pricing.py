@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from domain.pricing import bond_arrays, price_bond_mid, price_bonds_vec
+
+BONDS = [
+    {"valor_nominal": 1000, "tasa_cupon_anual": 0.05, "frecuencia_anual": 2, "vencimiento_anios": 5},
+    {"valor_nominal": 1000, "tasa_cupon_anual": 0.08, "frecuencia_anual": 4, "vencimiento_anios": 2.3},
+    {"valor_nominal": 500, "tasa_cupon_anual": 0.0, "frecuencia_anual": 1, "vencimiento_anios": 10},
+    {"valor_nominal": 1000, "tasa_cupon_anual": 0.06, "frecuencia_anual": 12, "vencimiento_anios": 0.01},
+    {"valor_nominal": 1000, "tasa_cupon_anual": 0.06, "frecuencia_anual": 2, "vencimiento_anios": 0},
+    {"valor_nominal": 1000, "tasa_cupon_anual": 0.06, "frecuencia_anual": 0, "vencimiento_anios": 3},
+]
+
+def _scalar(ytm):
+    return [price_bond_mid(b["valor_nominal"], b["tasa_cupon_anual"], b["frecuencia_anual"],
+                           b["vencimiento_anios"], ytm) for b in BONDS]
+
+@pytest.mark.parametrize("ytm", [0.0, 0.045, 0.2])
+def test_price_bonds_vec_matches_scalar(ytm):
+    arr = bond_arrays(BONDS)
+    mid, bid, ask = price_bonds_vec(arr["valor_nominal"], arr["tasa_cupon_anual"], arr["frecuencia_anual"],
+                                    arr["vencimiento_anios"], ytm, bid_bp=50, ask_bp=25)
+    np.testing.assert_allclose(mid, _scalar(ytm), rtol=1e-10)
+    np.testing.assert_allclose(bid, mid * (1 - 50 / 10_000))
+    np.testing.assert_allclose(ask, mid * (1 + 25 / 10_000))
+
+def test_price_bonds_vec_broadcasts_over_rounds():
+    arr = bond_arrays(BONDS)
+    ytm = np.array([0.0, 0.045, 0.2])[:, None]            # una fila por escenario de tasa
+    mid, _, _ = price_bonds_vec(arr["valor_nominal"], arr["tasa_cupon_anual"], arr["frecuencia_anual"],
+                                arr["vencimiento_anios"], ytm)
+    assert mid.shape == (3, len(BONDS))
+    np.testing.assert_allclose(mid, [_scalar(y) for y in (0.0, 0.045, 0.2)], rtol=1e-10)
@@ -0,0 +1,38 @@
+from domain.ledger import TeamLedger
+from domain.orderbook import MatchingEngine
+from domain.risk import RiskGuard
+
+def _codes(out):
+    return [r["code"] for r in out]
+
+def test_limits():
+    led = TeamLedger(cash_inicial=1_000.0)
+    risk = RiskGuard(max_order_notional=500.0, max_position=3, max_orders_per_round=1)
+    assert _codes(risk.check(led, "A", "X", "BUY", 2, 100.0, 0.0, 1)) == []
+    assert _codes(risk.check(led, "A", "X", "BUY", 6, 100.0, 0.0, 1)) == ["notional", "position_limit"]
+    assert _codes(risk.check(led, "A", "X", "SELL", 1, 100.0, 0.0, 1)) == ["position"]
+    assert _codes(risk.check(led, "A", "X", "BUY", 1, None, 0.0, 1)) == ["price"]
+    risk.count("A", 1)
+    assert _codes(risk.check(led, "A", "X", "BUY", 1, 100.0, 0.0, 1)) == ["rate"]
+    assert _codes(risk.check(led, "A", "X", "BUY", 1, 100.0, 0.0, 2)) == []
+
+def test_resting_orders_reserve_cash_until_cancelled():
+    led = TeamLedger(cash_inicial=1_000.0)
+    risk, book = RiskGuard(), MatchingEngine()
+    assert risk.check(led, "A", "X", "BUY", 6, 100.0, 0.0, 1) == []
+    res = book.submit("A", "X", "BUY", 6, 100.0)
+    risk.on_result(res, "A", "X", "BUY", 100.0, 0.0)
+    assert risk.reserved("A") == 600.0
+    assert _codes(risk.check(led, "A", "X", "BUY", 5, 100.0, 0.0, 1)) == ["cash"]
+    book.cancel(res["oid"]); risk.release(res["oid"])
+    assert risk.reserved("A") == 0.0
+    assert risk.check(led, "A", "X", "BUY", 5, 100.0, 0.0, 1) == []
+
+def test_fills_release_reservation_of_resting_order():
+    led = TeamLedger(cash_inicial=1_000.0)
+    risk, book = RiskGuard(allow_short=True), MatchingEngine()
+    res = book.submit("A", "X", "BUY", 6, 100.0)
+    risk.on_result(res, "A", "X", "BUY", 100.0, 0.0)
+    hit = book.submit("B", "X", "SELL", 4, 100.0)
+    risk.on_result(hit, "B", "X", "SELL", 100.0, 0.0)
+    assert risk.reserved("A") == 200.0
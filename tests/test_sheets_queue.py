@@ -0,0 +1,45 @@
+from services.sheets_queue import SheetsWriteBehind, ORDERS_HEADER, ORDERS_SHEET, PRICES_SHEET
+
+def _od(i):
+    return dict(ts=1_700_000_000_000_000 + i, team="A", bond_id="B1", side="BUY", qty=1, price_exec=1.0,
+                fees=0.0, ronda=1)
+
+def _queue(sh, **kw):
+    return SheetsWriteBehind(sh, max_latency_s=0.05, sleep=lambda s: None, **kw)
+
+def test_batches_capped_at_max_batch_rows(fake_sheet):
+    q = _queue(fake_sheet, max_batch_rows=100, start=False)
+    q.enqueue_orders("G", [_od(i) for i in range(250)])
+    q.enqueue_prices("G", 1, {"B1": {"mid": 1.0, "bid": 0.9, "ask": 1.1}})
+    q.start()
+    assert q.flush(5)
+    q.close()
+    ws = fake_sheet.sheets[ORDERS_SHEET]
+    assert ws.rows[0] == ORDERS_HEADER
+    assert ws.calls == [100, 100, 50]
+    assert [r[1] for r in ws.rows[1:]] == [r[1] for r in sorted(ws.rows[1:], key=lambda r: r[1])]
+    assert len(fake_sheet.sheets[PRICES_SHEET].rows) == 1 + 1
+    assert q.stats["rows"] == 251 and q.stats["dropped_rows"] == 0
+
+def test_quota_errors_are_retried_in_order(fake_sheet):
+    q = _queue(fake_sheet)
+    q.enqueue_orders("G", [_od(0)])
+    assert q.flush(5)
+    fake_sheet.sheets[ORDERS_SHEET].fail = [429, 503]
+    q.enqueue_orders("G", [_od(1), _od(2)])
+    assert q.flush(5)
+    q.close()
+    ws = fake_sheet.sheets[ORDERS_SHEET]
+    assert len(ws.rows) == 1 + 3 and q.stats["retries"] == 2 and not q.errors
+
+def test_errors_are_bounded(fake_sheet):
+    q = _queue(fake_sheet, max_errors=3)
+    q.enqueue_orders("G", [_od(0)])
+    assert q.flush(5)
+    ws = fake_sheet.sheets[ORDERS_SHEET]
+    for i in range(5):
+        ws.fail = [400]                  # no reintentable: el tramo se descarta
+        q.enqueue_orders("G", [_od(i)])
+        assert q.flush(5)
+    q.close()
+    assert len(q.errors) == 3 and q.stats["dropped_rows"] == 5
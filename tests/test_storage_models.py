@@ -0,0 +1,53 @@
+import os
+import pytest
+import config
+from engine.scenario import SAMPLE_BONDS_CSV, load_bonds_csv
+from services.scenario_cache import ScenarioCache
+from services.storage_models import REJECTED_COLS, ingest_scenario_stream, load_scenario
+
+BONDS_CSV = ("bond_id,nombre,valor_nominal,tasa_cupon_anual,frecuencia_anual,vencimiento_anios,spread_bps\n"
+             "B1,Bono 1,1000,0.06,2,3,80\n"
+             "B2,Bono 2,mil,0.05,2,,120\n")
+WIDE = ",".join(["x"] * 20)
+CSV = ("type,round,bond_id,nombre,valor_nominal,delta_tasa_bps,impacto_bps,descripcion\n"
+       "BOND,,B1,Bono 1,abc,,,d\n"
+       "MARKET,1,,,,10,,e\n"
+       f"{WIDE}\n"
+       "IDIOS,2,B1,,,,5,f\n"
+       f"{WIDE}\n")
+
+def test_load_scenario_reports_rejected_cells():
+    sc = load_scenario(BONDS_CSV, venc_default=3.0, bonds_only=True)
+    bonds, rej = sc["bonds"], sc["rejected"]
+    assert bonds["bond_id"].tolist() == ["B1", "B2"] and not bonds.attrs
+    assert bonds["valor_nominal"].tolist() == [1000.0, 1000.0] and bonds["vencimiento_anios"].tolist() == [3.0, 3.0]
+    assert list(rej.columns) == REJECTED_COLS
+    assert rej[["fila", "columna", "valor"]].values.tolist() == [[2, "valor_nominal", "mil"]]
+
+def test_scenario_cache_hit_and_entry_evicted_during_hit(tmp_path, monkeypatch):
+    cache = ScenarioCache(str(tmp_path))
+    cache.load(BONDS_CSV, bonds_only=True)
+    sc = cache.load(BONDS_CSV, bonds_only=True)
+    assert sc["rejected"]["valor"].tolist() == ["mil"] and cache.stats["hits"] == 1
+
+    def evicted(path, *a, **kw):
+        raise FileNotFoundError(path)
+    monkeypatch.setattr(os, "utime", evicted)
+    sc = cache.load(BONDS_CSV, bonds_only=True)
+    assert len(sc["bonds"]) == 2 and cache.stats == {"hits": 1, "misses": 2, "evictions": 0}
+
+@pytest.mark.parametrize("chunksize", [4, 100])
+def test_stream_reports_dropped_rows(chunksize):
+    sc = ingest_scenario_stream(CSV.encode(), n_rounds=3, chunksize=chunksize)
+    rej = sc["rejected"]
+    assert list(rej.columns) == REJECTED_COLS and sc["n_events"] == 2
+    assert rej[rej["columna"] == "valor_nominal"]["valor"].tolist() == ["abc"]
+    dropped = rej[rej["default"] == "fila omitida"]
+    assert dropped["fila"].tolist() == [3, 5] and dropped["valor"].tolist() == ["20 campos"] * 2
+    assert sc["n_rejected"] == 3
+
+def test_load_bonds_csv_returns_report_apart(monkeypatch):
+    monkeypatch.setitem(config.SCENARIO_CACHE, "dir", "")
+    bonds, rejected = load_bonds_csv(SAMPLE_BONDS_CSV.replace("B2,Bono Corp AAA 5y,1000", "B2,Bono Corp AAA 5y,mil"))
+    assert len(bonds) == 3 and not bonds.attrs
+    assert rejected[["fila", "columna", "valor"]].values.tolist() == [[2, "valor_nominal", "mil"]]
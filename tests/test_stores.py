@@ -0,0 +1,72 @@
+import threading
+import pytest
+from services.game_store import GameStore
+from services.sqlite_store import SqliteGameStore
+
+def _od(team, qty):
+    return dict(ts=0, team=team, bond_id="X", side="BUY", qty=qty, price_exec=100.0, fees=1.0, ronda=1)
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteGameStore(str(tmp_path / "g.db"))
+    return GameStore()
+
+def test_published_snapshot_never_changes(store):
+    store.append_orders("G", [_od("A", 1)])
+    old = store.snapshot("G")
+    store.append_orders("G", [_od("A", 2), _od("B", 3)] * 600)    # fuerza el crecimiento de los arrays
+    new = store.snapshot("G")
+    assert len(old["orders"]) == 1 and old["ledger"].team_positions("A") == {"X": 1.0}
+    assert old["ledger"].teams == ["A"]
+    assert len(new["orders"]) == 1201 and new["ledger"].team_positions("A") == {"X": 1201.0}
+    assert old["ledger"].verify(old["orders"]) == [] and new["ledger"].verify(new["orders"]) == []
+
+def test_versions_per_key(store):
+    store.commit("G", round=1, prices={"X": {"mid": 1.0}})
+    store.register_team("G", "A")
+    store.commit("G", round=1)                 # sin cambios: no sube la versión
+    snap = store.snapshot("G")
+    assert snap["version"] == 2
+    assert snap["versions"]["round"] == snap["versions"]["prices"] == 1 and snap["versions"]["teams"] == 2
+    assert snap["teams"] == frozenset({"A"})
+    assert store.wait_for_change("G", 1, timeout=0.0)
+    assert not store.wait_for_change("G", 2, timeout=0.01)
+
+def test_sqlite_replicas_share_state(tmp_path):
+    a = SqliteGameStore(str(tmp_path / "g.db")); b = SqliteGameStore(str(tmp_path / "g.db"))
+    a.commit("G", prices={"X": {"mid": 1.0}}, round=1)
+    a.register_team("G", "A")
+    s1 = b.snapshot("G")
+    a.append_orders("G", [_od("A", 2)])
+    s2 = b.snapshot("G")
+    assert s2["prices"] is s1["prices"] and s2["teams"] is s1["teams"]   # blobs sin cambios no se releen
+    assert len(s1["orders"]) == 0 and len(s2["orders"]) == 1 and s2["ledger"].team_positions("A") == {"X": 2.0}
+    a.commit("G", prices={"X": {"mid": 2.0}})
+    a.register_team("G", "B")
+    s3 = b.snapshot("G")
+    assert s3["prices"] == {"X": {"mid": 2.0}} and s3["teams"] == frozenset({"A", "B"})
+    assert s3["orders"] is s2["orders"]
+
+def test_eviction_prunes_registries_and_notifies(tmp_path):
+    evicted = []
+    mem = GameStore(max_live_games=1, spill_dir=str(tmp_path / "spill"), on_evict=evicted.append)
+    sql = SqliteGameStore(str(tmp_path / "g.db"), max_live_games=1, on_evict=evicted.append)
+    for store, local in ((mem, mem._locks), (sql, sql._local_locks)):
+        evicted.clear()
+        for gc in ("G1", "G2", "G3"):
+            store.append_orders(gc, [_od("A", 1)])
+        store.sweep()
+        assert evicted == ["G1", "G2"] and set(local) <= {"G3"}
+        assert store.snapshot("G1")["ledger"].team_positions("A") == {"X": 1.0}   # vuelve del disco / la base
+        assert store.stats()["evictions"] == 2
+
+def test_waiter_survives_eviction(tmp_path):
+    store = GameStore(max_live_games=1, spill_dir=str(tmp_path))
+    store.commit("G", round=1)
+    v = store.version("G")
+    t = threading.Timer(0.05, lambda: (store.commit("H", round=1), store.sweep(), store.commit("G", round=2)))
+    t.start()
+    assert store.wait_for_change("G", v, timeout=5.0)
+    t.join()
+    assert store.snapshot("G")["round"] == 2
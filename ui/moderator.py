@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 from ui.components import sort_safe, toast_ok, toast_error, table
-from services.storage_models import parse_scenario_csv
-from domain.events import effective_ytm
-from domain.pricing import price_bond_mid, bid_ask_from_mid
+import config
+from services.storage_models import scenario_records, bond_records, ingest_scenario_stream
+from services.scenario_cache import load_scenario_cached
+from domain.events import effective_ytm, compile_schedule
+from domain.pricing import bond_arrays, price_bonds_vec
 
 def render_moderator(state: dict):
     st.subheader("Panel del Moderador")
@@ -17,10 +19,29 @@ def render_moderator(state: dict):
 
     if uploaded:
         try:
-            bonds, events = parse_scenario_csv(uploaded)
+            if getattr(uploaded, "size", 0) >= config.STREAM_INGEST["min_bytes"]:
+                # Escenario grande: ingesta por lotes directo al schedule, sin lista de eventos en memoria
+                sc = ingest_scenario_stream(uploaded, n_rounds=state.get("rondas_totales", 6),
+                                            chunksize=config.STREAM_INGEST["chunksize"])
+                bonds, events, n_events = bond_records(sc["bonds"]), [], sc["n_events"]
+                state["schedule"] = sc["schedule"]
+                n_rejected = sc["n_rejected"]
+            else:
+                sc = load_scenario_cached(uploaded)
+                bonds, events = scenario_records(sc)
+                n_events, n_rejected = len(events), len(sc["rejected"])
+                state["schedule"] = compile_schedule([b["bond_id"] for b in bonds], events,
+                                                     n_rounds=state.get("rondas_totales", 6))
             state["bonds"] = bonds
             state["events"] = events
-            st.success(f"Escenario cargado: {len(bonds)} bonos, {len(events)} eventos", icon="✅")
+            st.success(f"Escenario cargado: {len(bonds)} bonos, {n_events} eventos", icon="✅")
+            if state["schedule"]["skipped"]:
+                st.warning(f"{state['schedule']['skipped']} eventos con ronda fuera de 1..{state.get('rondas_totales', 6)} "
+                           "se omitieron.", icon="⚠️")
+            if n_rejected:
+                st.warning(f"{n_rejected} celdas o filas no se pudieron leer (celdas con su valor por defecto, "
+                           "filas omitidas).", icon="⚠️")
+                table(sc["rejected"])
         except Exception as e:
             st.error("No se pudo leer el CSV. Revisa cabeceras y separador (, ; o tab).", icon="⚠️")
             st.exception(e)
@@ -51,28 +72,19 @@ def render_moderator(state: dict):
 
         st.markdown(f"**Ronda actual:** {ronda_actual} / {rondas_totales}")
         if st.button("Publicar precios de la ronda", type="primary"):
-            prices = []
             bonds = state.get("bonds", [])
             events = state.get("events", [])
-            # Calcular deltas de la ronda
-            delta_market_bps = sum(e.get("delta_tasa_bps",0) for e in events if e.get("round")==ronda_actual and e.get("tipo")=="MARKET")
-            idios_map = {}
-            for e in events:
-                if e.get("round")==ronda_actual and e.get("tipo")=="IDIOS":
-                    bid_ = e.get("bond_id")
-                    idios_map[bid_] = idios_map.get(bid_, 0.0) + float(e.get("impacto_bps",0))
-
-            for b in bonds:
-                ytm = effective_ytm(base_rate, b.get("spread_bps",0), delta_market_bps, idios_map.get(b.get("bond_id"), 0.0))
-                mid = price_bond_mid(
-                    valor_nominal=b.get("valor_nominal",1000.0),
-                    tasa_cupon_anual=b.get("tasa_cupon_anual",0.0),
-                    frecuencia_anual=b.get("frecuencia_anual",2),
-                    vencimiento_anios=b.get("vencimiento_anios",1.0),
-                    ytm_anual=ytm
-                )
-                bid, ask = bid_ask_from_mid(mid, bid_bp, ask_bp)
-                prices.append({"ronda": ronda_actual, "bond_id": b.get("bond_id"), "y_efectiva": ytm, "precio_mid": mid, "precio_bid": bid, "precio_ask": ask})
+            ids = [b.get("bond_id") for b in bonds]
+            sched = state.get("schedule")
+            if sched is None or list(sched["bond_ids"]) != ids:
+                sched = state["schedule"] = compile_schedule(ids, events, n_rounds=rondas_totales)
+            arr = bond_arrays(bonds)
+            shift = sched["shift_bps"][ronda_actual-1] if ronda_actual <= len(sched["shift_bps"]) else 0.0
+            ytm = effective_ytm(base_rate, arr["spread_bps"], 0.0, shift)
+            mid, bid, ask = price_bonds_vec(arr["valor_nominal"], arr["tasa_cupon_anual"], arr["frecuencia_anual"],
+                                            arr["vencimiento_anios"], ytm, bid_bp, ask_bp)
+            prices = [{"ronda": ronda_actual, "bond_id": b, "y_efectiva": y, "precio_mid": m, "precio_bid": bd, "precio_ask": a}
+                      for b, y, m, bd, a in zip(ids, ytm.tolist(), mid.tolist(), bid.tolist(), ask.tolist())]
             state["prices"] = prices
             toast_ok(f"Precios publicados para ronda {ronda_actual}")
 